@@ -0,0 +1,3 @@
+"""
+Benchmark harness for ProjectTrade hot paths (python -m benchmarks --help)
+"""
@@ -0,0 +1,50 @@
+"""
+Run the benchmark suite, save results as JSON and flag regressions against a baseline
+"""
+import argparse
+import datetime
+import os
+import sys
+from benchmarks import suite  # noqa: F401 (registers benchmarks)
+from benchmarks.harness import BENCHMARKS, run_suite, save_results, load_results, compare
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProjectTrade benchmarks")
+    parser.add_argument('--sizes', type=str, default="1000,100000,1000000",
+                        help='Comma-separated bar counts, e.g. 1000,100000,1000000,10000000')
+    parser.add_argument('--only', type=str, help='Comma-separated benchmark names or prefixes (e.g. backtest,indicators.sma)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark (best is reported)')
+    parser.add_argument('--out', type=str, help='Results JSON path (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', type=str, help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown / memory growth to flag')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 if regressions are found')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, bench in BENCHMARKS.items():
+            print(f"{name:32s} {bench.unit}" + (f" (max {bench.max_n:,d} bars)" if bench.max_n else ""))
+        return 0
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    names = [s for s in (args.only or "").split(',') if s]
+    results = run_suite(sizes, names, repeat=args.repeat)
+    out = args.out or os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    save_results(results, out)
+    print(f"[BENCH] Results written to {out}")
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for r in regressions:
+            print(f"[BENCH] REGRESSION {r['name']} n={r['n']:,d} {r['metric']}: "
+                  f"{r['baseline']:,.0f} -> {r['current']:,.0f} ({r['change'] * 100:+.1f}%)")
+        if not regressions:
+            print(f"[BENCH] No regressions beyond {args.threshold * 100:.0f}% vs {args.baseline}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
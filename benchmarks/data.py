@@ -0,0 +1,43 @@
+"""
+Synthetic OHLCV generators for benchmarks (1k to 10M bars)
+"""
+import os
+import numpy as np
+import pandas as pd
+
+
+def mock_ohlcv(n=200):
+    """Vectorized equivalent of main.load_mock_ohlcv for any n."""
+    i = np.arange(n)
+    close = 100 + i * 0.1 + (i % 10 == 0)
+    open_ = close - 0.05
+    high = np.maximum(open_, close) + 0.1
+    low = np.minimum(open_, close) - 0.1
+    vol = 1000 + (i % 5) * 10
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": vol})
+
+
+def random_walk_ohlcv(n, seed=0, start=100.0, vol=0.01, freq='min'):
+    """Geometric random-walk bars with a DatetimeIndex named 'date'.
+
+    Unlike the trending mock series this produces frequent BUY/SELL flips, so
+    order paths get exercised.
+    """
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.standard_normal(n) * vol))
+    open_ = np.empty(n)
+    open_[0] = start
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.standard_normal(n)) * vol * close * 0.5
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(500, 5000, size=n)
+    index = pd.date_range("2020-01-01", periods=n, freq=freq, name="date")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+def write_csv(df, path):
+    """Write bars in the layout load_csv_ohlcv / CSVFeed read (date column first when indexed by time)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    df.to_csv(path, index=isinstance(df.index, pd.DatetimeIndex))
+    return path
@@ -0,0 +1,154 @@
+"""
+Benchmark registry, timing/memory runner and JSON result comparison
+"""
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import datetime
+
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """A named hot path.
+
+    fn(n) does the setup for n bars and returns a zero-argument callable that
+    runs the measured work once and returns the number of units it processed
+    (or (units, extra_dict)). Only that callable is timed. Sizes above max_n
+    are skipped (e.g. per-bar Python loops at 10M bars). With memory=False the
+    tracemalloc pass is skipped and peak memory comes from extra['peak_mem_bytes'].
+    """
+    def __init__(self, name, fn, unit='bars', max_n=None, memory=True):
+        self.name = name
+        self.fn = fn
+        self.unit = unit
+        self.max_n = max_n
+        self.memory = memory
+
+
+def benchmark(name, unit='bars', max_n=None, memory=True):
+    """Decorator registering a benchmark setup function under name."""
+    def register(fn):
+        BENCHMARKS[name] = Benchmark(name, fn, unit, max_n, memory)
+        return fn
+    return register
+
+
+def _call(run):
+    out = run()
+    if isinstance(out, tuple):
+        return out[0], dict(out[1])
+    return out, {}
+
+
+def run_benchmark(bench, n, repeat=3):
+    """Best-of-repeat timing plus a separate tracemalloc pass for peak memory."""
+    times = []
+    units = 0
+    extra = {}
+    for _ in range(repeat):
+        run = bench.fn(n)
+        gc.collect()
+        t0 = time.perf_counter()
+        units, extra = _call(run)
+        times.append(time.perf_counter() - t0)
+    peak = extra.pop('peak_mem_bytes', None)
+    if bench.memory:
+        run = bench.fn(n)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _call(run)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    best = min(times)
+    result = {'name': bench.name, 'n': n, 'unit': bench.unit, 'units': units, 'seconds': best,
+              'mean_seconds': sum(times) / len(times), 'throughput': units / best if best > 0 else None,
+              'peak_mem_bytes': peak}
+    for key, value in extra.items():
+        result[key] = value
+        # Secondary counts (e.g. orders in an end-to-end run) get their own rate
+        if key.endswith('_count') and best > 0:
+            result[key[:-len('_count')] + '_per_sec'] = value / best
+    return result
+
+
+def run_suite(sizes, names=None, repeat=3, progress=True):
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if names and not any(name == n or name.startswith(n + '.') for n in names):
+            continue
+        for n in sizes:
+            if bench.max_n is not None and n > bench.max_n:
+                continue
+            try:
+                result = run_benchmark(bench, n, repeat)
+            except Exception as e:
+                print(f"[BENCH] {name} n={n} failed: {e}")
+                continue
+            results.append(result)
+            if progress:
+                mem = result['peak_mem_bytes']
+                print(f"[BENCH] {name:32s} n={n:>10,d} {result['throughput'] or 0:>14,.0f} {bench.unit}/s"
+                      f"  {result['seconds']:.4f}s" + (f"  peak {mem / 2**20:.1f} MiB" if mem is not None else ""))
+    return results
+
+
+def environment():
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {'timestamp': datetime.datetime.utcnow().isoformat(), 'commit': commit,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': numpy.__version__, 'pandas': pandas.__version__, 'cpus': os.cpu_count()}
+
+
+def save_results(results, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({'meta': environment(), 'results': results}, f, indent=1)
+    os.replace(tmp, path)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.10, min_mem_delta=1 << 20):
+    """Flag (name, n) entries slower or hungrier than baseline by more than threshold.
+
+    baseline is a loaded results file (or its 'results' list). Throughput drops
+    beyond threshold and peak-memory growth beyond threshold (and at least
+    min_mem_delta bytes) are reported.
+    """
+    base = baseline.get('results', []) if isinstance(baseline, dict) else baseline
+    index = {(r['name'], r['n']): r for r in base}
+    regressions = []
+    for r in results:
+        b = index.get((r['name'], r['n']))
+        if b is None:
+            continue
+        if r.get('throughput') and b.get('throughput'):
+            change = r['throughput'] / b['throughput'] - 1.0
+            if change < -threshold:
+                regressions.append({'name': r['name'], 'n': r['n'], 'metric': 'throughput',
+                                    'baseline': b['throughput'], 'current': r['throughput'], 'change': change})
+        if r.get('peak_mem_bytes') and b.get('peak_mem_bytes'):
+            delta = r['peak_mem_bytes'] - b['peak_mem_bytes']
+            change = delta / b['peak_mem_bytes']
+            if change > threshold and delta >= min_mem_delta:
+                regressions.append({'name': r['name'], 'n': r['n'], 'metric': 'peak_mem_bytes',
+                                    'baseline': b['peak_mem_bytes'], 'current': r['peak_mem_bytes'], 'change': change})
+    return regressions
@@ -0,0 +1,351 @@
+"""
+Hot-path benchmarks: strategies, backtester, indicators, logger, data loading, brokers and an end-to-end paper run
+"""
+import asyncio
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from benchmarks.data import random_walk_ohlcv, write_csv
+from benchmarks.harness import benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=4)
+def _bars(n):
+    df = random_walk_ohlcv(n, seed=n)
+    df.attrs['data_key'] = ('BENCH', n)
+    return df
+
+
+@functools.lru_cache(maxsize=4)
+def _csv(n):
+    path = os.path.join(tempfile.gettempdir(), f"projecttrade_bench_{n}.csv")
+    if not os.path.exists(path):
+        write_csv(_bars(n), path)
+    return path
+
+
+def _scratch():
+    return tempfile.mkdtemp(prefix="projecttrade_bench_")
+
+
+# --- Data ---
+@benchmark('data.random_walk')
+def bench_random_walk(n):
+    return lambda: len(random_walk_ohlcv(n, seed=1))
+
+
+# --- Strategies ---
+def _momentum(n):
+    """Tagged bars and a MomentumStrategy with the indicator cache emptied, so the timed call computes."""
+    from strategies.momentum import MomentumStrategy
+    from utils.indicator_cache import default_cache
+    default_cache.clear()
+    return _bars(n), MomentumStrategy()
+
+
+@benchmark('strategy.momentum_signals', max_n=1_000_000)
+def bench_momentum_signals(n):
+    df, strat = _momentum(n)
+    return lambda: len(strat.generate_signals(df))
+
+
+@benchmark('strategy.momentum_signal_array')
+def bench_momentum_signal_array(n):
+    df, strat = _momentum(n)
+    return lambda: len(strat.generate_signal_array(df))
+
+
+@benchmark('strategy.momentum_signal_cached')
+def bench_momentum_signal_array_cached(n):
+    """Repeat call on the same tagged frame: the lag indicator is an indicator-cache hit."""
+    df, strat = _momentum(n)
+    strat.generate_signal_array(df)
+    return lambda: len(strat.generate_signal_array(df))
+
+
+# --- Backtester ---
+def _backtest_inputs(n):
+    from core.backtester import Backtester
+    from strategies.momentum import MomentumStrategy
+    df = _bars(n)
+    return Backtester({}, None, fee_per_trade=1.0, slippage_bps=5.0), df, MomentumStrategy().generate_signal_array(df)
+
+
+@benchmark('backtest.simulate', max_n=1_000_000)
+def bench_simulate(n):
+    bt, df, signals = _backtest_inputs(n)
+    return lambda: len(bt.simulate(df, signals)[0])
+
+
+@benchmark('backtest.simulate_vectorized')
+def bench_simulate_vectorized(n):
+    bt, df, signals = _backtest_inputs(n)
+    return lambda: len(bt.simulate_vectorized(df, signals)[0])
+
+
+@benchmark('backtest.simulate_exit_rules')
+def bench_simulate_exit_rules(n):
+    """simulate_vectorized with the default RiskEngine stop-loss/target/trailing-stop rules."""
+    from core.risk import DEFAULT_CONFIG
+    bt, df, signals = _backtest_inputs(n)
+    bt.exit_rules = DEFAULT_CONFIG
+    return lambda: len(bt.simulate_vectorized(df, signals)[0])
+
+
+# --- Indicators ---
+def _batch_indicator(fn, **params):
+    def setup(n):
+        close = _bars(n)['close']
+        return lambda: len(fn(close, **params))
+    return setup
+
+
+def _register_indicators():
+    from utils import indicators
+    benchmark('indicators.sma')(_batch_indicator(indicators.sma, period=20))
+    benchmark('indicators.ema')(_batch_indicator(indicators.ema, period=20))
+    benchmark('indicators.rsi')(_batch_indicator(indicators.rsi, period=14))
+
+
+_register_indicators()
+
+
+def _incremental(cls, **params):
+    def setup(n):
+        closes = _bars(n)['close'].to_numpy().tolist()
+        ind = cls(**params)
+
+        def run():
+            update = ind.update
+            for c in closes:
+                update(c)
+            return len(closes)
+        return run
+    return setup
+
+
+def _register_incremental():
+    from utils.indicators import IncrementalSMA, IncrementalEMA, IncrementalRSI
+    benchmark('indicators.incremental_sma', max_n=1_000_000)(_incremental(IncrementalSMA, period=20))
+    benchmark('indicators.incremental_ema', max_n=1_000_000)(_incremental(IncrementalEMA, period=20))
+    benchmark('indicators.incremental_rsi', max_n=1_000_000)(_incremental(IncrementalRSI, period=14))
+
+
+_register_incremental()
+
+
+# --- Models ---
+@benchmark('model.lstm_predict_series', unit='windows', max_n=1_000_000)
+def bench_lstm_predict_series(n):
+    """Default LSTMModel scoring every 60-bar window of n closes on CPU (needs torch)."""
+    import torch
+    from models.lstm import LSTMModel
+    from models.lstm_inference import LSTMPredictor
+    torch.manual_seed(0)
+    predictor = LSTMPredictor(LSTMModel(), window=60)
+    closes = _bars(n)['close'].to_numpy()
+    return lambda: len(predictor.predict_series(closes))
+
+
+# --- Logger ---
+def _signal_records(n):
+    closes = _bars(n)['close'].to_numpy().tolist()
+    return [{'i': i, 'symbol': 'BENCH', 'strategy': 'momentum', 'signal': 'HOLD', 'price': c}
+            for i, c in enumerate(closes)]
+
+
+@benchmark('logger.signals_write_through', unit='records', max_n=100_000)
+def bench_logger_write_through(n):
+    from utils.logger import log_signal_json
+    records, out_dir = _signal_records(n), _scratch()
+
+    def run():
+        try:
+            for r in records:
+                log_signal_json(dict(r), out_dir=out_dir)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return len(records)
+    return run
+
+
+@benchmark('logger.signals_buffered', unit='records', max_n=1_000_000)
+def bench_logger_buffered(n):
+    from utils.logger import log_signal_json, configure_buffered_logging, shutdown_logging
+    records, out_dir = _signal_records(n), _scratch()
+
+    def run():
+        configure_buffered_logging()
+        try:
+            for r in records:
+                log_signal_json(dict(r), out_dir=out_dir)
+        finally:
+            # Include the final flush so the figure covers getting records to disk
+            shutdown_logging()
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return len(records)
+    return run
+
+
+# --- Data loading ---
+@benchmark('io.load_csv_ohlcv', max_n=1_000_000)
+def bench_load_csv(n):
+    from main import load_csv_ohlcv
+    path = _csv(n)
+    return lambda: len(load_csv_ohlcv(path))
+
+
+@benchmark('io.ohlcv_store_load')
+def bench_store_load(n):
+    from utils.ohlcv_store import OHLCVStore
+    root = _scratch()
+    store = OHLCVStore(root)
+    store.import_csv(_csv(n), 'BENCH')
+
+    def run():
+        try:
+            return len(store.load('BENCH')['close'])
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return run
+
+
+# --- Brokers ---
+@benchmark('broker.paper_fills', unit='orders', max_n=1_000_000)
+def bench_paper_broker(n):
+    from core.paper_broker import PaperBroker, FillModel
+    df = _bars(n)
+    bars = df[['open', 'high', 'low', 'close', 'volume']].to_dict('records')
+    sides = np.where(np.arange(n) % 2 == 0, 'BUY', 'SELL').tolist()
+
+    def run():
+        broker = PaperBroker(FillModel(latency=0.0, seed=1), bar_interval=60.0)
+        for bar, side in zip(bars, sides):
+            broker.place_order('BENCH', 1, side, 'MARKET')
+            broker.on_bar('BENCH', bar)
+        return n, {'fills_count': len(broker.fills)}
+    return run
+
+
+@benchmark('broker.order_pipeline', unit='orders', max_n=100_000)
+def bench_order_pipeline(n):
+    from core.async_broker import FakeAsyncBroker, OrderPipeline
+
+    async def submit_all():
+        pipeline = OrderPipeline(FakeAsyncBroker(latency=0.0, seed=1), max_in_flight=64)
+        await asyncio.gather(*(pipeline.submit('BENCH', 1, 'BUY', 'MARKET') for _ in range(n)))
+        return pipeline.stats['acked']
+    return lambda: asyncio.run(submit_all())
+
+
+# --- Risk ---
+def _risk_book(n_symbols=500):
+    from core.risk import RiskEngine
+    risk = RiskEngine()
+    for k in range(n_symbols):
+        risk.record_fill(f"SYM{k:03d}", 'momentum', 100.0)
+    return risk
+
+
+@benchmark('risk.check_orders', unit='orders', max_n=1_000_000)
+def bench_risk_check_orders(n):
+    """Pre-trade checks for bursts of 500 candidate orders against a 500-symbol book."""
+    risk = _risk_book()
+    rng = np.random.default_rng(1)
+    symbols = [f"SYM{k:03d}" for k in rng.integers(0, 600, size=500)]
+    strategies = ['momentum', 'mean_reversion'] * 250
+    notionals = rng.normal(200.0, 500.0, size=500)
+    bursts = max(1, n // 500)
+
+    def run():
+        for _ in range(bursts):
+            risk.check_orders(symbols, strategies, notionals, 1_000_000)
+        return bursts * 500
+    return run
+
+
+@benchmark('risk.check_trade', unit='orders', max_n=1_000_000)
+def bench_risk_check_trade(n):
+    risk = _risk_book()
+    symbols = [f"SYM{k % 600:03d}" for k in range(n)]
+
+    def run():
+        check = risk.check_trade
+        for s in symbols:
+            check(1_000_000, 150.0, 0, s, 'momentum')
+        return n
+    return run
+
+
+@benchmark('e2e.event_engine_replay', max_n=1_000_000)
+def bench_event_engine(n):
+    """Synthetic 200-symbol x 1-second bars through the sharded EventEngine, as fast as it will go."""
+    from core.event_engine import EventEngine, synthetic_bars, replay
+    from core.risk import RiskEngine
+    from strategies.momentum import MomentumStrategy
+    from utils.logger import configure_buffered_logging, shutdown_logging
+    symbols = [f"SYM{i:03d}" for i in range(200)]
+    steps = list(synthetic_bars(symbols, max(1, n // len(symbols)), seed=1))
+
+    def run():
+        out_dir = _scratch()
+        configure_buffered_logging()
+        try:
+            engine = EventEngine(lambda s: {'momentum': MomentumStrategy()}, RiskEngine(), workers=4, out_dir=out_dir)
+            stats = replay(engine, steps, realtime=False)
+        finally:
+            shutdown_logging()
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return stats['events'], {'orders_count': stats['stages']['order']['count']}
+    return run
+
+
+# --- End to end ---
+_E2E_RUNNER = """
+import resource, runpy, sys
+sys.argv = ['main.py', '--paper', '--start', '--data-csv', sys.argv[1]]
+try:
+    runpy.run_path({main!r}, run_name='__main__')
+finally:
+    print('BENCH_MAXRSS_KB=%d' % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+@benchmark('e2e.paper_run', max_n=1_000_000, memory=False)
+def bench_paper_run(n):
+    """main.py --paper --start over a CSV of n bars, in a fresh process and scratch directory."""
+    csv_path = _csv(n)
+
+    def run():
+        work = _scratch()
+        try:
+            os.symlink(os.path.join(ROOT, 'strategies'), os.path.join(work, 'strategies'))
+            env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+            proc = subprocess.run([sys.executable, '-c', _E2E_RUNNER.format(main=os.path.join(ROOT, 'main.py')),
+                                   csv_path], cwd=work, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(proc.stdout[-500:] + proc.stderr[-500:])
+            rss = [line for line in proc.stdout.splitlines() if line.startswith('BENCH_MAXRSS_KB=')]
+            logs = os.path.join(work, 'logs')
+            # Entries are logged to positions.json, exits to trades.json
+            orders = _count_lines(os.path.join(logs, 'positions.json')) + _count_lines(os.path.join(logs, 'trades.json'))
+            extra = {'orders_count': orders}
+            if rss:
+                extra['peak_mem_bytes'] = int(rss[-1].split('=')[1]) * 1024
+            return n, extra
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return run
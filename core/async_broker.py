@@ -0,0 +1,255 @@
+"""
+Async broker interface and order pipeline: bounded in-flight orders, rate limiting, timeout/retry
+"""
+import asyncio
+import random
+import threading
+import time
+import itertools
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OrderNotSentError(Exception):
+    """Raised by a broker when an order certainly never reached it (safe to resubmit)."""
+
+
+# Failures known to happen before an order is submitted; anything else may have reached the broker
+PRE_SUBMIT_ERRORS = (OrderNotSentError, ConnectionRefusedError)
+
+
+class AsyncBrokerBase(ABC):
+    """Abstract base class for brokers with non-blocking (coroutine) calls."""
+    @abstractmethod
+    async def authenticate(self):
+        pass
+
+    @abstractmethod
+    async def place_order(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        pass
+
+    @abstractmethod
+    async def get_positions(self):
+        pass
+
+    @abstractmethod
+    async def get_balance(self):
+        pass
+
+    @abstractmethod
+    async def cancel_order(self, order_id):
+        pass
+
+
+class SyncBrokerAdapter(AsyncBrokerBase):
+    """Runs a blocking BrokerBase (e.g. AngelOneBroker) on a thread pool."""
+    def __init__(self, broker, max_workers=8):
+        self.broker = broker
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="broker")
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def authenticate(self):
+        return await self._call(self.broker.authenticate)
+
+    async def place_order(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        return await self._call(self.broker.place_order, symbol, qty, side, order_type, price, sl, target, **kwargs)
+
+    async def get_positions(self):
+        return await self._call(self.broker.get_positions)
+
+    async def get_balance(self):
+        return await self._call(self.broker.get_balance)
+
+    async def cancel_order(self, order_id):
+        return await self._call(self.broker.cancel_order, order_id)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class FakeAsyncBroker(AsyncBrokerBase):
+    """Local stand-in broker that injects latency and failures, for testing the pipeline.
+
+    latency is a fixed number of seconds, a (low, high) uniform range or a callable
+    returning seconds; failure_rate is the probability a call raises
+    ConnectionRefusedError (a connect failure, before anything is sent).
+    """
+    def __init__(self, latency=(0.01, 0.05), failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self.orders = []
+
+    async def _delay(self):
+        if callable(self.latency):
+            delay = self.latency()
+        elif isinstance(self.latency, (tuple, list)):
+            delay = self._rng.uniform(*self.latency)
+        else:
+            delay = float(self.latency)
+        await asyncio.sleep(delay)
+        if self._rng.random() < self.failure_rate:
+            raise ConnectionRefusedError("Injected broker failure")
+
+    async def authenticate(self):
+        await self._delay()
+        return True
+
+    async def place_order(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        await self._delay()
+        order = {'order_id': f"FAKE{next(self._ids)}", 'symbol': symbol, 'qty': qty, 'side': side,
+                 'order_type': order_type, 'price': price, 'status': 'ACK', 'ts': time.time()}
+        self.orders.append(order)
+        return order
+
+    async def get_positions(self):
+        await self._delay()
+        return []
+
+    async def get_balance(self):
+        await self._delay()
+        return {}
+
+    async def cancel_order(self, order_id):
+        await self._delay()
+        return {'order_id': order_id, 'status': 'CANCELLED'}
+
+
+class RateLimiter:
+    """Async token bucket: `rate` calls per second with bursts of up to `burst`."""
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class OrderPipeline:
+    """Concurrent order submission against an AsyncBrokerBase.
+
+    Orders run as independent tasks, so one slow round trip no longer blocks the
+    others; at most max_in_flight are outstanding at the broker and, if rate_limit
+    is set, no more than rate_limit orders/sec are sent. Each attempt is bounded by
+    timeout seconds. Only failures in retry_on (default PRE_SUBMIT_ERRORS: errors
+    raised before the order is sent) are retried, with exponential backoff; any
+    other error, like a timeout unless retry_on_timeout is set, may come after the
+    order reached the exchange and is raised rather than risk a duplicate.
+
+    Use submit() from coroutines on the pipeline's loop, or start() the pipeline on
+    a background loop and call submit_threadsafe() from synchronous code.
+    """
+    def __init__(self, broker, max_in_flight=8, rate_limit=None, burst=None, timeout=10.0,
+                 retries=2, backoff=0.2, retry_on_timeout=False, retry_on=PRE_SUBMIT_ERRORS):
+        self.broker = broker
+        self.max_in_flight = int(max_in_flight)
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.retry_on_timeout = retry_on_timeout
+        self.retry_on = tuple(retry_on)
+        self._semaphore = None
+        self._limiter = None
+        self._loop = None
+        self._thread = None
+        self.stats = {'submitted': 0, 'acked': 0, 'failed': 0, 'retries': 0, 'timeouts': 0}
+
+    def _ensure_primitives(self):
+        # asyncio primitives must be created on the loop that uses them
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            if self.rate_limit:
+                self._limiter = RateLimiter(self.rate_limit, self.burst)
+
+    def submit(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        """Schedule an order on the running loop; returns an asyncio.Task resolving to the ack."""
+        self._ensure_primitives()
+        self.stats['submitted'] += 1
+        return asyncio.ensure_future(self._execute(symbol, qty, side, order_type, price, sl, target, kwargs))
+
+    async def _execute(self, symbol, qty, side, order_type, price, sl, target, kwargs):
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if self._limiter is not None:
+                        await self._limiter.acquire()
+                    ack = await asyncio.wait_for(
+                        self.broker.place_order(symbol, qty, side, order_type, price, sl, target, **kwargs),
+                        timeout=self.timeout)
+                self.stats['acked'] += 1
+                return ack
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                if not self.retry_on_timeout or attempt >= self.retries:
+                    self.stats['failed'] += 1
+                    raise
+            except Exception as e:
+                if not isinstance(e, self.retry_on) or attempt >= self.retries:
+                    self.stats['failed'] += 1
+                    raise
+            attempt += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    # --- Background loop for synchronous callers ---
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(ready.set)
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="order-pipeline", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def submit_threadsafe(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        """Submit from any thread; returns a concurrent.futures.Future for the ack."""
+        if self._loop is None:
+            self.start()
+
+        async def run():
+            return await self.submit(symbol, qty, side, order_type, price, sl, target, **kwargs)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop)
+
+    def stop(self, timeout=None):
+        """Wait for outstanding orders (up to timeout seconds) and stop the background loop."""
+        if self._loop is None:
+            return
+        loop = self._loop
+
+        async def drain():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+        asyncio.run_coroutine_threadsafe(drain(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._limiter = None
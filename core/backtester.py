@@ -1,43 +1,156 @@
 """
 Multi-symbol, multi-strategy backtesting engine with walk-forward support
 """
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import copy
+import json
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from strategies.base import BUY, SELL, get_signal_array, get_warmup, signals_to_array
+from utils.pnl_aggregates import PnLAggregates
+from core.optimizer import ParameterSweep
+from core.metrics import metrics_table, save_metrics
+
+# Per-process backtester used by pool workers (set by _init_worker)
+_worker_backtester = None
+_DONE = object()
 
 class Backtester:
-    def __init__(self, strategies, data_loader, initial_capital=100000, fee_per_trade=0.0, slippage_bps=0.0):
+    def __init__(self, strategies, data_loader, initial_capital=100000, fee_per_trade=0.0, slippage_bps=0.0, vectorized=False,
+                 exit_rules=None):
         self.strategies = strategies  # dict: name -> strategy instance
         self.data_loader = data_loader
         self.initial_capital = initial_capital
         self.fee_per_trade = float(fee_per_trade)
         self.slippage_bps = float(slippage_bps)  # basis points applied on trade price
+        self.vectorized = vectorized  # use the NumPy simulation path in run()
+        # stop_loss_pct / target_pct / trailing_stop_pct (e.g. RiskEngine().config) for intrabar exits
+        self.exit_rules = exit_rules
         self.results = {}
 
-    def run(self, symbols, start_date, end_date):
+    def run(self, symbols, start_date, end_date, workers=None, progress=False):
+        """Backtest every (symbol, strategy) cell.
+
+        With workers > 1 symbols are fanned out across a process pool; each worker
+        loads a symbol once and runs all strategies on it. The data loader and
+        strategies must then be picklable. Results are merged in symbol/strategy
+        order regardless of completion order.
+        """
+        symbols = list(symbols)
+        if not workers or workers <= 1:
+            for n, symbol in enumerate(symbols, 1):
+                for key, result in self._run_symbol(symbol, start_date, end_date):
+                    self.results[key] = result
+                if progress:
+                    print(f"[BACKTEST] {n}/{len(symbols)} symbols done ({symbol})")
+            return self.results
+        by_symbol = {}
+        # Bound in-flight tasks so huge universes do not queue every result at once
+        max_pending = workers * 2
+        pending = {}
+        queue = iter(symbols)
+        # Ship workers a copy without accumulated results
+        template = copy.copy(self)
+        template.results = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template,)) as pool:
+            while True:
+                while len(pending) < max_pending:
+                    symbol = next(queue, _DONE)
+                    if symbol is _DONE:
+                        break
+                    pending[pool.submit(_run_worker_symbol, symbol, start_date, end_date)] = symbol
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    symbol = pending.pop(fut)
+                    by_symbol[symbol] = fut.result()
+                    if progress:
+                        print(f"[BACKTEST] {len(by_symbol)}/{len(symbols)} symbols done ({symbol})")
         for symbol in symbols:
-            df = self.data_loader(symbol, start_date, end_date)
-            for strat_name, strat in self.strategies.items():
-                signals = strat.generate_signals(df)
+            for key, result in by_symbol[symbol]:
+                self.results[key] = result
+        return self.results
+
+    def _run_symbol(self, symbol, start_date, end_date):
+        df = self.data_loader(symbol, start_date, end_date)
+        if hasattr(df, 'attrs'):
+            # Lets strategies share cached indicators computed on this frame
+            df.attrs.setdefault('data_key', (symbol, str(start_date), str(end_date)))
+        out = []
+        for strat_name, strat in self.strategies.items():
+            signals = get_signal_array(strat, df)
+            if self.vectorized:
+                pnl_series, trades = self.simulate_vectorized(df, signals)
+            else:
                 pnl_series, trades = self.simulate(df, signals)
-                self.results[(symbol, strat_name)] = {'pnl': pnl_series, 'trades': trades}
+            out.append(((symbol, strat_name), {'pnl': pnl_series, 'trades': trades}))
+        return out
+
+    def _exit_levels(self):
+        """(stop_loss_pct, target_pct, trailing_stop_pct) from exit_rules, or None when no rule is enabled."""
+        rules = self.exit_rules or {}
+        levels = tuple(float(rules.get(k) or 0.0) for k in ('stop_loss_pct', 'target_pct', 'trailing_stop_pct'))
+        return levels if any(levels) else None
 
     def simulate(self, df, signals):
+        """Per-bar reference simulation: long-only, one unit, fills at close.
+
+        With exit_rules, an open position is first checked against each later
+        bar's high/low: the stop is the higher of the fixed stop below entry and
+        the trailing stop below the highest high seen before that bar. A bar that
+        opens beyond a level fills at the open. When stop and target are both
+        touched inside one bar the stop is assumed to come first. The close
+        signal is then handled as usual, so a BUY can re-enter on that bar.
+        """
+        levels = self._exit_levels()
+        if levels:
+            sl, tp, ts = levels
+            opens = df['open'] if 'open' in df else None
         capital = self.initial_capital
         position = 0
         trades = []
         pnl_list = []
-        for i, signal in enumerate(signals):
+        for i, signal in enumerate(signals_to_array(signals)):
             price = df['close'].iloc[i]
             # apply slippage on execution price
             slip_mult = 1.0 + (self.slippage_bps / 10000.0)
-            if signal == 'BUY' and position == 0:
+            if levels and position == 1 and i > entry_index:
+                high, low = df['high'].iloc[i], df['low'].iloc[i]
+                bar_open = opens.iloc[i] if opens is not None else np.nan
+                fixed = entry_price * (1.0 - sl) if sl else -np.inf
+                trail = peak * (1.0 - ts) if ts else -np.inf
+                stop = max(fixed, trail)
+                target = entry_price * (1.0 + tp) if tp else np.inf
+                fill = None
+                if high >= target and bar_open >= target:
+                    fill, reason = bar_open, 'target'
+                elif low <= stop:
+                    fill = bar_open if bar_open <= stop else stop
+                    reason = 'trailing_stop' if trail > fixed else 'stop_loss'
+                elif high >= target:
+                    fill, reason = target, 'target'
+                if fill is not None:
+                    exec_price = fill / slip_mult
+                    pnl = exec_price - entry_price
+                    capital += pnl
+                    capital -= self.fee_per_trade
+                    position = 0
+                    trades.append({'action': 'SELL', 'price': exec_price, 'index': i, 'fee': self.fee_per_trade, 'pnl': pnl,
+                                   'reason': reason})
+                else:
+                    peak = max(peak, high)
+            if signal == BUY and position == 0:
                 exec_price = price * slip_mult
                 position = 1
                 entry_price = exec_price
+                entry_index = i
+                peak = entry_price
                 capital -= self.fee_per_trade
                 trades.append({'action': 'BUY', 'price': exec_price, 'index': i, 'fee': self.fee_per_trade})
-            elif signal == 'SELL' and position == 1:
+            elif signal == SELL and position == 1:
                 exec_price = price / slip_mult
                 pnl = exec_price - entry_price
                 capital += pnl
@@ -47,6 +160,123 @@ class Backtester:
             pnl_list.append(capital)
         return pnl_list, trades
 
+    def simulate_vectorized(self, df, signals):
+        """Array-based equivalent of simulate().
+
+        Produces the same equity curve (as a float64 array) and trade list as the
+        per-bar loop, but derives position state and fills with NumPy instead of
+        walking the signals one at a time.
+        """
+        close = np.asarray(df['close'], dtype=np.float64)
+        codes = signals_to_array(signals)
+        n = len(codes)
+        close = close[:n]
+        slip_mult = 1.0 + (self.slippage_bps / 10000.0)
+        fee = self.fee_per_trade
+        levels = self._exit_levels()
+        reasons = None
+
+        if levels:
+            entries, entry_px, exits, exit_px, reasons = _exit_rule_fills(df, codes, close, slip_mult, levels)
+        else:
+            # Position after each bar is the last BUY/SELL seen so far (flat before any):
+            # BUY while long and SELL while flat are no-ops in the loop.
+            idx = np.where(codes != 0, np.arange(n), -1)
+            np.maximum.accumulate(idx, out=idx)
+            held = np.where(idx >= 0, codes[np.maximum(idx, 0)], -1) == 1
+            prev = np.zeros_like(held)
+            prev[1:] = held[:-1]
+            entries = np.flatnonzero(held & ~prev)
+            exits = np.flatnonzero(~held & prev)
+            entry_px = close[entries] * slip_mult
+            exit_px = close[exits] / slip_mult
+        pnl = exit_px - entry_px[:len(exits)]
+
+        # Replay capital changes in the loop's exact order (fee on entry; pnl then
+        # fee on exit) so the running sum matches it bit for bit.
+        n_ops = len(entries) + 2 * len(exits)
+        op_bar = np.empty(n_ops, dtype=np.int64)
+        op_val = np.empty(n_ops, dtype=np.float64)
+        # Entries and exits alternate, starting with an entry: E X E X ... [E]
+        pos = np.arange(len(entries)) * 3
+        op_bar[pos] = entries
+        op_val[pos] = -fee
+        pos = np.arange(len(exits)) * 3 + 1
+        op_bar[pos] = exits
+        op_val[pos] = pnl
+        op_bar[pos + 1] = exits
+        op_val[pos + 1] = -fee
+        capital = np.add.accumulate(np.concatenate(([float(self.initial_capital)], op_val)))
+        # Capital at bar i is the value after the last operation at or before i
+        last_op = np.searchsorted(op_bar, np.arange(n), side='right')
+        equity = capital[last_op]
+
+        trades = []
+        for k, i in enumerate(entries.tolist()):
+            trades.append({'action': 'BUY', 'price': float(entry_px[k]), 'index': i, 'fee': fee})
+            if k < len(exits):
+                trades.append({'action': 'SELL', 'price': float(exit_px[k]), 'index': int(exits[k]), 'fee': fee, 'pnl': float(pnl[k])})
+                if reasons is not None and reasons[k] is not None:
+                    trades[-1]['reason'] = reasons[k]
+        return equity, trades
+
+    def walk_forward(self, symbols, start_date, end_date, strategy_cls, param_grid=None, param_space=None,
+                     n_samples=20, seed=None, train_bars=500, test_bars=100, step=None, anchored=False,
+                     metric='pnl', halving=True, eta=3, min_bars=100, workers=None, progress=False):
+        """Walk-forward analysis: optimize on each train window, trade the following test window.
+
+        Windows are bar offsets over the loaded history. Rolling windows keep
+        train_bars fixed and move by step (default test_bars); anchored windows
+        always start at bar 0. Each fold runs a ParameterSweep on the train
+        slice and scores the winning config on the test slice, with the
+        strategy's warmup taken from the bars before it. Folds run in a process
+        pool when workers > 1, with each symbol's data shipped to a worker once;
+        slices are iloc row views of the loaded frames, not copies.
+
+        Returns {'folds': DataFrame (one row per fold), 'equity': {symbol:
+        stitched out-of-sample equity array}}. Each test fold starts flat, so a
+        position still open at the end of a fold is dropped as in simulate().
+        """
+        data = {}
+        for symbol in symbols:
+            df = self.data_loader(symbol, start_date, end_date)
+            data[symbol] = (df, (symbol, str(start_date), str(end_date)))
+        n_bars = min((len(df) for df, _ in data.values()), default=0)
+        folds = walk_forward_folds(n_bars, train_bars, test_bars, step=step, anchored=anchored)
+        sweep = ParameterSweep(self, strategy_cls, param_grid=param_grid, param_space=param_space,
+                               n_samples=n_samples, seed=seed, metric=metric)
+        template = copy.copy(self)
+        template.results = {}
+        state = (template, strategy_cls, sweep.variants, metric, data, dict(halving=halving, eta=eta, min_bars=min_bars))
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_wf_worker, initargs=(state,)) as pool:
+                outs = list(pool.map(_run_wf_fold, folds))
+        else:
+            _init_wf_worker(state)
+            outs = []
+            for n, fold in enumerate(folds, 1):
+                outs.append(_run_wf_fold(fold))
+                if progress:
+                    print(f"[WALKFORWARD] {n}/{len(folds)} folds done")
+
+        rows = []
+        equity = {symbol: [] for symbol in data}
+        offset = {symbol: 0.0 for symbol in data}
+        for k, ((tr0, tr1, te0, te1), (params, train_score, per_symbol)) in enumerate(zip(folds, outs)):
+            row = {'fold': k, 'train_start': tr0, 'train_end': tr1, 'test_start': te0, 'test_end': te1,
+                   **params, 'train_score': train_score, 'test_pnl': 0.0, 'test_trades': 0}
+            for symbol, (curve, trades) in per_symbol.items():
+                # Continue each fold's curve from where the previous one ended
+                equity[symbol].append(np.asarray(curve, dtype=np.float64) + offset[symbol])
+                if len(curve):
+                    offset[symbol] += float(curve[-1]) - self.initial_capital
+                    row['test_pnl'] += float(curve[-1]) - self.initial_capital
+                row['test_trades'] += sum(1 for t in trades if 'pnl' in t)
+            rows.append(row)
+        stitched = {symbol: np.concatenate(parts) if parts else np.empty(0) for symbol, parts in equity.items()}
+        self.walk_forward_results = {'folds': pd.DataFrame(rows), 'equity': stitched}
+        return self.walk_forward_results
+
     def plot_pnl(self, symbol, strat_name):
         result = self.results.get((symbol, strat_name))
         if not result:
@@ -59,8 +289,182 @@ class Backtester:
         plt.ylabel("Capital")
         plt.show()
 
-    def export_logs(self, out_dir="logs"):
+    def metrics(self, periods_per_year=252):
+        """Performance report (Sharpe, drawdown, exposure, ...) for every result, computed in one batch."""
+        return metrics_table(self.results, periods_per_year)
+
+    def export_logs(self, out_dir="logs", periods_per_year=252):
         os.makedirs(out_dir, exist_ok=True)
+        summary = []
+        report = self.metrics(periods_per_year)
         for (symbol, strat_name), result in self.results.items():
             fname = f"{out_dir}/backtest_{symbol}_{strat_name}.csv"
             pd.DataFrame(result['trades']).to_csv(fname, index=False)
+            # Pre-aggregated leaderboard row (pnl, trades, win rate, max drawdown) plus the metrics report
+            agg = PnLAggregates().add_trades(t for t in result['trades'] if 'pnl' in t)
+            row = report.loc[(symbol, strat_name)]
+            summary.append({'symbol': symbol, 'strategy': strat_name, **agg.table('total'),
+                            'sharpe': _json_float(row['sharpe']), 'sortino': _json_float(row['sortino']),
+                            'cagr': _json_float(row['cagr']), 'max_drawdown_pct': _json_float(row['max_drawdown_pct']),
+                            'profit_factor': _json_float(row['profit_factor']),
+                            'exposure': _json_float(row['exposure']), 'turnover': _json_float(row['turnover'])})
+        save_metrics(report, os.path.join(out_dir, "backtest_metrics.npz"))
+        tmp = os.path.join(out_dir, "backtest_summary.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(summary, f)
+        os.replace(tmp, os.path.join(out_dir, "backtest_summary.json"))
+
+
+def _json_float(value):
+    # NaN/inf are not valid JSON
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _next_index(mask):
+    """For each bar, the first index at or after it where mask is set (len(mask) if none)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _exit_rule_fills(df, codes, close, slip_mult, levels, chunk=64):
+    """Entries and exits for Backtester.simulate with exit rules, one NumPy pass per trade.
+
+    Each trade scans the bars after its entry up to its SELL signal in doubling
+    chunks: the running max of highs gives the trailing stop, and the first bar
+    whose low/high crosses a level is the exit. Work is proportional to bars held
+    rather than a Python step per bar. Returns entries, entry prices, exits, exit
+    prices and exit reasons (None for signal exits).
+    """
+    sl, tp, ts = levels
+    n = len(codes)
+    high = np.asarray(df['high'], dtype=np.float64)[:n]
+    low = np.asarray(df['low'], dtype=np.float64)[:n]
+    opens = np.asarray(df['open'], dtype=np.float64)[:n] if 'open' in df else np.full(n, np.nan)
+    # Per-bar entry price and levels for a position opened at that bar's close
+    entry_all = close * slip_mult
+    fixed_all = (entry_all * (1.0 - sl) if sl else np.full(n, -np.inf)).tolist()
+    target_all = (entry_all * (1.0 + tp) if tp else np.full(n, np.inf)).tolist()
+    peak_all = entry_all.tolist()
+    next_buy = _next_index(codes == BUY).tolist() + [n]
+    next_sell = _next_index(codes == SELL).tolist() + [n]
+    entries, exits, fills, reasons = [], [], [], []
+    k = next_buy[0]
+    while k < n:
+        entries.append(k)
+        fixed, target, peak = fixed_all[k], target_all[k], peak_all[k]
+        sell = next_sell[k + 1]
+        # Intrabar checks run through the SELL bar (they come before its close)
+        end = min(sell + 1, n)
+        start = k + 1
+        size = chunk
+        hit = None
+        while start < end:
+            stop_at = min(end, start + size)
+            h, lo = high[start:stop_at], low[start:stop_at]
+            if ts:
+                # Highest high before each bar, starting from the entry price
+                prior = np.empty(len(h))
+                prior[0] = peak
+                np.maximum(np.maximum.accumulate(h[:-1]), peak, out=prior[1:])
+                trail = prior * (1.0 - ts)
+                stop = np.maximum(trail, fixed)
+            else:
+                stop = fixed
+            crossed = (lo <= stop) | (h >= target)
+            if crossed.any():
+                j = int(crossed.argmax())
+                x = start + j
+                o = opens[x]
+                stop_j = stop[j] if ts else fixed
+                if high[x] >= target and o >= target:
+                    hit = (x, o, 'target')
+                elif low[x] <= stop_j:
+                    hit = (x, o if o <= stop_j else stop_j,
+                           'trailing_stop' if ts and trail[j] > fixed else 'stop_loss')
+                else:
+                    hit = (x, target, 'target')
+                break
+            if ts:
+                peak = max(peak, h.max())
+            start = stop_at
+            size *= 2
+        if hit is not None:
+            x, fill, reason = hit
+            exits.append(x)
+            fills.append(fill)
+            reasons.append(reason)
+            # The loop handles the close signal after an intrabar exit, so a BUY on the same bar re-enters
+            k = next_buy[x]
+        elif sell < n:
+            exits.append(sell)
+            fills.append(close[sell])
+            reasons.append(None)
+            k = next_buy[sell]
+        else:
+            break
+    entries = np.asarray(entries, dtype=np.int64)
+    exits = np.asarray(exits, dtype=np.int64)
+    return entries, entry_all[entries], exits, np.asarray(fills, dtype=np.float64) / slip_mult, reasons
+
+
+def walk_forward_folds(n_bars, train_bars, test_bars, step=None, anchored=False):
+    """(train_start, train_end, test_start, test_end) bar offsets, end-exclusive."""
+    step = step or test_bars
+    folds = []
+    train_end = train_bars
+    while train_end < n_bars:
+        test_end = min(train_end + test_bars, n_bars)
+        folds.append((0 if anchored else train_end - train_bars, train_end, train_end, test_end))
+        train_end += step
+    return folds
+
+
+def _init_worker(backtester):
+    global _worker_backtester
+    _worker_backtester = backtester
+
+
+def _run_worker_symbol(symbol, start_date, end_date):
+    return _worker_backtester._run_symbol(symbol, start_date, end_date)
+
+
+
+# Per-process walk-forward state (set by _init_wf_worker)
+_wf_state = None
+
+
+def _init_wf_worker(state):
+    global _wf_state
+    _wf_state = state
+
+
+def _view(df, data_key, lo, hi):
+    view = df.iloc[lo:hi]
+    if hasattr(view, 'attrs'):
+        view.attrs = {**df.attrs, 'data_key': data_key + (lo, hi)}
+    return view
+
+
+def _run_wf_fold(fold):
+    backtester, strategy_cls, variants, metric, data, sweep_opts = _wf_state
+    tr0, tr1, te0, te1 = fold
+    sweep = ParameterSweep(backtester, strategy_cls, variants=variants, metric=metric)
+    table = sweep.run_on({s: (_view(df, key, tr0, tr1), key + (tr0, tr1)) for s, (df, key) in data.items()},
+                         **sweep_opts)
+    params = sweep.best_params() or {}
+    train_score = float(table.iloc[0]['score']) if not table.empty else float('nan')
+    strat = strategy_cls(params)
+    warm = get_warmup(strat)
+    per_symbol = {}
+    for symbol, (df, key) in data.items():
+        lo = max(0, te0 - warm)
+        # Signals see the warmup bars before the test window; trading starts at te0
+        signals = get_signal_array(strat, _view(df, key, lo, te1))[te0 - lo:]
+        test = _view(df, key, te0, te1)
+        if backtester.vectorized:
+            per_symbol[symbol] = backtester.simulate_vectorized(test, signals)
+        else:
+            per_symbol[symbol] = backtester.simulate(test, signals)
+    return params, train_score, per_symbol
@@ -4,10 +4,10 @@ Extensible to support 5paisa, Upstox, etc.
 """
 import os
 from abc import ABC, abstractmethod
-from dotenv import load_dotenv
+from utils.env import load_env
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (no-op if main.py already did)
+load_env()
 
 class BrokerBase(ABC):
     """Abstract base class for all broker integrations."""
@@ -79,5 +79,8 @@ class AngelOneBroker(BrokerBase):
 def get_broker(name="angelone"):
     if name == "angelone":
         return AngelOneBroker()
+    if name == "paper":
+        from core.paper_broker import PaperBroker
+        return PaperBroker(initial_cash=float(os.getenv('INITIAL_CAPITAL', 100000)))
     # Placeholder for future brokers
     raise NotImplementedError(f"Broker '{name}' not implemented yet.")
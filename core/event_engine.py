@@ -0,0 +1,416 @@
+"""
+Event-driven live engine: bar events routed to per-symbol shards processed by a worker pool
+"""
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+import numpy as np
+import pandas as pd
+from strategies.base import BUY, SELL, SIGNAL_LABELS, get_signal_array, get_warmup
+from utils.logger import log_signal_json, log_trade_json, log_position_json
+
+STAGES = ('signal', 'risk', 'order', 'log')
+_STOP = object()
+
+
+class BarEvent:
+    __slots__ = ('symbol', 'bar', 'ts', 'i', 'fills', 'enqueued')
+
+    def __init__(self, symbol, bar, ts=None, i=None, fills=()):
+        self.symbol = symbol
+        self.bar = bar
+        self.ts = ts
+        self.i = i
+        self.fills = fills  # broker fills produced by this bar, booked before its signals
+        self.enqueued = None
+
+
+class SymbolShard:
+    """State owned by one symbol: its strategy instances, recent bars and open positions.
+
+    Only the worker the symbol is routed to touches a shard, so no locking is
+    needed and events for a symbol are handled in arrival order.
+    """
+    def __init__(self, symbol, strategies, min_history=2):
+        self.symbol = symbol
+        self.strategies = strategies
+        warmup = max([get_warmup(s) for s in strategies.values()], default=0)
+        self.history = deque(maxlen=max(warmup + 1, min_history))
+        self.positions = {}  # strategy name -> open position dict
+        self.working = {}  # strategy name -> order waiting for fills (book_fills only)
+        self.bars = 0
+        self.last_i = None
+
+    def window(self):
+        return pd.DataFrame.from_records(list(self.history))
+
+
+class EventEngine:
+    """Routes bar events to per-symbol shards on a pool of worker threads.
+
+    A symbol always maps to the same worker (crc32(symbol) % workers), so its
+    events are processed in order while different symbols run concurrently.
+    Each shard gets its own strategy instances from strategy_factory(symbol).
+    Risk checks, exposure updates and loss updates go through one RiskEngine
+    behind a lock, so portfolio limits hold across shards; when its circuit
+    breaker trips every shard stops opening positions.
+
+    order_fn(symbol, qty, side, order_type, price=...) places orders (e.g.
+    LiveEngine.place_order); nothing is booked unless it returns an
+    acknowledgement (not None or a REJECTED status). By default an acknowledged
+    order is booked at the signal bar's close. With book_fills=True (paper
+    trading) it stays working until its fills arrive on later BarEvents
+    (event.fills, e.g. from LiveEngine.on_bar), and positions, exposure and PnL
+    are booked at the fill prices, as main.py's single-symbol loop does.
+    position_store, when given, is kept current.
+    stats() reports events/sec and busy time per stage (signal, risk, order,
+    log) and queue latency. Workers are threads: they keep per-symbol ordering
+    and isolation, while pure-Python strategy work still shares the GIL.
+    """
+    def __init__(self, strategy_factory, risk_engine, order_fn=None, capital=100000.0, qty=1, workers=4,
+                 max_queue=100000, position_store=None, log_signals=True, alert_fn=None, min_history=2,
+                 out_dir="logs", book_fills=False):
+        self.strategy_factory = strategy_factory
+        self.risk_engine = risk_engine
+        self.order_fn = order_fn
+        self.capital = float(capital)
+        self.qty = qty
+        self.n_workers = max(1, int(workers))
+        self.max_queue = max_queue
+        self.position_store = position_store
+        self.log_signals = log_signals
+        self.alert_fn = alert_fn
+        self.min_history = min_history
+        self.out_dir = out_dir
+        self.book_fills = book_fills
+        self.halted = False
+        self._risk_lock = threading.Lock()
+        self._queues = []
+        self._threads = []
+        self._shards = [{} for _ in range(self.n_workers)]
+        self._stats = [self._empty_stats() for _ in range(self.n_workers)]
+        self._submitted = 0
+        self._started_at = None
+        self._stopped_at = None
+
+    @staticmethod
+    def _empty_stats():
+        return {'events': 0, 'latency_sum': 0.0, 'latency_max': 0.0, 'errors': 0,
+                **{f'{s}_count': 0 for s in STAGES}, **{f'{s}_seconds': 0.0 for s in STAGES}}
+
+    def worker_for(self, symbol):
+        return zlib.crc32(str(symbol).encode()) % self.n_workers
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._threads:
+            return self
+        self._started_at = time.perf_counter()
+        self._stopped_at = None
+        for w in range(self.n_workers):
+            q = queue.Queue(maxsize=self.max_queue)
+            t = threading.Thread(target=self._run, args=(w, q), name=f"event-shard-{w}", daemon=True)
+            self._queues.append(q)
+            self._threads.append(t)
+            t.start()
+        return self
+
+    def submit(self, event):
+        """Route a BarEvent to its symbol's worker (blocks if that queue is full)."""
+        if not self._threads:
+            self.start()
+        event.enqueued = time.perf_counter()
+        self._submitted += 1
+        self._queues[self.worker_for(event.symbol)].put(event)
+
+    def on_bar(self, symbol, bar, ts=None, i=None, fills=()):
+        self.submit(BarEvent(symbol, bar, ts, i, fills))
+
+    def drain(self):
+        """Block until every event submitted so far has been handled (workers keep running)."""
+        for q in self._queues:
+            q.join()
+
+    def stop(self, timeout=None):
+        """Process everything queued, then stop the workers."""
+        for q in self._queues:
+            q.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+        self._stopped_at = time.perf_counter()
+        self._queues = []
+        self._threads = []
+
+    def close_all(self, cancel_fn=None):
+        """After stop(): cancel working orders and close open positions at each symbol's last close.
+
+        Working orders are cancelled through cancel_fn(order_id) and their
+        unfilled exposure released. Without book_fills the exit is also sent
+        through order_fn; with it, as in the single-symbol paper loop, the
+        position is booked closed at the last close. Returns the closed positions.
+        """
+        closed = []
+        for w, shards in enumerate(self._shards):
+            stats = self._stats[w]
+            for shard in shards.values():
+                for name in list(shard.working):
+                    order = shard.working.pop(name)
+                    if cancel_fn is not None:
+                        cancel_fn(order['order_id'])
+                    if order['side'] == 'BUY' and order['remaining']:
+                        with self._risk_lock:
+                            self.risk_engine.record_fill(shard.symbol, name, -order['remaining'] * order['price'])
+                if not shard.positions:
+                    continue
+                price = float(shard.history[-1]['close'])
+                for name, position in list(shard.positions.items()):
+                    if not self.book_fills:
+                        self._order(shard.symbol, 'SELL', position['qty'], price, stats)
+                    closed.append(dict(position))
+                    self._book_exit(shard, name, position['qty'], price, shard.last_i, stats)
+        return closed
+
+    # --- Worker ---
+    def _run(self, w, q):
+        shards = self._shards[w]
+        stats = self._stats[w]
+        while True:
+            event = q.get()
+            if event is _STOP:
+                q.task_done()
+                return
+            shard = shards.get(event.symbol)
+            if shard is None:
+                shard = shards[event.symbol] = SymbolShard(event.symbol, self.strategy_factory(event.symbol),
+                                                           self.min_history)
+            try:
+                self._handle(shard, event, stats)
+            except Exception as e:
+                stats['errors'] += 1
+                print(f"[EVENT] {event.symbol}: failed to handle bar {event.i}: {e}")
+            latency = time.perf_counter() - event.enqueued
+            stats['events'] += 1
+            stats['latency_sum'] += latency
+            if latency > stats['latency_max']:
+                stats['latency_max'] = latency
+            q.task_done()
+
+    def _handle(self, shard, event, stats):
+        clock = time.perf_counter
+        shard.history.append(event.bar)
+        i = event.i if event.i is not None else shard.bars
+        shard.bars += 1
+        shard.last_i = i
+        price = float(event.bar['close'])
+
+        # Orders placed on earlier bars fill against this one before it is traded on
+        for fill in event.fills:
+            self._book_fill(shard, fill, i, stats)
+
+        t0 = clock()
+        window = shard.window()
+        signals = {name: int(get_signal_array(strat, window)[-1]) for name, strat in shard.strategies.items()}
+        t1 = clock()
+        stats['signal_seconds'] += t1 - t0
+        stats['signal_count'] += 1
+
+        if self.log_signals:
+            for name, sig in signals.items():
+                log_signal_json({'i': i, 'symbol': shard.symbol, 'strategy': name, 'signal': SIGNAL_LABELS[sig],
+                                 'price': price}, out_dir=self.out_dir)
+            t2 = clock()
+            stats['log_seconds'] += t2 - t1
+            stats['log_count'] += len(signals)
+
+        for name, sig in signals.items():
+            if name in shard.working:
+                continue
+            position = shard.positions.get(name)
+            if sig == BUY and position is None and not self.halted:
+                t0 = clock()
+                with self._risk_lock:
+                    ok, msg = self.risk_engine.check_trade(self.capital, self.qty * price, 0, shard.symbol, name)
+                    if ok:
+                        # Reserve the exposure now so other shards see it before the order goes out
+                        self.risk_engine.record_fill(shard.symbol, name, self.qty * price)
+                stats['risk_seconds'] += clock() - t0
+                stats['risk_count'] += 1
+                if not ok:
+                    continue
+                ack = self._order(shard.symbol, 'BUY', self.qty, price, stats)
+                if ack is None:
+                    # Not acknowledged (e.g. broker circuit breaker): release the reservation
+                    with self._risk_lock:
+                        self.risk_engine.record_fill(shard.symbol, name, -self.qty * price)
+                elif self.book_fills:
+                    # The reservation is swapped for the fill notional as fills arrive
+                    shard.working[name] = {'order_id': ack['order_id'], 'side': 'BUY', 'price': price,
+                                           'remaining': self.qty}
+                else:
+                    self._book_entry(shard, name, self.qty, price, i, stats)
+            elif sig == SELL and position is not None:
+                ack = self._order(shard.symbol, 'SELL', position['qty'], price, stats)
+                if ack is None:
+                    # Exit not acknowledged: the position and its exposure are still held
+                    continue
+                if self.book_fills:
+                    shard.working[name] = {'order_id': ack['order_id'], 'side': 'SELL', 'price': price,
+                                           'remaining': position['qty']}
+                else:
+                    self._book_exit(shard, name, position['qty'], price, i, stats)
+
+    def _book_fill(self, shard, fill, i, stats):
+        """Apply a broker fill for one of the shard's working orders."""
+        name = next((n for n, o in shard.working.items() if o['order_id'] == fill['order_id']), None)
+        if name is None:
+            return
+        order = shard.working[name]
+        qty, px = fill['qty'], float(fill['price'])
+        order['remaining'] -= qty
+        if fill.get('status') == 'FILLED' or order['remaining'] <= 0:
+            del shard.working[name]
+        if order['side'] == 'BUY':
+            t0 = time.perf_counter()
+            with self._risk_lock:
+                self.risk_engine.record_fill(shard.symbol, name, qty * (px - order['price']))
+            stats['risk_seconds'] += time.perf_counter() - t0
+            self._book_entry(shard, name, qty, px, i, stats)
+        elif name in shard.positions:
+            self._book_exit(shard, name, qty, px, i, stats)
+
+    def _book_entry(self, shard, name, qty, price, i, stats):
+        """Open the strategy's position, or add to it at a volume-weighted entry (exposure already recorded)."""
+        t0 = time.perf_counter()
+        position = shard.positions.get(name)
+        if position is None:
+            position = {'symbol': shard.symbol, 'qty': qty, 'side': 'LONG', 'entry': price, 'strategy': name, 'i': i}
+            log_position_json(position, out_dir=self.out_dir)
+            if self.position_store is not None:
+                position['id'] = self.position_store.open(position)
+            shard.positions[name] = position
+        else:
+            total = position['qty'] + qty
+            position['entry'] = (position['entry'] * position['qty'] + price * qty) / total
+            position['qty'] = total
+            if self.position_store is not None:
+                self.position_store.update(position['id'], qty=total, entry=position['entry'])
+        stats['log_seconds'] += time.perf_counter() - t0
+        stats['log_count'] += 1
+
+    def _book_exit(self, shard, name, qty, price, i, stats):
+        """Close qty of the strategy's position at price: exposure, trade log, position state and daily loss."""
+        clock = time.perf_counter
+        position = shard.positions[name]
+        pnl = (price - position['entry']) * qty
+        t0 = clock()
+        with self._risk_lock:
+            self.risk_engine.record_fill(shard.symbol, name, -qty * position['entry'])
+        t1 = clock()
+        stats['risk_seconds'] += t1 - t0
+        log_trade_json({'symbol': shard.symbol, 'qty': qty, 'entry': position['entry'], 'exit': price, 'pnl': pnl,
+                        'strategy': name, 'i': i, 'paper': True}, out_dir=self.out_dir)
+        position['qty'] -= qty
+        if position['qty'] > 0:
+            if self.position_store is not None:
+                self.position_store.update(position['id'], qty=position['qty'])
+        else:
+            if self.position_store is not None:
+                self.position_store.close(position['id'])
+            del shard.positions[name]
+        t2 = clock()
+        stats['log_seconds'] += t2 - t1
+        stats['log_count'] += 1
+        if pnl < 0:
+            self._record_loss(shard.symbol, pnl)
+            stats['risk_seconds'] += clock() - t2
+            stats['risk_count'] += 1
+
+    def _order(self, symbol, side, qty, price, stats):
+        """Place an order; returns the acknowledgement, or None when it was not acknowledged."""
+        t0 = time.perf_counter()
+        ack = {'order_id': None, 'status': 'SIMULATED'}
+        if self.order_fn is not None:
+            ack = self.order_fn(symbol, qty, side, 'MARKET', price=price)
+        stats['order_seconds'] += time.perf_counter() - t0
+        stats['order_count'] += 1
+        if ack is None or (isinstance(ack, dict) and ack.get('status') == 'REJECTED'):
+            return None
+        return ack
+
+    def _record_loss(self, symbol, pnl):
+        with self._risk_lock:
+            ok, msg = self.risk_engine.update_daily_loss(abs(pnl), self.capital)
+            tripped = not ok and not self.halted
+            if not ok:
+                self.halted = True
+        if tripped:
+            print(f"[RISK] {msg}")
+            if self.alert_fn is not None:
+                self.alert_fn(f"ProjectTrade [{symbol}] {msg}")
+
+    # --- Reporting ---
+    def open_positions(self):
+        return [p for shards in self._shards for shard in shards.values() for p in shard.positions.values()]
+
+    def stats(self):
+        """Totals across workers: events/sec overall and per stage, busy seconds, queue latency."""
+        total = self._empty_stats()
+        for s in self._stats:
+            for k, v in s.items():
+                total[k] = max(total[k], v) if k == 'latency_max' else total[k] + v
+        end = self._stopped_at or time.perf_counter()
+        wall = end - self._started_at if self._started_at else 0.0
+        out = {'submitted': self._submitted, 'events': total['events'], 'errors': total['errors'],
+               'workers': self.n_workers, 'symbols': sum(len(s) for s in self._shards), 'wall_seconds': wall,
+               'events_per_sec': total['events'] / wall if wall else 0.0,
+               'latency_mean': total['latency_sum'] / total['events'] if total['events'] else 0.0,
+               'latency_max': total['latency_max'], 'queued': sum(q.qsize() for q in self._queues),
+               'halted': self.halted, 'stages': {}}
+        for stage in STAGES:
+            count, busy = total[f'{stage}_count'], total[f'{stage}_seconds']
+            out['stages'][stage] = {'count': count, 'busy_seconds': busy,
+                                    'per_sec': count / busy if busy else 0.0}
+        return out
+
+
+def synthetic_bars(symbols, seconds, seed=0, start=100.0, vol=0.001, start_ts=0.0):
+    """Yield (ts, [(symbol, bar), ...]) for each 1-second step of a random walk across all symbols."""
+    rng = np.random.default_rng(seed)
+    close = np.full(len(symbols), float(start))
+    for k in range(seconds):
+        prev = close
+        close = prev * np.exp(rng.standard_normal(len(symbols)) * vol)
+        high = np.maximum(prev, close)
+        low = np.minimum(prev, close)
+        volume = rng.integers(1, 1000, size=len(symbols))
+        ts = start_ts + k
+        yield ts, [(s, {'open': o, 'high': h, 'low': lo, 'close': c, 'volume': v})
+                   for s, o, h, lo, c, v in zip(symbols, prev.tolist(), high.tolist(), low.tolist(), close.tolist(),
+                                                volume.tolist())]
+
+
+def replay(engine, stream, realtime=True):
+    """Feed (ts, [(symbol, bar), ...]) steps into engine, paced at one step per second if realtime.
+
+    Returns the engine stats plus 'steps' and 'behind_seconds': how long after
+    the last step was released its events were done. Under one second means the
+    engine kept up with 1-second bars.
+    """
+    engine.start()
+    t_start = time.perf_counter()
+    steps = 0
+    for k, (ts, bars) in enumerate(stream):
+        if realtime:
+            delay = t_start + k - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        for symbol, bar in bars:
+            engine.submit(BarEvent(symbol, bar, ts, k))
+        steps += 1
+    engine.stop()
+    out = engine.stats()
+    out['steps'] = steps
+    out['behind_seconds'] = max(0.0, time.perf_counter() - t_start - (steps - 1)) if realtime and steps else None
+    return out
@@ -2,30 +2,39 @@
 Live Trading Engine: Angel One SmartAPI, paper/live mode, risk management
 """
 import os
+import threading
+from concurrent.futures import Future
 from core.broker import get_broker
+from core.async_broker import AsyncBrokerBase, OrderPipeline, SyncBrokerAdapter
+from core.risk import RiskEngine
 
 class LiveEngine:
-    def __init__(self, broker_name="angelone", paper_mode=True, risk_config=None):
+    def __init__(self, broker_name="angelone", paper_mode=True, risk_config=None, order_concurrency=8,
+                 order_rate_limit=None, order_timeout=10.0, order_retries=2, risk_engine=None, fill_model=None):
         # Defer broker creation to authenticate() to allow paper mode without SmartAPI deps
         self.broker_name = broker_name
         self.broker = None
         self.paper_mode = paper_mode
-        self.risk_config = risk_config or {
-            'max_capital_per_trade': 0.1,  # 10% of capital
-            'max_daily_loss': 0.05,        # 5% of capital
-            'stop_loss_pct': 0.02,         # 2% stop loss
-            'target_pct': 0.04,            # 4% target
-            'trailing_stop_pct': 0.01      # 1% trailing stop
-        }
-        self.daily_loss = 0
+        # Paper orders go to a PaperBroker (core.paper_broker.FillModel settings) and fill on on_bar()
+        self.fill_model = fill_model
+        self._paper_lock = threading.Lock()
+        # Daily loss and circuit breaker live in the RiskEngine (shared with the caller when one is passed)
+        self.risk_engine = risk_engine or RiskEngine(risk_config)
+        self.risk_config = self.risk_engine.config
         self.capital = float(os.getenv('INITIAL_CAPITAL', 100000))
         self.positions = []
         self.trades = []
-        self.circuit_breaker = False
+        # Async order path settings; the pipeline is created on first place_order_async()
+        self.order_concurrency = order_concurrency
+        self.order_rate_limit = order_rate_limit
+        self.order_timeout = order_timeout
+        self.order_retries = order_retries
+        self.order_pipeline = None
 
     def authenticate(self):
         if self.paper_mode:
-            print("[AUTH] Paper mode enabled: skipping broker authentication.")
+            print("[AUTH] Paper mode enabled: orders fill against a local PaperBroker.")
+            self._paper_broker()
             return True
         # Create broker lazily in live mode
         if self.broker is None:
@@ -41,23 +50,89 @@ class LiveEngine:
             print("Trading halted: circuit breaker triggered.")
             return None
         if self.paper_mode:
-            # Simulate order
-            trade = {'symbol': symbol, 'qty': qty, 'side': side, 'order_type': order_type, 'price': price, 'paper': True}
-            self.trades.append(trade)
-            return trade
+            # Acknowledged now, filled by later on_bar() calls
+            with self._paper_lock:
+                ack = self._paper_broker().place_order(symbol, qty, side, order_type, price, sl, target, **kwargs)
+                self.trades.append(ack)
+            return ack
         else:
             # Live order
             response = self.broker.place_order(symbol, qty, side, order_type, price, sl, target, **kwargs)
             self.trades.append(response)
             return response
 
+    def place_order_async(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        """Non-blocking place_order: returns a Future resolving to the broker ack.
+
+        Live orders go through an OrderPipeline running on a background event loop,
+        so a slow round trip for one symbol does not hold up the others.
+        """
+        if self.circuit_breaker:
+            print("Trading halted: circuit breaker triggered.")
+            return None
+        if self.paper_mode:
+            future = Future()
+            future.set_result(self.place_order(symbol, qty, side, order_type, price, sl, target, **kwargs))
+            return future
+        if self.order_pipeline is None:
+            broker = self.broker if isinstance(self.broker, AsyncBrokerBase) else SyncBrokerAdapter(self.broker, max_workers=self.order_concurrency)
+            self.order_pipeline = OrderPipeline(broker, max_in_flight=self.order_concurrency, rate_limit=self.order_rate_limit,
+                                                timeout=self.order_timeout, retries=self.order_retries).start()
+        future = self.order_pipeline.submit_threadsafe(symbol, qty, side, order_type, price, sl, target, **kwargs)
+        future.add_done_callback(self._record_ack)
+        return future
+
+    def _record_ack(self, future):
+        # exception() raises CancelledError on a cancelled future
+        if not future.cancelled() and future.exception() is None:
+            self.trades.append(future.result())
+
+    def shutdown(self, timeout=None):
+        """Wait for in-flight async orders, stop the order pipeline and close its broker adapter."""
+        if self.order_pipeline is not None:
+            self.order_pipeline.stop(timeout)
+            if isinstance(self.order_pipeline.broker, SyncBrokerAdapter):
+                self.order_pipeline.broker.close()
+            self.order_pipeline = None
+
+    def cancel_order(self, order_id):
+        if self.paper_mode:
+            with self._paper_lock:
+                return self._paper_broker().cancel_order(order_id)
+        return self.broker.cancel_order(order_id)
+
+    def on_bar(self, symbol, bar, ts=None):
+        """Forward market data to brokers that simulate fills (e.g. PaperBroker); returns the fills."""
+        if self.broker is not None and hasattr(self.broker, 'on_bar'):
+            with self._paper_lock:
+                return self.broker.on_bar(symbol, bar, ts)
+        return []
+
+    def _paper_broker(self):
+        if self.broker is None:
+            from core.paper_broker import PaperBroker
+            self.broker = PaperBroker(self.fill_model, initial_cash=self.capital)
+        return self.broker
+
+    @property
+    def daily_loss(self):
+        return self.risk_engine.daily_loss
+
+    @property
+    def circuit_breaker(self):
+        return self.risk_engine.circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value):
+        self.risk_engine.circuit_breaker = value
+
     def check_risk(self, trade_pnl):
-        self.daily_loss += trade_pnl if trade_pnl < 0 else 0
-        if abs(self.daily_loss) > self.risk_config['max_daily_loss'] * self.capital:
-            self.circuit_breaker = True
-            print("Max daily loss hit: circuit breaker activated.")
+        if trade_pnl >= 0:
+            return
+        ok, msg = self.risk_engine.update_daily_loss(-trade_pnl, self.capital)
+        if not ok:
+            print(msg)
 
     def reset_daily(self):
-        self.daily_loss = 0
-        self.circuit_breaker = False
+        self.risk_engine.reset_daily()
         self.trades = []
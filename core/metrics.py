@@ -0,0 +1,136 @@
+"""
+Backtest performance metrics computed in batch: CAGR, Sharpe/Sortino, drawdown, win rate, profit factor, exposure, turnover
+"""
+import numpy as np
+import pandas as pd
+
+METRICS = ['total_return', 'cagr', 'sharpe', 'sortino', 'volatility', 'max_drawdown_pct', 'max_drawdown_duration',
+           'trades', 'win_rate', 'profit_factor', 'exposure', 'turnover']
+
+
+def equity_matrix(curves):
+    """Stack equity curves into an R x T float64 array, NaN-padded on the right."""
+    curves = [np.asarray(c, dtype=np.float64).ravel() for c in curves]
+    width = max((len(c) for c in curves), default=0)
+    out = np.full((len(curves), width), np.nan)
+    for r, c in enumerate(curves):
+        out[r, :len(c)] = c
+    return out
+
+
+def trade_arrays(trade_lists):
+    """Flatten per-result trade dicts into columns keyed by result id.
+
+    Returns a dict of arrays: rid, side (+1 BUY / -1 SELL), index, notional
+    (price x qty, qty defaults to 1) and pnl (NaN on entries).
+    """
+    rows = [(r, 1 if t.get('action') == 'BUY' else -1, t.get('index', 0), t.get('price', 0.0) * t.get('qty', 1),
+             t.get('pnl', np.nan))
+            for r, trades in enumerate(trade_lists) for t in trades]
+    if not rows:
+        return {'rid': np.empty(0, np.int64), 'side': np.empty(0, np.int8), 'index': np.empty(0, np.int64),
+                'notional': np.empty(0), 'pnl': np.empty(0)}
+    rid, side, index, notional, pnl = (np.array(col) for col in zip(*rows))
+    return {'rid': rid.astype(np.int64), 'side': side.astype(np.int8), 'index': index.astype(np.int64),
+            'notional': np.abs(notional.astype(np.float64)), 'pnl': pnl.astype(np.float64)}
+
+
+def batch_metrics(curves, trade_lists=None, periods_per_year=252, risk_free=0.0):
+    """Metrics for many results at once; returns {metric: array of length R}.
+
+    curves are equity (capital) curves, one per result; trade_lists the matching
+    trade dicts as produced by Backtester.simulate. Returns are per bar, so
+    periods_per_year must match the bar size (252 for daily bars). Exposure is
+    the average number of open positions per bar (the fraction of time in the
+    market for single-position results); turnover is traded notional over mean
+    equity.
+    """
+    eq = equity_matrix(curves)
+    R, T = eq.shape
+    valid = ~np.isnan(eq)
+    n = valid.sum(axis=1)
+    rows = np.arange(R)
+    first = eq[:, 0] if T else np.full(R, np.nan)
+    last = eq[rows, np.maximum(n - 1, 0)] if T else np.full(R, np.nan)
+    out = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['total_return'] = last / first - 1.0
+        years = (n - 1) / float(periods_per_year)
+        out['cagr'] = np.where(years > 0, np.power(last / first, 1.0 / years) - 1.0, np.nan)
+
+        rets = eq[:, 1:] / eq[:, :-1] - 1.0 - risk_free / periods_per_year
+        n_rets = (~np.isnan(rets)).sum(axis=1)
+        mean = np.nansum(rets, axis=1) / n_rets
+        std = np.where(n_rets > 1, np.sqrt(np.nansum((rets - mean[:, None]) ** 2, axis=1) / (n_rets - 1)), np.nan)
+        downside = np.sqrt(np.nansum(np.minimum(rets, 0.0) ** 2, axis=1) / n_rets)
+        ann = np.sqrt(periods_per_year)
+        out['sharpe'] = np.where(std > 0, mean / std * ann, np.nan)
+        out['sortino'] = np.where(downside > 0, mean / downside * ann, np.nan)
+        out['volatility'] = std * ann
+
+        # Drawdown from the running peak; duration is bars since that peak was set
+        peak = np.fmax.accumulate(eq, axis=1) if T else eq
+        dd = np.where(valid, 1.0 - eq / peak, np.nan)
+        out['max_drawdown_pct'] = np.where(n > 0, np.where(valid, dd, 0.0).max(axis=1) if T else 0.0, np.nan)
+        bars = np.arange(T)
+        at_peak = np.where(valid & (eq >= peak), bars, 0)
+        since_peak = np.where(valid, bars - np.maximum.accumulate(at_peak, axis=1), 0) if T else np.zeros((R, 0))
+        out['max_drawdown_duration'] = since_peak.max(axis=1) if T else np.zeros(R)
+
+        tr = trade_arrays(trade_lists if trade_lists is not None else [[] for _ in range(R)])
+        rid, side, idx, pnl = tr['rid'], tr['side'], tr['index'], tr['pnl']
+        closed = ~np.isnan(pnl)
+        n_closed = np.bincount(rid[closed], minlength=R)
+        wins = np.bincount(rid[closed], weights=pnl[closed] > 0, minlength=R)
+        gross_win = np.bincount(rid[closed], weights=np.maximum(pnl[closed], 0.0), minlength=R)
+        gross_loss = -np.bincount(rid[closed], weights=np.minimum(pnl[closed], 0.0), minlength=R)
+        out['trades'] = n_closed
+        out['win_rate'] = np.where(n_closed > 0, wins / n_closed, np.nan)
+        out['profit_factor'] = np.where(gross_loss > 0, gross_win / gross_loss,
+                                        np.where(gross_win > 0, np.inf, np.nan))
+        # Bars held: sum(exit index) - sum(entry index), open positions held to the end
+        n_buys = np.bincount(rid[side > 0], minlength=R)
+        n_sells = np.bincount(rid[side < 0], minlength=R)
+        held = (np.bincount(rid, weights=np.where(side < 0, idx, -idx), minlength=R)
+                + (n_buys - n_sells) * n)
+        out['exposure'] = np.where(n > 0, held / n, np.nan)
+        mean_eq = np.nanmean(np.where(valid, eq, np.nan), axis=1) if T else np.full(R, np.nan)
+        out['turnover'] = np.bincount(rid, weights=tr['notional'], minlength=R) / mean_eq
+    return out
+
+
+def compute_metrics(equity, trades=None, periods_per_year=252, risk_free=0.0):
+    """Metrics for a single result as a plain dict."""
+    batch = batch_metrics([equity], [trades or []], periods_per_year, risk_free)
+    return {k: float(v[0]) for k, v in batch.items()}
+
+
+def metrics_table(results, periods_per_year=252, risk_free=0.0):
+    """DataFrame of metrics for Backtester.results ({(symbol, strategy): {'pnl', 'trades'}})."""
+    keys = list(results)
+    batch = batch_metrics([results[k]['pnl'] for k in keys], [results[k]['trades'] for k in keys],
+                          periods_per_year, risk_free)
+    index = pd.MultiIndex.from_tuples(keys, names=['symbol', 'strategy']) if keys else None
+    return pd.DataFrame({m: batch[m] for m in METRICS}, index=index)
+
+
+def save_metrics(table, path):
+    """Write a metrics table as Parquet (.parquet, needs pyarrow) or compressed NPZ (anything else)."""
+    if path.endswith(".parquet"):
+        table.reset_index().to_parquet(path, index=False)
+        return path
+    flat = table.reset_index()
+    # Plain string arrays so the file loads without pickle
+    np.savez_compressed(path, **{c: flat[c].to_numpy(dtype=None if flat[c].dtype.kind in 'biufc' else str)
+                                 for c in flat.columns})
+    return path
+
+
+def load_metrics(path):
+    if path.endswith(".parquet"):
+        flat = pd.read_parquet(path)
+    else:
+        with np.load(path) as npz:
+            flat = pd.DataFrame({k: npz[k] for k in npz.files})
+    keys = [c for c in ('symbol', 'strategy') if c in flat.columns]
+    return flat.set_index(keys) if keys else flat
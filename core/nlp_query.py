@@ -2,14 +2,48 @@
 Natural Language Command Module (GPT-4/local LLM placeholder)
 """
 # This is a placeholder for future GPT-4 or local LLM integration
+import datetime
 
-def query_trades_nlp(query, trade_logs):
-    """Stub: Parse natural language query and return mock response."""
+def query_trades_nlp(query, trade_logs=None, summary=None, store=None):
+    """Stub: Parse natural language query and return mock response.
+
+    summary is the pre-aggregated table set from utils.pnl_aggregates (e.g.
+    load_summary()); when given, aggregate questions are answered from it
+    without scanning trade_logs. store (a utils.event_store.EventStore) takes
+    precedence and answers with indexed SQL queries.
+    """
     # In production, connect to OpenAI API or local LLM
-    if "trades today" in query.lower():
-        return [t for t in trade_logs if t.get('date') == 'today']
-    if "win rate" in query.lower():
+    q = query.lower()
+    today = datetime.date.today().isoformat()
+    if store is not None:
+        if "trades today" in q:
+            return store.trades(start=today, end=today) or "No trades today."
+        if "win rate" in q:
+            rate = store.win_rate()
+            return f"Win rate: {rate*100:.2f}%" if rate is not None else "No trades."
+        if "pnl" in q:
+            if "today" in q:
+                if not store.trade_count(start=today, end=today):
+                    return "No trades today."
+                return f"PnL today: {store.pnl(start=today, end=today):.2f}"
+            return f"Total PnL: {store.pnl():.2f}"
+        return "Query not understood (demo mode)."
+    if "trades today" in q:
+        if trade_logs is not None:
+            return [t for t in trade_logs if t.get('date') == today]
+        if summary is not None:
+            return summary.get('day', {}).get(today, "No trades today.")
+    if "win rate" in q:
+        if summary is not None:
+            total = summary.get('total', {})
+            return f"Win rate: {total['win_rate']*100:.2f}%" if total.get('trades') else "No trades."
+        trade_logs = trade_logs or []
         wins = sum(1 for t in trade_logs if t.get('pnl', 0) > 0)
         total = len(trade_logs)
         return f"Win rate: {wins/total*100:.2f}%" if total else "No trades."
+    if "pnl" in q and summary is not None:
+        if "today" in q:
+            day = summary.get('day', {}).get(today)
+            return f"PnL today: {day['pnl']:.2f}" if day else "No trades today."
+        return f"Total PnL: {summary.get('total', {}).get('pnl', 0.0):.2f}"
     return "Query not understood (demo mode)."
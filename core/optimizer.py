@@ -0,0 +1,195 @@
+"""
+Parameter sweep / grid search over strategy configs with successive-halving pruning
+"""
+import copy
+import itertools
+import math
+import random
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from strategies.base import get_signal_array
+
+# Per-process sweep state used by pool workers (set by _init_sweep_worker)
+_worker_state = None
+
+
+def expand_grid(param_grid):
+    """All combinations of a {name: values} grid, in row-major order."""
+    names = list(param_grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(list(param_grid[n]) for n in names))]
+
+
+def sample_space(param_space, n_samples, seed=None):
+    """n_samples random configs from a space of {name: spec}.
+
+    A spec is a list of choices, an (low, high) tuple (ints sample inclusive
+    integers, floats sample uniformly) or a callable(rng) returning a value.
+    Duplicate configs are dropped.
+    """
+    rng = random.Random(seed)
+    out, seen = [], set()
+    for _ in range(n_samples * 10):
+        if len(out) >= n_samples:
+            break
+        params = {}
+        for name, spec in param_space.items():
+            if callable(spec):
+                params[name] = spec(rng)
+            elif isinstance(spec, tuple) and len(spec) == 2:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(spec))
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            out.append(params)
+    return out
+
+
+class ParameterSweep:
+    """Runs one strategy class over many configs on data loaded once.
+
+    Every variant is scored on the same preloaded symbols with the backtester's
+    costs (fee_per_trade, slippage_bps) and simulation path. With successive
+    halving each rung evaluates the surviving variants on a longer prefix of
+    the history (1/eta^k of it, up to all of it) and keeps the best 1/eta, so
+    clearly losing variants are dropped after a cheap partial run.
+
+    variants may be given directly as a list of config dicts instead of a grid
+    or space. metric is a summary field ('pnl', 'win_rate', 'pnl_per_trade', 'trades') or
+    a callable(summary) -> float; higher is better.
+    """
+    def __init__(self, backtester, strategy_cls, param_grid=None, param_space=None, n_samples=20, seed=None,
+                 base_config=None, metric='pnl', variants=None):
+        if param_grid is None and param_space is None and variants is None:
+            raise ValueError("Give param_grid, param_space or variants")
+        self.backtester = backtester
+        self.strategy_cls = strategy_cls
+        self.base_config = dict(base_config or {})
+        self.metric = metric
+        if variants is not None:
+            self.variants = [dict(v) for v in variants]
+        elif param_grid is not None:
+            self.variants = expand_grid(param_grid)
+        else:
+            self.variants = sample_space(param_space, n_samples, seed)
+        self.results = None
+
+    def run(self, symbols, start_date, end_date, workers=None, halving=True, eta=3, min_bars=100, progress=False):
+        """Score all variants and return the ranked table (see table())."""
+        data = {}
+        for symbol in symbols:
+            df = self.backtester.data_loader(symbol, start_date, end_date)
+            data[symbol] = (df, (symbol, str(start_date), str(end_date)))
+        return self.run_on(data, workers=workers, halving=halving, eta=eta, min_bars=min_bars, progress=progress)
+
+    def run_on(self, data, workers=None, halving=True, eta=3, min_bars=100, progress=False):
+        """Like run() on already loaded data: {symbol: (df, data_key)}."""
+        n_bars = min((len(df) for df, _ in data.values()), default=0)
+        # Rung lengths: full history last, each earlier rung 1/eta as long
+        rungs = [n_bars]
+        if halving and eta > 1:
+            while len(rungs) < max(1, math.ceil(math.log(max(len(self.variants), 1), eta))) \
+                    and rungs[0] // eta >= min_bars:
+                rungs.insert(0, rungs[0] // eta)
+        template = copy.copy(self.backtester)
+        template.results = {}
+        state = (template, self.strategy_cls, self.base_config, data)
+
+        records = [{'variant': i, **params} for i, params in enumerate(self.variants)]
+        alive = list(range(len(self.variants)))
+        pool = None
+        if workers and workers > 1:
+            # Ship the preloaded data to each worker once for the whole sweep
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(state,))
+        else:
+            _init_sweep_worker(state)
+        try:
+            for r, bars in enumerate(rungs):
+                args = [(self.variants[i], bars) for i in alive]
+                if pool is not None:
+                    chunksize = max(1, len(args) // (workers * 4))
+                    summaries = list(pool.map(_evaluate_worker, args, chunksize=chunksize))
+                else:
+                    summaries = [_evaluate_worker(a) for a in args]
+                for i, summary in zip(alive, summaries):
+                    records[i].update(summary, rung=r, bars=bars, score=self._score(summary))
+                if progress:
+                    print(f"[SWEEP] rung {r + 1}/{len(rungs)}: {len(alive)} variants on {bars} bars")
+                if r < len(rungs) - 1:
+                    keep = max(1, math.ceil(len(alive) / eta))
+                    # Stable sort keeps the original order among ties
+                    alive = sorted(alive, key=lambda i: -records[i]['score'])[:keep]
+                    alive.sort()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.results = records
+        return self.table()
+
+    def _score(self, summary):
+        value = self.metric(summary) if callable(self.metric) else summary.get(self.metric)
+        return float('-inf') if value is None or np.isnan(value) else float(value)
+
+    def table(self):
+        """Variants ranked by rung reached (full-history runs first), then score."""
+        if self.results is None:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.results)
+        df = df.sort_values(['rung', 'score', 'variant'], ascending=[False, False, True], kind='mergesort')
+        df.insert(0, 'rank', np.arange(1, len(df) + 1))
+        return df.reset_index(drop=True)
+
+    def best_params(self):
+        table = self.table()
+        if table.empty:
+            return None
+        return dict(self.variants[int(table.iloc[0]['variant'])])
+
+
+def _init_sweep_worker(state):
+    global _worker_state
+    backtester, strategy_cls, base_config, data = state
+    # Prefix views per (symbol, bars), built once per process
+    _worker_state = (backtester, strategy_cls, base_config, data, {})
+
+
+def _prefix(symbol, bars):
+    _, _, _, data, prefixes = _worker_state
+    key = (symbol, bars)
+    view = prefixes.get(key)
+    if view is None:
+        df, data_key = data[symbol]
+        view = df.iloc[:bars] if bars < len(df) else df
+        if hasattr(view, 'attrs'):
+            # attrs are carried over by iloc; give the prefix its own indicator-cache key
+            view.attrs = {**df.attrs, 'data_key': data_key + ((bars,) if bars < len(df) else ())}
+        prefixes[key] = view
+    return view
+
+
+def _evaluate_worker(args):
+    params, bars = args
+    backtester, strategy_cls, base_config, data, _ = _worker_state
+    strat = strategy_cls({**base_config, **params})
+    pnl = 0.0
+    trades = wins = 0
+    for symbol in data:
+        df = _prefix(symbol, bars)
+        signals = get_signal_array(strat, df)
+        if backtester.vectorized:
+            equity, fills = backtester.simulate_vectorized(df, signals)
+        else:
+            equity, fills = backtester.simulate(df, signals)
+        if len(equity):
+            pnl += float(equity[-1]) - backtester.initial_capital
+        closed = [t['pnl'] for t in fills if 'pnl' in t]
+        trades += len(closed)
+        wins += sum(1 for p in closed if p > 0)
+    return {'pnl': pnl, 'trades': trades, 'win_rate': wins / trades if trades else 0.0,
+            'pnl_per_trade': pnl / trades if trades else 0.0}
@@ -0,0 +1,299 @@
+"""
+Simulated paper broker: local per-symbol limit order book with latency, spread, slippage and partial fills
+"""
+import bisect
+import heapq
+import itertools
+import math
+import random
+from collections import deque
+from core.broker import BrokerBase
+
+
+class FillModel:
+    """Execution assumptions for PaperBroker.
+
+    latency: seconds before an order reaches the book; a number, a (median, sigma)
+        lognormal pair, or a callable(rng) returning seconds.
+    spread_bps: quoted bid/ask spread around the bar close.
+    slippage_bps: extra price impact on marketable fills, scaled up with the share
+        of the bar's volume the fill takes.
+    max_participation: largest fraction of a bar's volume the broker may fill;
+        the rest of the order stays working (partial fill). Fills are whole shares,
+        so a bar whose capped volume rounds down to zero fills nothing.
+    queue_fraction: share of the bar's volume assumed queued ahead of a new
+        passive limit order at its price.
+    """
+    def __init__(self, latency=(0.05, 0.5), spread_bps=5.0, slippage_bps=2.0, max_participation=0.1,
+                 queue_fraction=0.05, seed=None):
+        self.latency = latency
+        self.spread_bps = float(spread_bps)
+        self.slippage_bps = float(slippage_bps)
+        self.max_participation = float(max_participation)
+        self.queue_fraction = float(queue_fraction)
+        self.rng = random.Random(seed)
+
+    def sample_latency(self):
+        if callable(self.latency):
+            return float(self.latency(self.rng))
+        if isinstance(self.latency, (tuple, list)):
+            median, sigma = self.latency
+            return median * math.exp(self.rng.gauss(0.0, sigma))
+        return float(self.latency)
+
+
+class Order:
+    __slots__ = ('order_id', 'symbol', 'side', 'qty', 'filled', 'order_type', 'limit', 'status',
+                 'submitted_at', 'active_at', 'queue_ahead', 'avg_price', 'strategy')
+
+    def __init__(self, order_id, symbol, side, qty, order_type, limit, submitted_at, active_at, strategy=None):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.qty = qty
+        self.filled = 0
+        self.order_type = order_type
+        self.limit = limit
+        self.status = 'PENDING'
+        self.submitted_at = submitted_at
+        self.active_at = active_at
+        self.queue_ahead = None
+        self.avg_price = 0.0
+        self.strategy = strategy
+
+    @property
+    def remaining(self):
+        return self.qty - self.filled
+
+    def to_dict(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+
+class OrderBook:
+    """Working orders for one symbol: market FIFO plus price-level queues per side."""
+    __slots__ = ('symbol', 'market', 'bids', 'asks', 'bid_prices', 'ask_prices')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.market = deque()
+        self.bids = {}
+        self.asks = {}
+        self.bid_prices = []  # ascending
+        self.ask_prices = []  # ascending
+
+    def add(self, order):
+        if order.order_type == 'MARKET':
+            self.market.append(order)
+            return
+        levels, prices = (self.bids, self.bid_prices) if order.side == 'BUY' else (self.asks, self.ask_prices)
+        level = levels.get(order.limit)
+        if level is None:
+            level = levels[order.limit] = deque()
+            bisect.insort(prices, order.limit)
+        level.append(order)
+
+    def _drop_level(self, side, price):
+        levels, prices = (self.bids, self.bid_prices) if side == 'BUY' else (self.asks, self.ask_prices)
+        del levels[price]
+        prices.pop(bisect.bisect_left(prices, price))
+
+    def best_bid(self):
+        return self.bid_prices[-1] if self.bid_prices else None
+
+    def best_ask(self):
+        return self.ask_prices[0] if self.ask_prices else None
+
+    def __len__(self):
+        return len(self.market) + sum(len(q) for q in self.bids.values()) + sum(len(q) for q in self.asks.values())
+
+
+class PaperBroker(BrokerBase):
+    """BrokerBase implementation that fills orders against incoming bars.
+
+    place_order() returns an ack immediately; the order becomes active after a
+    sampled latency and is matched on later on_bar() calls: market orders take the
+    quoted spread plus slippage, limit orders fill when marketable or when the bar
+    trades through their price after the volume queued ahead of them. Every fill is
+    capped by the bar's volume times max_participation, so large orders fill
+    partially over several bars.
+    """
+    def __init__(self, fill_model=None, initial_cash=100000.0, bar_interval=60.0):
+        self.fill_model = fill_model or FillModel()
+        self.cash = float(initial_cash)
+        self.bar_interval = float(bar_interval)
+        self.now = 0.0
+        self.books = {}
+        self.orders = {}
+        self.fills = []
+        self.positions = {}  # symbol -> {'qty', 'avg_price'}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._pending = []  # heap of (active_at, seq, order) waiting out their latency
+
+    def authenticate(self):
+        return True
+
+    def place_order(self, symbol, qty, side, order_type, price=None, sl=None, target=None, **kwargs):
+        side = side.upper()
+        order_type = order_type.upper()
+        if qty <= 0 or side not in ('BUY', 'SELL'):
+            return {'order_id': None, 'status': 'REJECTED', 'reason': 'Invalid qty or side'}
+        if order_type != 'MARKET' and price is None:
+            return {'order_id': None, 'status': 'REJECTED', 'reason': 'Limit order needs a price'}
+        order_id = f"PAPER{next(self._ids)}"
+        limit = None if order_type == 'MARKET' else float(price)
+        order = Order(order_id, symbol, side, qty, order_type, limit, self.now,
+                      self.now + self.fill_model.sample_latency(), kwargs.get('strategy'))
+        self.orders[order_id] = order
+        heapq.heappush(self._pending, (order.active_at, next(self._seq), order))
+        return {'order_id': order_id, 'status': 'PENDING', 'symbol': symbol, 'qty': qty, 'side': side,
+                'order_type': order_type, 'price': price, 'paper': True}
+
+    def cancel_order(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None or order.status in ('FILLED', 'CANCELLED', 'REJECTED'):
+            return {'order_id': order_id, 'status': 'REJECTED'}
+        # Removed lazily from its queue during matching
+        order.status = 'CANCELLED'
+        return {'order_id': order_id, 'status': 'CANCELLED'}
+
+    def get_order(self, order_id):
+        order = self.orders.get(order_id)
+        return order.to_dict() if order else None
+
+    def get_positions(self):
+        return [{'symbol': s, **p} for s, p in self.positions.items() if p['qty']]
+
+    def get_balance(self):
+        return {'cash': self.cash}
+
+    # --- Market data / matching ---
+    def on_bar(self, symbol, bar, ts=None):
+        """Advance the clock to ts (seconds or datetime) and match symbol's book against bar.
+
+        Without ts the clock advances by bar_interval per call, so pass ts when
+        driving several symbols off the same bar time.
+        bar is a mapping with 'close' and optionally 'high', 'low' and 'volume' (None or
+        NaN volume means no participation cap).
+        Returns the fills produced by this bar.
+        """
+        self.now = _to_seconds(ts) if ts is not None else self.now + self.bar_interval
+        while self._pending and self._pending[0][0] <= self.now:
+            order = heapq.heappop(self._pending)[2]
+            if order.status == 'PENDING':
+                order.status = 'OPEN'
+                self._book(order.symbol).add(order)
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+        return self._match(book, bar)
+
+    def _book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def _match(self, book, bar):
+        fm = self.fill_model
+        close = float(bar['close'])
+        high = float(bar.get('high', close))
+        low = float(bar.get('low', close))
+        volume = bar.get('volume')
+        if volume is not None and volume != volume:
+            # A blank volume cell (NaN) means unknown volume: no participation or queue cap
+            volume = None
+        # Whole shares only: participation caps and queue sizes are rounded down
+        available = math.inf if volume is None else math.floor(float(volume) * fm.max_participation)
+        half = close * fm.spread_bps / 20000.0
+        bid, ask = close - half, close + half
+        fills = []
+
+        def slip(qty):
+            # Impact grows with the share of available liquidity taken
+            share = 0.0 if math.isinf(available) or available <= 0 else min(1.0, qty / max(available, 1e-12))
+            return fm.slippage_bps / 10000.0 * (1.0 + share)
+
+        # Market orders first, FIFO
+        while book.market and available > 0:
+            order = book.market[0]
+            if order.status == 'CANCELLED':
+                book.market.popleft()
+                continue
+            qty = min(order.remaining, available)
+            px = ask * (1 + slip(qty)) if order.side == 'BUY' else bid * (1 - slip(qty))
+            fills.append(self._fill(order, qty, px))
+            available -= qty
+            if order.remaining <= 0:
+                book.market.popleft()
+            else:
+                break
+        # Buy limits, best (highest) price first; sells, lowest first
+        for side, prices, levels in (('BUY', book.bid_prices, book.bids), ('SELL', book.ask_prices, book.asks)):
+            for price in (list(reversed(prices)) if side == 'BUY' else list(prices)):
+                if available <= 0:
+                    break
+                marketable = price >= ask if side == 'BUY' else price <= bid
+                traded_through = low < price if side == 'BUY' else high > price
+                if not (marketable or traded_through):
+                    break
+                level = levels[price]
+                while level and available > 0:
+                    order = level[0]
+                    if order.status == 'CANCELLED':
+                        level.popleft()
+                        continue
+                    if marketable:
+                        base = ask if side == 'BUY' else bid
+                        qty = min(order.remaining, available)
+                        px = min(price, base * (1 + slip(qty))) if side == 'BUY' else max(price, base * (1 - slip(qty)))
+                    else:
+                        # Passive fill at the limit once the volume queued ahead has traded
+                        if order.queue_ahead is None:
+                            order.queue_ahead = 0 if volume is None else math.floor(float(volume) * fm.queue_fraction)
+                        consumed = min(order.queue_ahead, available)
+                        order.queue_ahead -= consumed
+                        available -= consumed
+                        if order.queue_ahead > 0:
+                            break
+                        qty = min(order.remaining, available)
+                        if qty <= 0:
+                            break
+                        px = price
+                    fills.append(self._fill(order, qty, px))
+                    available -= qty
+                    if order.remaining <= 0:
+                        level.popleft()
+                if not level:
+                    book._drop_level(side, price)
+        return fills
+
+    def _fill(self, order, qty, price):
+        qty = int(qty) if float(qty).is_integer() else qty
+        total = order.avg_price * order.filled + price * qty
+        order.filled += qty
+        order.avg_price = total / order.filled
+        order.status = 'FILLED' if order.remaining <= 0 else 'PARTIAL'
+        signed = qty if order.side == 'BUY' else -qty
+        self.cash -= signed * price
+        pos = self.positions.setdefault(order.symbol, {'qty': 0, 'avg_price': 0.0})
+        new_qty = pos['qty'] + signed
+        if pos['qty'] == 0 or (pos['qty'] > 0) == (signed > 0):
+            # Opening or adding: volume-weighted entry price
+            pos['avg_price'] = (pos['avg_price'] * abs(pos['qty']) + price * qty) / abs(new_qty)
+        elif new_qty and (new_qty > 0) != (pos['qty'] > 0):
+            # Flipped through flat: remainder is entered at the fill price
+            pos['avg_price'] = price
+        pos['qty'] = new_qty
+        fill = {'order_id': order.order_id, 'symbol': order.symbol, 'side': order.side, 'qty': qty,
+                'price': price, 'ts': self.now, 'status': order.status, 'strategy': order.strategy}
+        self.fills.append(fill)
+        return fill
+
+
+def _to_seconds(ts):
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if hasattr(ts, 'timestamp'):
+        return ts.timestamp()
+    raise TypeError(f"Unsupported timestamp: {ts!r}")
@@ -0,0 +1,190 @@
+"""
+Portfolio backtester: all symbols and strategies on a common time index with shared capital and RiskEngine limits
+"""
+import numpy as np
+import pandas as pd
+from strategies.base import BUY, SELL, get_signal_array
+from core.risk import RiskEngine
+from utils.pnl_aggregates import PnLAggregates
+
+
+class PortfolioBacktester:
+    """Steps every (strategy, symbol) slot together over one time index.
+
+    Prices and signals are held as T x N arrays (N = strategies x symbols) and
+    each bar is processed for all slots at once: exits first, then entries
+    funded from the shared cash balance. Entries are sized at
+    max_capital_per_trade x current equity (whole shares unless fractional),
+    pass RiskEngine.check_orders (symbol, strategy, gross and net exposure
+    limits against current equity, and the circuit breaker), then are capped by
+    cash and max_positions concurrent positions. Fills are recorded on the
+    RiskEngine and realized losses fed to update_daily_loss; with a
+    DatetimeIndex the daily state resets on each new date.
+    """
+    def __init__(self, strategies, data_loader, risk_engine=None, initial_capital=100000, fee_per_trade=0.0,
+                 slippage_bps=0.0, max_positions=None, fractional=False):
+        self.strategies = strategies  # dict: name -> strategy instance
+        self.data_loader = data_loader
+        self.risk_engine = risk_engine or RiskEngine()
+        self.initial_capital = float(initial_capital)
+        self.fee_per_trade = float(fee_per_trade)
+        self.slippage_bps = float(slippage_bps)
+        self.max_positions = max_positions
+        self.fractional = fractional
+        self.results = None
+
+    def load(self, symbols, start_date, end_date):
+        """Close prices aligned on the union of the symbols' indexes (T x S), forward-filled."""
+        closes = {}
+        frames = {}
+        for symbol in symbols:
+            df = self.data_loader(symbol, start_date, end_date)
+            if hasattr(df, 'attrs'):
+                df.attrs.setdefault('data_key', (symbol, str(start_date), str(end_date)))
+            frames[symbol] = df
+            closes[symbol] = df['close']
+        prices = pd.concat(closes, axis=1).sort_index().ffill()
+        return frames, prices
+
+    def signal_matrix(self, frames, prices):
+        """int8 signals T x (strategies x symbols), aligned to prices.index (HOLD where a symbol has no bar)."""
+        symbols = list(prices.columns)
+        out = np.zeros((len(prices), len(self.strategies) * len(symbols)), dtype=np.int8)
+        for k, strat in enumerate(self.strategies.values()):
+            for j, symbol in enumerate(symbols):
+                df = frames[symbol]
+                codes = get_signal_array(strat, df)
+                rows = prices.index.get_indexer(df.index[:len(codes)])
+                out[rows[rows >= 0], k * len(symbols) + j] = codes[rows >= 0]
+        return out
+
+    def run(self, symbols, start_date, end_date):
+        symbols = list(symbols)
+        frames, prices = self.load(symbols, start_date, end_date)
+        signals = self.signal_matrix(frames, prices)
+        self.results = self.simulate(prices, signals)
+        return self.results
+
+    def simulate(self, prices, signals):
+        """Shared-capital simulation over prices (T x S DataFrame) and signals (T x K*S int8).
+
+        Returns a dict with 'equity', 'cash' and 'exposure' Series, 'positions'
+        (T x N quantity array), 'trades' (list of dicts), and counts of entries
+        'blocked' by the risk engine or by cash/position limits. The risk
+        engine's exposure is reset to the (empty) simulated book first.
+        """
+        risk = self.risk_engine
+        cfg = risk.config
+        symbols = list(prices.columns)
+        strat_names = list(self.strategies)
+        n_sym = len(symbols)
+        T, N = signals.shape
+        col_symbols = [symbols[c % n_sym] for c in range(N)]
+        col_strats = [strat_names[c // n_sym] for c in range(N)]
+        risk.rebuild_exposure()
+        # One price column per (strategy, symbol) slot
+        px_all = np.tile(prices.to_numpy(dtype=np.float64), (1, N // n_sym if n_sym else 0))
+        slip_mult = 1.0 + self.slippage_bps / 10000.0
+        fee = self.fee_per_trade
+        dates = prices.index.normalize() if isinstance(prices.index, pd.DatetimeIndex) else None
+
+        qty = np.zeros(N)
+        entry = np.zeros(N)
+        cash = self.initial_capital
+        equity = np.empty(T)
+        cash_curve = np.empty(T)
+        exposure = np.empty(T)
+        positions = np.empty((T, N))
+        trades = []
+        blocked = {'risk': 0, 'limits': 0}
+
+        for t in range(T):
+            if dates is not None and t and dates[t] != dates[t - 1]:
+                risk.reset_daily()
+            px = px_all[t]
+            day = str(dates[t].date()) if dates is not None else None
+            valid = ~np.isnan(px)
+            sig = signals[t]
+            held = qty != 0
+
+            # Exits: sell whole positions at close / slippage
+            exits = np.flatnonzero(held & (sig == SELL) & valid)
+            if len(exits):
+                exit_px = px[exits] / slip_mult
+                pnl = qty[exits] * (exit_px - entry[exits])
+                cash += float(np.sum(qty[exits] * exit_px)) - fee * len(exits)
+                for c, q, p, e, v in zip(exits.tolist(), qty[exits].tolist(), exit_px.tolist(),
+                                         entry[exits].tolist(), pnl.tolist()):
+                    risk.record_fill(col_symbols[c], col_strats[c], -q * e)
+                    trades.append({'symbol': col_symbols[c], 'strategy': col_strats[c],
+                                   'action': 'SELL', 'qty': q, 'entry': e, 'price': p, 'index': t, 'date': day, 'fee': fee,
+                                   'pnl': v})
+                qty[exits] = 0.0
+                loss = float(-pnl[pnl < 0].sum())
+                if loss > 0:
+                    mark = cash + float(np.nansum(qty * px))
+                    was_active = risk.circuit_breaker
+                    ok, msg = risk.update_daily_loss(loss, mark)
+                    if not ok and not was_active:
+                        print(f"[PORTFOLIO] {msg} (bar {t})")
+
+            # Entries: size off current equity, fund in column order from shared cash
+            cand = np.flatnonzero((qty == 0) & (sig == BUY) & valid)
+            if len(cand):
+                if risk.circuit_breaker:
+                    blocked['risk'] += len(cand)
+                else:
+                    mark = cash + float(np.nansum(qty * px))
+                    entry_px = px[cand] * slip_mult
+                    cap = max(cfg['max_capital_per_trade'] * mark, 0.0)
+                    size = cap / entry_px
+                    if not self.fractional:
+                        size = np.floor(size)
+                    sized = np.flatnonzero(size > 0)
+                    # Sized at the per-trade cap; rounding in size * price must not trip it
+                    notional = np.minimum(size[sized] * entry_px[sized], cap)
+                    passed, _ = risk.check_orders([col_symbols[c] for c in cand[sized].tolist()],
+                                                  [col_strats[c] for c in cand[sized].tolist()], notional, mark)
+                    ok = np.zeros(len(cand), dtype=bool)
+                    ok[sized] = passed
+                    rejected = int(len(sized) - np.count_nonzero(passed))
+                    # Cash and slots are taken in column order; once one entry misses, so does every later
+                    # one, so the orders they drop never change a risk decision above
+                    cost = size * entry_px + fee
+                    funded = ok & (np.cumsum(np.where(ok, cost, 0.0)) <= cash)
+                    if self.max_positions is not None:
+                        slots = max(0, self.max_positions - int(np.count_nonzero(qty)))
+                        funded &= np.cumsum(funded) <= slots
+                    blocked['risk'] += rejected
+                    blocked['limits'] += int(len(cand) - np.count_nonzero(funded)) - rejected
+                    cand, entry_px, size, cost = cand[funded], entry_px[funded], size[funded], cost[funded]
+                    qty[cand] = size
+                    entry[cand] = entry_px
+                    cash -= float(np.sum(cost))
+                    for c, q, p in zip(cand.tolist(), size.tolist(), entry_px.tolist()):
+                        risk.record_fill(col_symbols[c], col_strats[c], q * p)
+                        trades.append({'symbol': col_symbols[c], 'strategy': col_strats[c],
+                                       'action': 'BUY', 'qty': q, 'price': p, 'index': t, 'date': day, 'fee': fee})
+
+            notional = float(np.nansum(qty * px))
+            positions[t] = qty
+            cash_curve[t] = cash
+            exposure[t] = notional
+            equity[t] = cash + notional
+
+        index = prices.index
+        return {
+            'equity': pd.Series(equity, index=index, name='equity'),
+            'cash': pd.Series(cash_curve, index=index, name='cash'),
+            'exposure': pd.Series(exposure, index=index, name='exposure'),
+            'positions': positions,
+            'columns': [(s, sym) for s in strat_names for sym in symbols],
+            'trades': trades,
+            'blocked': blocked,
+        }
+
+    def summary(self):
+        """PnL tables (total / per strategy / per symbol) over the closed trades of the last run."""
+        if self.results is None:
+            return None
+        return PnLAggregates().add_trades(t for t in self.results['trades'] if 'pnl' in t).to_dict()
@@ -1,59 +1,340 @@
 """
-Risk Management Engine: stop loss, target, trailing stop, max capital/trade, max daily loss, circuit breaker
+Risk Management Engine: stop loss, target, trailing stop, max capital/trade, max daily loss, circuit breaker,
+per-symbol/per-strategy/gross/net exposure limits with batched pre-trade checks and journaled state
 """
 import os
 import json
 
+DEFAULT_CONFIG = {
+    'stop_loss_pct': 0.02,
+    'target_pct': 0.04,
+    'trailing_stop_pct': 0.01,
+    'max_capital_per_trade': 0.1,
+    'max_daily_loss': 0.05,
+    # Portfolio limits, as fractions of capital, on notional at cost
+    'max_symbol_exposure': 0.25,
+    'max_strategy_exposure': 0.5,
+    'max_gross_exposure': 1.0,
+    'max_net_exposure': 1.0,
+}
+
+# check_orders reason codes index into this
+REJECT_REASONS = (
+    "OK",
+    "Trade size exceeds max capital per trade.",
+    "Circuit breaker active.",
+    "Symbol exposure limit exceeded.",
+    "Strategy exposure limit exceeded.",
+    "Gross exposure limit exceeded.",
+    "Net exposure limit exceeded.",
+)
+
+
+def _bump(book, key, amount):
+    value = book.get(key, 0.0) + amount
+    # Drop flat keys so cost-basis round trips leave no float residue behind
+    if abs(value) < 1e-9:
+        book.pop(key, None)
+        return 0.0
+    book[key] = value
+    return value
+
+
+class _KeyRuns:
+    """Orders grouped by key (symbol or strategy), for per-key running exposure in one vectorized pass."""
+    def __init__(self, np, keys, book, n):
+        codes = {}
+        ids = np.fromiter((codes.setdefault(k, len(codes)) for k in keys), np.int64, n)
+        self.start = np.fromiter((book.get(k, 0.0) for k in codes), np.float64, len(codes))
+        self.order = np.argsort(ids, kind='stable')
+        self.sorted_ids = ids[self.order]
+        first = np.ones(n, dtype=bool)
+        first[1:] = self.sorted_ids[1:] != self.sorted_ids[:-1]
+        self.run_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+
+    def before(self, np, notional):
+        """Exposure on each order's key just before it: book value plus earlier orders in the batch on that key."""
+        sorted_notional = notional[self.order]
+        # Exclusive running sum within each run of equal ids
+        excl = np.cumsum(sorted_notional) - sorted_notional
+        before = np.empty(len(notional))
+        before[self.order] = excl - excl[self.run_start] + self.start[self.sorted_ids]
+        return before
+
+
+# check_orders re-solves the batch once per rejection; past this many it finishes with the scalar path
+_MAX_VECTOR_PASSES = 16
+
+
 class RiskEngine:
-    def __init__(self, config=None):
-        self.config = config or {
-            'stop_loss_pct': 0.02,
-            'target_pct': 0.04,
-            'trailing_stop_pct': 0.01,
-            'max_capital_per_trade': 0.1,
-            'max_daily_loss': 0.05,
-        }
+    """Pre-trade checks and daily loss tracking, with incremental exposure indexes.
+
+    Exposure is signed notional at cost, kept per symbol, per strategy and as
+    gross (sum of |symbol exposure|) and net totals. record_fill() updates the
+    indexes in O(1); check_orders() vets a whole burst of candidate orders in
+    one vectorized pass against them.
+
+    With journal_path set, every fill, loss, reset and exposure rebuild is
+    appended to that file as one JSON line. save_state() writes a snapshot and
+    truncates the journal; load_state() reads the snapshot and replays the
+    journal on top. Entries carry a sequence number so a journal left behind by
+    an interrupted save is not applied twice.
+    """
+    def __init__(self, config=None, journal_path=None):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
         self.daily_loss = 0
         self.circuit_breaker = False
+        self.symbol_exposure = {}
+        self.strategy_exposure = {}
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.journal_path = journal_path
+        self._journal_file = None
+        self._seq = 0
 
-    def check_trade(self, capital, trade_size, trade_loss):
+    def check_trade(self, capital, trade_size, trade_loss, symbol=None, strategy=None):
+        """Check one order. With a symbol, trade_size is signed notional and exposure limits apply too."""
+        if symbol is not None:
+            reason = self.check_order(symbol, strategy, trade_size, capital)
+            return reason == 0, REJECT_REASONS[reason]
         if trade_size > self.config['max_capital_per_trade'] * capital:
             return False, "Trade size exceeds max capital per trade."
         if self.circuit_breaker:
             return False, "Circuit breaker active."
         return True, "OK"
 
+    def check_order(self, symbol, strategy, notional, capital):
+        """Reason code for one order; same rules as check_orders, in plain floats for the single-order path."""
+        cfg = self.config
+        capital = float(capital)
+        sym_before = self.symbol_exposure.get(symbol, 0.0)
+        sym_after = sym_before + notional
+        gross_delta = abs(sym_after) - abs(sym_before)
+        if gross_delta <= 1e-9:
+            return 0
+        strat_before = self.strategy_exposure.get(strategy, 0.0)
+        strat_after = strat_before + notional
+        net_after = self.net_exposure + notional
+        if abs(notional) > cfg['max_capital_per_trade'] * capital:
+            return 1
+        if self.circuit_breaker:
+            return 2
+        if abs(sym_after) > cfg['max_symbol_exposure'] * capital and abs(sym_after) > abs(sym_before):
+            return 3
+        if abs(strat_after) > cfg['max_strategy_exposure'] * capital and abs(strat_after) > abs(strat_before):
+            return 4
+        if self.gross_exposure + gross_delta > cfg['max_gross_exposure'] * capital:
+            return 5
+        if abs(net_after) > cfg['max_net_exposure'] * capital and abs(net_after) > abs(self.net_exposure):
+            return 6
+        return 0
+
+    def check_orders(self, symbols, strategies, notionals, capital):
+        """Pre-trade check for a batch of candidate orders in one vectorized pass.
+
+        notionals are signed (buy > 0, sell < 0). Orders are taken in sequence:
+        each is checked against current exposure plus every earlier accepted
+        order in the batch as if it filled, so a burst cannot get past a limit in
+        pieces. The result equals check_order() plus record_fill() per accepted
+        order. Each rejection costs one more vectorized pass (after
+        _MAX_VECTOR_PASSES the rest runs order by order). Orders that do not add
+        to gross exposure (exits, reductions) are never blocked.
+
+        Returns (ok, reason): a bool array and an int8 array of codes into
+        REJECT_REASONS.
+        """
+        import numpy as np
+        cfg = self.config
+        capital = float(capital)
+        notional = np.asarray(notionals, dtype=np.float64).ravel()
+        n = len(notional)
+        if not n:
+            return np.ones(0, dtype=bool), np.zeros(0, dtype=np.int8)
+        sym_runs = _KeyRuns(np, symbols, self.symbol_exposure, n)
+        strat_runs = _KeyRuns(np, strategies, self.strategy_exposure, n)
+
+        def breach(before, after, limit):
+            return (np.abs(after) > limit * capital) & (np.abs(after) > np.abs(before))
+
+        # Solve assuming every order is accepted; orders before the first rejection
+        # are then exact, so drop that order from the running sums and solve again
+        accepted = np.ones(n, dtype=bool)
+        for _ in range(_MAX_VECTOR_PASSES + 1):
+            counted = np.where(accepted, notional, 0.0)
+            sym_before = sym_runs.before(np, counted)
+            sym_after = sym_before + notional
+            strat_before = strat_runs.before(np, counted)
+            strat_after = strat_before + notional
+            gross_delta = np.abs(sym_after) - np.abs(sym_before)
+            counted_gross = np.where(accepted, gross_delta, 0.0)
+            gross_after = self.gross_exposure + np.cumsum(counted_gross) - counted_gross + gross_delta
+            net_before = self.net_exposure + np.cumsum(counted) - counted
+            net_after = net_before + notional
+            adds = gross_delta > 1e-9
+            reason = np.select(
+                [adds & (np.abs(notional) > cfg['max_capital_per_trade'] * capital),
+                 adds & self.circuit_breaker,
+                 adds & breach(sym_before, sym_after, cfg['max_symbol_exposure']),
+                 adds & breach(strat_before, strat_after, cfg['max_strategy_exposure']),
+                 adds & (gross_after > cfg['max_gross_exposure'] * capital),
+                 adds & breach(net_before, net_after, cfg['max_net_exposure'])],
+                [1, 2, 3, 4, 5, 6], 0).astype(np.int8)
+            wrong = np.flatnonzero(accepted & (reason != 0))
+            if not len(wrong):
+                return reason == 0, reason
+            accepted[wrong[0]] = False
+        # Many rejections: finish the remaining orders one by one on a scratch copy
+        k = int(wrong[0]) + 1
+        scratch = RiskEngine(cfg)
+        scratch.circuit_breaker = self.circuit_breaker
+        scratch.symbol_exposure = dict(self.symbol_exposure)
+        scratch.strategy_exposure = dict(self.strategy_exposure)
+        scratch.gross_exposure, scratch.net_exposure = self.gross_exposure, self.net_exposure
+        symbols, strategies = list(symbols), list(strategies)
+        for j in np.flatnonzero(accepted[:k]).tolist():
+            scratch._apply({'op': 'fill', 'symbol': symbols[j], 'strategy': strategies[j], 'notional': float(notional[j])})
+        for j in range(k, n):
+            reason[j] = scratch.check_order(symbols[j], strategies[j], float(notional[j]), capital)
+            if reason[j] == 0:
+                scratch._apply({'op': 'fill', 'symbol': symbols[j], 'strategy': strategies[j], 'notional': float(notional[j])})
+        return reason == 0, reason
+
+    def record_fill(self, symbol, strategy, notional):
+        """Apply a filled order's signed notional; close a position with the negated opening notional."""
+        entry = {'op': 'fill', 'symbol': symbol, 'strategy': strategy, 'notional': float(notional)}
+        self._apply(entry)
+        self._journal(entry)
+
     def update_daily_loss(self, loss, capital):
         self.daily_loss += loss
-        if abs(self.daily_loss) > self.config['max_daily_loss'] * capital:
+        tripped = abs(self.daily_loss) > self.config['max_daily_loss'] * capital
+        if tripped:
             self.circuit_breaker = True
+        self._journal({'op': 'loss', 'loss': loss, 'breaker': self.circuit_breaker})
+        if tripped:
             return False, "Max daily loss hit. Circuit breaker activated."
         return True, "OK"
 
     def reset_daily(self):
         self.daily_loss = 0
         self.circuit_breaker = False
+        self._journal({'op': 'reset'})
+
+    def rebuild_exposure(self, positions=()):
+        """Replace all exposure with that of the given open positions.
+
+        positions are dicts with symbol, strategy, qty and entry (side 'SHORT'
+        counts negative). Call at startup with the book actually held, so fills
+        from a run that died before closing its positions do not linger. Returns
+        False, journaling nothing, when exposure already matches.
+        """
+        rows = [[p['symbol'], p.get('strategy'), (-1 if p.get('side') == 'SHORT' else 1) * float(p['qty']) * float(p['entry'])]
+                for p in positions]
+        symbols, strategies = {}, {}
+        for symbol, strategy, amount in rows:
+            _bump(symbols, symbol, amount)
+            _bump(strategies, strategy, amount)
+        if symbols == self.symbol_exposure and strategies == self.strategy_exposure:
+            # Already in step with the book: nothing to apply or journal
+            return False
+        entry = {'op': 'exposure', 'positions': rows}
+        self._apply(entry)
+        self._journal(entry)
+        return True
+
+    def exposure(self):
+        return {'gross': self.gross_exposure, 'net': self.net_exposure, 'symbols': dict(self.symbol_exposure),
+                'strategies': dict(self.strategy_exposure)}
+
+    def _apply(self, entry):
+        op = entry.get('op')
+        if op == 'fill':
+            amount = entry['notional']
+            before = self.symbol_exposure.get(entry['symbol'], 0.0)
+            after = _bump(self.symbol_exposure, entry['symbol'], amount)
+            _bump(self.strategy_exposure, entry['strategy'], amount)
+            self.gross_exposure += abs(after) - abs(before)
+            self.net_exposure += amount
+            if not self.symbol_exposure:
+                self.gross_exposure = self.net_exposure = 0.0
+        elif op == 'exposure':
+            self.symbol_exposure, self.strategy_exposure = {}, {}
+            self.gross_exposure = self.net_exposure = 0.0
+            for symbol, strategy, amount in entry['positions']:
+                self._apply({'op': 'fill', 'symbol': symbol, 'strategy': strategy, 'notional': amount})
+        elif op == 'loss':
+            self.daily_loss += entry['loss']
+            self.circuit_breaker = self.circuit_breaker or bool(entry.get('breaker'))
+        elif op == 'reset':
+            self.daily_loss = 0
+            self.circuit_breaker = False
 
     # --- Persistence helpers ---
+    def _journal(self, entry):
+        self._seq += 1
+        if self.journal_path is None:
+            return
+        if self._journal_file is None:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            # Line-buffered: one write per entry, no fsync
+            self._journal_file = open(self.journal_path, "a", buffering=1)
+        entry['seq'] = self._seq
+        self._journal_file.write(json.dumps(entry) + "\n")
+
+    def close_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
     def save_state(self, path=os.path.join('logs', 'risk_state.json')):
+        """Snapshot the full state (temp file + rename), then truncate the journal."""
         os.makedirs(os.path.dirname(path), exist_ok=True)
         state = {
             'daily_loss': self.daily_loss,
             'circuit_breaker': self.circuit_breaker,
             'config': self.config,
+            'symbol_exposure': list(self.symbol_exposure.items()),
+            'strategy_exposure': list(self.strategy_exposure.items()),
+            'seq': self._seq,
         }
-        with open(path, 'w') as f:
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
             json.dump(state, f)
+        os.replace(tmp, path)
+        if self.journal_path is not None:
+            self.close_journal()
+            open(self.journal_path, 'w').close()
 
     def load_state(self, path=os.path.join('logs', 'risk_state.json')):
-        if not os.path.exists(path):
-            return False
-        try:
-            with open(path) as f:
-                state = json.load(f)
-            self.daily_loss = state.get('daily_loss', 0)
-            self.circuit_breaker = state.get('circuit_breaker', False)
-            # keep current config if present; ignore persisted config differences
-            return True
-        except Exception:
-            return False
+        loaded = False
+        seq = 0
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+                self.daily_loss = state.get('daily_loss', 0)
+                self.circuit_breaker = state.get('circuit_breaker', False)
+                # keep current config if present; ignore persisted config differences
+                self.symbol_exposure = {k: v for k, v in state.get('symbol_exposure', [])}
+                self.strategy_exposure = {k: v for k, v in state.get('strategy_exposure', [])}
+                self.gross_exposure = sum(abs(v) for v in self.symbol_exposure.values())
+                self.net_exposure = sum(self.symbol_exposure.values())
+                seq = state.get('seq', 0)
+                loaded = True
+            except Exception:
+                return False
+        if self.journal_path is not None and os.path.exists(self.journal_path):
+            self.close_journal()
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Partially written tail line; ignore
+                        continue
+                    if entry.get('seq', 0) > seq:
+                        self._apply(entry)
+                        seq = entry['seq']
+                        loaded = True
+        self._seq = seq
+        return loaded
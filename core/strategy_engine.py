@@ -1,39 +1,134 @@
 """
 Modular Strategy Engine: dynamically loads and manages strategy modules.
 """
+import ast
 import importlib
-import os
-import glob
 import inspect
-from strategies.base import StrategyBase
+import json
+import os
+
 
 class StrategyEngine:
-    def __init__(self, strategies_path="strategies"):
+    """Lazy strategy registry.
+
+    discover_strategies() finds strategy classes by parsing the modules under
+    strategies_path (no imports) and caches the result in a manifest keyed by
+    each file's mtime and size, so unchanged files are not even re-parsed.
+    A strategy's module is imported and its class instantiated only on the
+    first get_strategy()/get_strategy_class() for that name, which keeps heavy
+    dependencies (torch, transformers, ...) out of --status and --strategies.
+    """
+    def __init__(self, strategies_path="strategies", manifest_path=None):
         self.strategies_path = strategies_path
-        self.strategies = {}
+        self.manifest_path = manifest_path or os.path.join(strategies_path, "__pycache__", "strategy_manifest.json")
+        self.manifest = {}  # name -> {'module', 'class', 'path'}
+        self.strategies = {}  # name -> instance, created on first use
+        self.classes = {}  # name -> strategy class, imported on first use
 
     def discover_strategies(self):
-        """Discover and load all strategy modules dynamically."""
-        py_files = glob.glob(os.path.join(self.strategies_path, "*.py"))
-        for file in py_files:
-            name = os.path.basename(file)[:-3]
-            if name.startswith("_") or name == "base":
+        """Discover strategy modules (from the manifest where files are unchanged)."""
+        cache = self._load_manifest()
+        files = {}
+        try:
+            entries = sorted(os.scandir(self.strategies_path), key=lambda e: e.name)
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith(".py"):
                 continue
-            try:
-                module = importlib.import_module(f"strategies.{name}")
-            except Exception as e:
-                print(f"[STRATEGY] Failed to import strategies.{name}: {e}")
+            name = entry.name[:-3]
+            if name.startswith("_") or name == "base":
                 continue
-            for attr in dir(module):
-                obj = getattr(module, attr)
-                if inspect.isclass(obj) and issubclass(obj, StrategyBase) and obj is not StrategyBase:
-                    try:
-                        self.strategies[name] = obj()
-                    except Exception as e:
-                        print(f"[STRATEGY] Failed to instantiate {attr} from {name}: {e}")
+            st = entry.stat()
+            cached = cache.get(entry.name)
+            if cached and cached.get('mtime') == st.st_mtime_ns and cached.get('size') == st.st_size:
+                classes = cached['classes']
+            else:
+                classes = _strategy_classes(entry.path)
+            files[entry.name] = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'classes': classes}
+            if classes:
+                # One strategy per module, as before: the last class in name order
+                self.manifest[name] = {'module': f"strategies.{name}", 'class': sorted(classes)[-1], 'path': entry.path}
+        if files != cache:
+            self._save_manifest(files)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_manifest(self, files):
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(files, f)
+            os.replace(tmp, self.manifest_path)
+        except Exception as e:
+            print(f"[STRATEGY] Could not write strategy manifest: {e}")
+
+    def get_strategy_class(self, name):
+        if name in self.classes:
+            return self.classes[name]
+        entry = self.manifest.get(name)
+        if entry is None:
+            return None
+        from strategies.base import StrategyBase
+        try:
+            module = importlib.import_module(entry['module'])
+        except Exception as e:
+            print(f"[STRATEGY] Failed to import {entry['module']}: {e}")
+            return None
+        obj = getattr(module, entry['class'], None)
+        if not (inspect.isclass(obj) and issubclass(obj, StrategyBase) and obj is not StrategyBase):
+            print(f"[STRATEGY] {entry['module']}.{entry['class']} is not a StrategyBase subclass")
+            return None
+        self.classes[name] = obj
+        return obj
 
     def get_strategy(self, name):
-        return self.strategies.get(name)
+        if name in self.strategies:
+            return self.strategies[name]
+        cls = self.get_strategy_class(name)
+        if cls is None:
+            return None
+        try:
+            self.strategies[name] = cls()
+        except Exception as e:
+            print(f"[STRATEGY] Failed to instantiate {cls.__name__} from {name}: {e}")
+            return None
+        return self.strategies[name]
 
     def list_strategies(self):
-        return list(self.strategies.keys())
+        return list(self.manifest.keys())
+
+
+def _strategy_classes(path):
+    """Names of classes in a module that derive from StrategyBase, directly or via another class in the file."""
+    try:
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError) as e:
+        print(f"[STRATEGY] Failed to parse {path}: {e}")
+        return []
+    bases = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            names = []
+            for b in node.bases:
+                if isinstance(b, ast.Name):
+                    names.append(b.id)
+                elif isinstance(b, ast.Attribute):
+                    names.append(b.attr)
+            bases[node.name] = names
+    found = set()
+    changed = True
+    while changed:
+        changed = False
+        for cls, parents in bases.items():
+            if cls not in found and any(p == 'StrategyBase' or p in found for p in parents):
+                found.add(cls)
+                changed = True
+    return sorted(found)
@@ -7,26 +7,85 @@ import os
 import glob
 import json
 from datetime import date
+from utils.position_store import read_open_positions
+from utils.log_tail import JSONLTail
+from utils.pnl_aggregates import load_summary
+from utils.event_store import EventStore, is_current
 
 st.set_page_config(page_title="ProjectTrade Dashboard", layout="wide")
 st.title("📈 ProjectTrade Live Dashboard")
 
+
+# Readers live across reruns so each rerun only parses newly appended log lines
+@st.cache_resource
+def get_log_tail(path, window):
+    return JSONLTail(path, window=window)
+
+
+@st.cache_resource
+def get_event_store(path):
+    return EventStore(path)
+
+
+@st.cache_resource
+def get_trades_tail(path, window):
+    daily = {}
+
+    def add(trade):
+        if 'pnl' in trade:
+            day = trade.get('date')
+            daily[day] = daily.get(day, 0.0) + (trade.get('pnl') or 0.0)
+    return JSONLTail(path, window=window, on_record=add, on_reset=daily.clear), daily
+
+
+@st.cache_data
+def load_json_summary(path, mtime):
+    # Small pre-aggregated tables maintained by the logger / Backtester.export_logs
+    if path.endswith("pnl_summary.json"):
+        return load_summary(path)
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_summary(path):
+    if not os.path.exists(path):
+        return None
+    return load_json_summary(path, os.stat(path).st_mtime)
+
+
+@st.cache_data
+def summarize_backtest_csv(file, mtime, size):
+    # mtime/size are part of the cache key so rewritten files are re-read
+    df = pd.read_csv(file)
+    if df.empty:
+        return None
+    strat = file.split("backtest_")[1].replace(".csv", "")
+    # Prefer PnL column if present, else simple price diff fallback
+    if 'pnl' in df.columns:
+        pnl_val = df['pnl'].sum()
+    elif 'price' in df.columns:
+        pnl_val = df['price'].diff().sum()
+    else:
+        pnl_val = 0
+    return {"Strategy": strat, "PnL": pnl_val, "Trades": len(df)}
+
+
 # --- Current Positions ---
 st.header("Current Positions")
 positions_state_file = os.path.join("logs", "positions_state.json")
 positions_history_file = os.path.join("logs", "positions.json")
 positions = []
-# Prefer current state JSON (array of open positions)
+# Prefer current state (snapshot + incremental deltas of open positions)
 if os.path.exists(positions_state_file):
     try:
-        with open(positions_state_file) as f:
-            positions = json.load(f)
+        positions = read_open_positions("logs")
     except Exception:
         positions = []
 # Fallback to history JSONL if state is missing or empty
 if not positions and os.path.exists(positions_history_file):
-    with open(positions_history_file) as f:
-        positions = [json.loads(line) for line in f if line.strip()]
+    positions_tail = get_log_tail(positions_history_file, 1000)
+    positions_tail.poll()
+    positions = positions_tail.records()
 if positions:
     st.dataframe(pd.DataFrame(positions))
 else:
@@ -35,18 +94,17 @@ else:
 # --- Strategy Performance Leaderboard ---
 st.header("Strategy Performance Leaderboard")
 leaderboard = []
-for file in glob.glob(os.path.join("logs", "backtest_*.csv")):
-    df = pd.read_csv(file)
-    if not df.empty:
-        strat = file.split("backtest_")[1].replace(".csv", "")
-        # Prefer PnL column if present, else simple price diff fallback
-        if 'pnl' in df.columns:
-            pnl_val = df['pnl'].sum()
-        elif 'price' in df.columns:
-            pnl_val = df['price'].diff().sum()
-        else:
-            pnl_val = 0
-        leaderboard.append({"Strategy": strat, "PnL": pnl_val, "Trades": len(df)})
+backtest_summary = read_summary(os.path.join("logs", "backtest_summary.json"))
+for row in backtest_summary or []:
+    leaderboard.append({"Strategy": f"{row['symbol']}_{row['strategy']}", "PnL": row['pnl'], "Trades": row['trades'],
+                        "Win Rate": row['win_rate'], "Max Drawdown": row['max_drawdown'],
+                        "Sharpe": row.get('sharpe'), "Max DD %": row.get('max_drawdown_pct')})
+# Fall back to per-file CSV summaries when no pre-aggregated table exists
+for file in ([] if backtest_summary is not None else glob.glob(os.path.join("logs", "backtest_*.csv"))):
+    st_info = os.stat(file)
+    row = summarize_backtest_csv(file, st_info.st_mtime, st_info.st_size)
+    if row:
+        leaderboard.append(row)
 if leaderboard:
     st.dataframe(pd.DataFrame(leaderboard).sort_values("PnL", ascending=False))
 else:
@@ -55,36 +113,59 @@ else:
 # --- Live Signal Feed ---
 st.header("Live Signal Feed")
 signals_file = os.path.join("logs", "signals.json")
-if os.path.exists(signals_file):
-    with open(signals_file) as f:
-        signals = [json.loads(line) for line in f if line.strip()]
-    if signals:
-        st.dataframe(pd.DataFrame(signals))
-    else:
-        st.info("No signals yet.")
+max_signals = st.number_input("Recent signals to show", min_value=10, max_value=20000, value=200, step=50)
+# Indexed event store when the engine runs with --event-store, else tail the JSONL log. Auto only trusts
+# logs/events.db when it is as new as the JSONL logs, so a store left by an earlier run is not shown
+events_db = os.path.join("logs", "events.db")
+event_source = st.sidebar.selectbox("Event source", ["Auto", "Event store (logs/events.db)", "JSONL logs"])
+if event_source == "Auto":
+    use_store = is_current(events_db, [os.path.join("logs", f) for f in ("signals.json", "trades.json", "positions.json")])
+else:
+    use_store = event_source.startswith("Event store") and os.path.exists(events_db)
+    if event_source.startswith("Event store") and not use_store:
+        st.sidebar.warning("logs/events.db not found; reading the JSONL logs.")
+event_store = get_event_store(events_db) if use_store else None
+if event_store is not None:
+    signals = event_store.signals(limit=int(max_signals))
+else:
+    signals_tail = get_log_tail(signals_file, 20000)
+    signals_tail.poll()
+    signals = signals_tail.records(int(max_signals))
+if signals:
+    st.dataframe(pd.DataFrame(signals[::-1]))
 else:
     st.info("No signals yet.")
 
 # --- Daily PnL (from trades.json) ---
 st.header("Daily PnL")
 trades_file = os.path.join("logs", "trades.json")
-if os.path.exists(trades_file):
-    with open(trades_file) as f:
-        trades = [json.loads(line) for line in f if line.strip()]
-    if trades:
-        trades_df = pd.DataFrame(trades)
-        if 'date' in trades_df.columns and 'pnl' in trades_df.columns:
-            daily = trades_df.groupby('date', dropna=False)['pnl'].sum().reset_index().sort_values('date')
-            daily['CumPnL'] = daily['pnl'].cumsum()
-            st.subheader("By Day")
-            st.dataframe(daily)
-            st.metric("Total PnL", f"{daily['pnl'].sum():.2f}")
-        else:
-            st.info("Trades found but missing 'date' or 'pnl' fields.")
+trades_tail, daily_pnl = get_trades_tail(trades_file, 100000)
+pnl_summary = read_summary(os.path.join("logs", "pnl_summary.json"))
+if pnl_summary and pnl_summary.get('day'):
+    # O(days) read of the per-day table maintained on each trade write
+    daily = pd.DataFrame([{'date': d, **b} for d, b in pnl_summary['day'].items()]).sort_values('date')
+    daily = daily[['date', 'pnl', 'trades', 'win_rate', 'max_drawdown']]
+    daily['CumPnL'] = daily['pnl'].cumsum()
+    st.subheader("By Day")
+    st.dataframe(daily)
+    st.metric("Total PnL", f"{pnl_summary['total']['pnl']:.2f}")
+    st.subheader("By Strategy")
+    st.dataframe(pd.DataFrame.from_dict(pnl_summary['strategy'], orient='index'))
+    st.subheader("By Symbol")
+    st.dataframe(pd.DataFrame.from_dict(pnl_summary['symbol'], orient='index'))
+else:
+    # No summary yet (e.g. older logs): fold the trade log incrementally
+    trades_tail.poll()
+    if daily_pnl:
+        daily = pd.DataFrame(sorted(daily_pnl.items(), key=lambda kv: str(kv[0])), columns=['date', 'pnl'])
+        daily['CumPnL'] = daily['pnl'].cumsum()
+        st.subheader("By Day")
+        st.dataframe(daily)
+        st.metric("Total PnL", f"{daily['pnl'].sum():.2f}")
+    elif trades_tail.total:
+        st.info("Trades found but missing 'date' or 'pnl' fields.")
     else:
         st.info("No trades yet.")
-else:
-    st.info("No trades yet.")
 
 # --- Control Panel ---
 st.header("Control Panel")
@@ -101,10 +182,12 @@ st.header("Ask Anything (Natural Language Query)")
 user_query = st.text_input("Ask about trades, PnL, win rate, etc.")
 if user_query:
     from core.nlp_query import query_trades_nlp
-    trades_file = os.path.join("logs", "trades.json")
-    trade_logs = []
-    if os.path.exists(trades_file):
-        with open(trades_file) as f:
-            trade_logs = [json.loads(line) for line in f if line.strip()]
-    response = query_trades_nlp(user_query, trade_logs)
+    if event_store is not None:
+        response = query_trades_nlp(user_query, store=event_store)
+    elif pnl_summary:
+        response = query_trades_nlp(user_query, summary=pnl_summary)
+    else:
+        # Reuse the tailed trades (most recent window) instead of re-reading the file
+        trades_tail.poll()
+        response = query_trades_nlp(user_query, trades_tail.records())
     st.write(response)
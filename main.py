@@ -5,19 +5,18 @@ Includes fail-safe, auto-resume, and logging.
 import os
 import sys
 import traceback
-import pandas as pd
-from utils.logger import log_trade_json, log_signal_json, log_position_json, log_positions_state
-from dotenv import load_dotenv
-
 import argparse
+from utils.env import load_env
+from utils.logger import log_trade_json, log_signal_json, log_position_json, configure_buffered_logging, shutdown_logging, configure_event_store
+from utils.position_store import PositionStore
 from core.strategy_engine import StrategyEngine
-from core.live_engine import LiveEngine
-from utils.alert import send_telegram_alert, send_pushbullet_alert
 from core.risk import RiskEngine
-load_dotenv()
+# pandas/numpy, the broker stack and alert senders (requests) are imported where
+# they are used so --status and --strategies start quickly
 
 def load_mock_ohlcv(n=200):
     """Create a simple mock OHLCV DataFrame for demonstration/paper loop."""
+    import pandas as pd
     # Simple synthetic series
     idx = list(range(n))
     close = [100 + i*0.1 + (1 if i % 10 == 0 else 0) for i in idx]
@@ -29,6 +28,7 @@ def load_mock_ohlcv(n=200):
 
 def load_csv_ohlcv(path):
     """Load OHLCV data from a CSV file. Expects columns: open,high,low,close[,volume][,date]."""
+    import pandas as pd
     if not os.path.exists(path):
         raise FileNotFoundError(f"CSV not found: {path}")
     df = pd.read_csv(path)
@@ -47,6 +47,55 @@ def load_csv_ohlcv(path):
     return df[['open','high','low','close'] + ([ 'volume' ] if 'volume' in df.columns else [])]
 
 
+def run_event_engine(args, strat_engine, live_engine, risk_engine, position_store):
+    """Trade several symbols at once through the sharded EventEngine (--symbols)."""
+    from core.event_engine import EventEngine, BarEvent
+    from utils.ohlcv_store import OHLCVStore
+    from utils.alert import dispatch_alert
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    store = OHLCVStore(args.data_store) if args.data_store else None
+    stored = set(store.symbols()) if store else set()
+    frames = {}
+    for sym in symbols:
+        if sym in stored:
+            frames[sym] = store.load(sym)
+        else:
+            print(f"[DATA] No stored bars for {sym}, using mock data")
+            frames[sym] = load_mock_ohlcv(n=200)
+    classes = {name: strat_engine.get_strategy_class(name) for name in strat_engine.list_strategies()}
+    paper = live_engine.paper_mode
+    # Paper orders are booked from PaperBroker fills, as in the single-symbol loop
+    engine = EventEngine(lambda sym: {name: cls() for name, cls in classes.items() if cls is not None}, risk_engine,
+                         order_fn=live_engine.place_order, capital=live_engine.capital, workers=args.workers,
+                         position_store=position_store, alert_fn=dispatch_alert, book_fills=paper)
+    # Stored symbols may lack some columns (e.g. no volume); pass on whichever OHLCV fields exist
+    columns = {sym: df[[c for c in ('open', 'high', 'low', 'close', 'volume') if c in df]].to_dict('records')
+               for sym, df in frames.items()}
+    print(f"[ENGINE] Event engine: {len(symbols)} symbols on {engine.n_workers} workers")
+    engine.start()
+    # Interleave symbols bar by bar, as a live feed would deliver them
+    for k in range(max((len(bars) for bars in columns.values()), default=0)):
+        if engine.halted:
+            print("[RISK] Circuit breaker active. Halting event feed.")
+            break
+        for sym, bars in columns.items():
+            if k < len(bars):
+                # Paper orders from earlier bars fill first (bars are taken as one minute apart)
+                fills = live_engine.on_bar(sym, bars[k], ts=k * 60.0)
+                engine.submit(BarEvent(sym, bars[k], i=k, fills=fills))
+        if paper:
+            # Orders placed on this bar must reach the paper broker before the next bar is matched
+            engine.drain()
+    engine.stop()
+    # Cancel orders still working and close any open position at the symbol's last price
+    engine.close_all(cancel_fn=live_engine.cancel_order)
+    stats = engine.stats()
+    print(f"[ENGINE] {stats['events']} bar events in {stats['wall_seconds']:.2f}s ({stats['events_per_sec']:.0f}/s), "
+          f"mean latency {stats['latency_mean'] * 1000:.2f}ms, max {stats['latency_max'] * 1000:.1f}ms")
+    for stage, s in stats['stages'].items():
+        print(f"[ENGINE]   {stage:6s} {s['count']:>8d} ops  {s['busy_seconds']:.3f}s busy  {s['per_sec']:.0f}/s")
+
+
 def main():
     parser = argparse.ArgumentParser(description="ProjectTrade CLI")
     parser.add_argument('--paper', action='store_true', help='Run in paper trading mode')
@@ -55,9 +104,15 @@ def main():
     parser.add_argument('--strategies', action='store_true', help='List available strategies')
     parser.add_argument('--start', action='store_true', help='Start trading loop')
     parser.add_argument('--data-csv', type=str, help='Path to OHLCV CSV file to drive paper trading')
+    parser.add_argument('--data-store', type=str, help='Columnar OHLCV store directory (imports --data-csv once, then memory-maps it)')
+    parser.add_argument('--event-store', type=str, help='Also record trades/signals/positions in this SQLite event store (e.g. logs/events.db)')
+    parser.add_argument('--symbols', type=str, help='Comma-separated symbols to trade together through the event engine (with --start)')
+    parser.add_argument('--workers', type=int, default=4, help='Event engine worker threads (with --symbols)')
     parser.add_argument('--risk-reset', action='store_true', help='Reset daily risk state and clear circuit breaker')
     args = parser.parse_args()
+    load_env()
 
+    risk_engine = None
     try:
         print("[INIT] ProjectTrade system booting...")
         # Discover and list strategies
@@ -71,9 +126,11 @@ def main():
             return
 
         # Init live engine and authenticate broker
+        from core.live_engine import LiveEngine
         paper_mode = args.paper or not args.live
-        live_engine = LiveEngine(paper_mode=paper_mode)
-        risk_engine = RiskEngine()
+        # Fills and losses are journaled between full state snapshots
+        risk_engine = RiskEngine(journal_path=os.path.join('logs', 'risk_journal.jsonl'))
+        live_engine = LiveEngine(paper_mode=paper_mode, risk_engine=risk_engine)
         # Load persisted risk state unless reset
         if args.risk_reset:
             risk_engine.reset_daily()
@@ -85,6 +142,7 @@ def main():
 
         if not live_engine.authenticate():
             print("[ERROR] Broker authentication failed!")
+            from utils.alert import send_telegram_alert
             send_telegram_alert("ProjectTrade: Broker authentication failed!")
             sys.exit(1)
         print(f"[INFO] Broker authenticated. Paper mode: {paper_mode}")
@@ -101,86 +159,183 @@ def main():
         # Start trading loop
         if args.start:
             print("[ENGINE] Starting paper trading loop...")
+            from strategies.base import BUY, SELL, SIGNAL_LABELS, get_signal_array, get_warmup
+            from utils.alert import dispatch_alert
+            from utils.indicator_cache import default_cache
+            from utils.ohlcv_store import OHLCVStore
+            from utils.bar_feed import CSVFeed, DataFrameFeed, StoreFeed
+            # Batch per-bar signal/trade logging off the trading thread
+            configure_buffered_logging(fsync_every=int(os.getenv('LOG_FSYNC_EVERY', 0)))
+            if args.event_store:
+                configure_event_store(args.event_store)
+            # Incremental open-positions state for the dashboard, starting from this run's book
+            position_store = PositionStore()
+            position_store.reset(live_engine.positions)
+            # Exposure follows the book this run trades from, so fills left by an interrupted run are dropped
+            if risk_engine.rebuild_exposure(live_engine.positions):
+                print("[RISK] Exposure rebuilt from open positions.")
+            if args.symbols:
+                run_event_engine(args, strat_engine, live_engine, risk_engine, position_store)
+                print("[ENGINE] Paper trading loop complete.")
+                risk_engine.save_state()
+                position_store.close_store()
+                shutdown_logging()
+                return
             symbol = os.getenv('SYMBOL', 'DEMO')
+            chunksize = int(os.getenv('FEED_CHUNKSIZE', 10000))
             try:
-                if args.data_csv:
-                    print(f"[DATA] Loading OHLCV from CSV: {args.data_csv}")
-                    df = load_csv_ohlcv(args.data_csv)
+                # Stream bars in chunks so memory stays bounded regardless of file size
+                if args.data_store:
+                    store = OHLCVStore(args.data_store)
+                    if args.data_csv:
+                        print(f"[DATA] Streaming OHLCV from CSV via store: {args.data_csv}")
+                        feed = StoreFeed(store, store.ensure_csv(args.data_csv), chunksize=chunksize)
+                    else:
+                        print(f"[DATA] Streaming OHLCV for {symbol} from store: {args.data_store}")
+                        feed = StoreFeed(store, symbol, chunksize=chunksize)
+                elif args.data_csv:
+                    print(f"[DATA] Streaming OHLCV from CSV: {args.data_csv}")
+                    feed = CSVFeed(args.data_csv, chunksize=chunksize)
                 else:
-                    df = load_mock_ohlcv(n=200)
+                    feed = DataFrameFeed(load_mock_ohlcv(n=200), chunksize=chunksize, source=(symbol, 'mock'))
             except Exception as e:
                 print(f"[DATA] Failed to load CSV, falling back to mock data: {e}")
-                df = load_mock_ohlcv(n=200)
-            for strat_name in strat_engine.list_strategies():
-                strat = strat_engine.get_strategy(strat_name)
+                feed = DataFrameFeed(load_mock_ohlcv(n=200), chunksize=chunksize, source=(symbol, 'mock'))
+            strategies = {name: strat_engine.get_strategy(name) for name in strat_engine.list_strategies()}
+            for strat_name in strategies:
                 print(f"[STRATEGY] Running {strat_name} on {symbol}")
-                signals = strat.generate_signals(df)
-                position_open = False
-                entry_price = None
-                qty = 1
-                for i, sig in enumerate(signals):
+            # Each chunk arrives with enough history for the most demanding strategy
+            warmup = max([get_warmup(s) for s in strategies.values()], default=0)
+            open_positions = {}  # strategy name -> open position dict
+            working = {}  # strategy name -> paper order id still waiting for fills
+            qty = 1
+            price = None
+            i = -1
+            halted = False
+
+            def book_fill(fill, i):
+                """Apply a fill to the strategy's position, exposure, logs and daily loss."""
+                strat_name = fill['strategy']
+                if fill.get('status') == 'FILLED':
+                    working.pop(strat_name, None)
+                fill_qty, fill_px = fill['qty'], float(fill['price'])
+                position = open_positions.get(strat_name)
+                if fill['side'] == 'BUY':
+                    risk_engine.record_fill(symbol, strat_name, fill_qty * fill_px)
+                    if position is None:
+                        position = {'symbol': symbol, 'qty': fill_qty, 'side': 'LONG', 'entry': fill_px, 'strategy': strat_name, 'i': i}
+                        live_engine.positions.append(position)
+                        log_position_json(position)
+                        # Persist current open positions state for dashboard
+                        position['id'] = position_store.open(position)
+                        open_positions[strat_name] = position
+                    else:
+                        # Partial fills add to the position at a volume-weighted entry
+                        total = position['qty'] + fill_qty
+                        position['entry'] = (position['entry'] * position['qty'] + fill_px * fill_qty) / total
+                        position['qty'] = total
+                        position_store.update(position['id'], qty=total, entry=position['entry'])
+                    return
+                if position is None:
+                    return
+                pnl = (fill_px - position['entry']) * fill_qty
+                risk_engine.record_fill(symbol, strat_name, -fill_qty * position['entry'])
+                # Record position close
+                log_trade_json({'symbol': symbol, 'qty': fill_qty, 'entry': position['entry'], 'exit': fill_px, 'pnl': pnl, 'strategy': strat_name, 'i': i, 'paper': paper_mode})
+                # Update risk with losses; trigger circuit breaker if needed
+                if pnl < 0:
+                    ok, msg = risk_engine.update_daily_loss(abs(pnl), live_engine.capital)
+                    if not ok:
+                        live_engine.circuit_breaker = True
+                        print(f"[RISK] {msg}")
+                        dispatch_alert(f"ProjectTrade [{symbol}] {msg}")
+                position['qty'] -= fill_qty
+                if position['qty'] > 0:
+                    position_store.update(position['id'], qty=position['qty'])
+                    return
+                # Remove the open position record and update positions state
+                live_engine.positions.remove(position)
+                position_store.close(position['id'])
+                del open_positions[strat_name]
+
+            def submit(strat_name, side, order_qty, i):
+                """Place a market order; paper orders fill on later bars, live acks are booked at the signal price."""
+                ack = live_engine.place_order(symbol, order_qty, side, 'MARKET', price=price, strategy=strat_name)
+                if ack is None or ack.get('status') == 'REJECTED':
+                    return
+                if paper_mode:
+                    working[strat_name] = ack['order_id']
+                else:
+                    book_fill({'side': side, 'qty': order_qty, 'price': price, 'strategy': strat_name, 'status': 'FILLED'}, i)
+
+            for window, n_new in feed.windows(warmup):
+                bar_cols = {c: window[c].to_numpy(dtype=float)[-n_new:] for c in ('open', 'high', 'low', 'close', 'volume') if c in window}
+                closes = bar_cols['close']
+                bar_ids = window.index[-n_new:]
+                signals = {name: get_signal_array(strat, window)[-n_new:] for name, strat in strategies.items()}
+                for k in range(n_new):
                     if live_engine.circuit_breaker or risk_engine.circuit_breaker:
                         print("[RISK] Circuit breaker active. Halting strategy loop.")
+                        halted = True
                         break
-                    price = float(df['close'].iloc[i])
-                    # Log signal for dashboard
-                    log_signal_json({
-                        'i': int(i),
-                        'symbol': symbol,
-                        'strategy': strat_name,
-                        'signal': str(sig),
-                        'price': price
-                    })
-                    if sig == 'BUY' and not position_open:
-                        # Risk check before entering
-                        ok, msg = risk_engine.check_trade(live_engine.capital, qty * price, 0)
-                        if not ok:
-                            print(f"[RISK] Trade blocked: {msg}")
+                    i = int(bar_ids[k])
+                    price = float(closes[k])
+                    # Paper orders placed on earlier bars fill against this one
+                    for fill in live_engine.on_bar(symbol, {c: float(v[k]) for c, v in bar_cols.items()}):
+                        book_fill(fill, i)
+                    for strat_name, strat_signals in signals.items():
+                        sig = strat_signals[k]
+                        position = open_positions.get(strat_name)
+                        # Log signal for dashboard
+                        log_signal_json({
+                            'i': i,
+                            'symbol': symbol,
+                            'strategy': strat_name,
+                            'signal': SIGNAL_LABELS[int(sig)],
+                            'price': price
+                        })
+                        if strat_name in working:
                             continue
-                        trade = live_engine.place_order(symbol, qty, 'BUY', 'MARKET', price=price)
-                        entry_price = price
-                        position_open = True
-                        live_engine.positions.append({'symbol': symbol, 'qty': qty, 'side': 'LONG', 'entry': entry_price, 'strategy': strat_name, 'i': int(i)})
-                        log_position_json(live_engine.positions[-1])
-                        # Persist current open positions state for dashboard
-                        log_positions_state(live_engine.positions)
-                    elif sig == 'SELL' and position_open:
-                        trade = live_engine.place_order(symbol, qty, 'SELL', 'MARKET', price=price)
-                        pnl = (price - entry_price) * qty
-                        position_open = False
-                        # Record position close
-                        log_trade_json({'symbol': symbol, 'qty': qty, 'entry': entry_price, 'exit': price, 'pnl': pnl, 'strategy': strat_name, 'i': int(i), 'paper': True})
-                        # Update risk with losses; trigger circuit breaker if needed
-                        if pnl < 0:
-                            ok, msg = risk_engine.update_daily_loss(abs(pnl), live_engine.capital)
+                        if sig == BUY and position is None:
+                            # Risk check before entering
+                            ok, msg = risk_engine.check_trade(live_engine.capital, qty * price, 0, symbol, strat_name)
                             if not ok:
-                                live_engine.circuit_breaker = True
-                                print(f"[RISK] {msg}")
-                        # Remove last open position record (simple single-position demo) and update positions state
-                        if live_engine.positions:
-                            live_engine.positions.pop()
-                        log_positions_state(live_engine.positions)
-                # Close any open position at last price
-                if position_open:
-                    price = float(df['close'].iloc[-1])
-                    trade = live_engine.place_order(symbol, qty, 'SELL', 'MARKET', price=price)
-                    pnl = (price - entry_price) * qty
-                    log_trade_json({'symbol': symbol, 'qty': qty, 'entry': entry_price, 'exit': price, 'pnl': pnl, 'strategy': strat_name, 'i': int(len(df)-1), 'paper': True})
-                    # Update positions state on forced close
-                    if live_engine.positions:
-                        live_engine.positions.pop()
-                    log_positions_state(live_engine.positions)
+                                print(f"[RISK] Trade blocked: {msg}")
+                                continue
+                            submit(strat_name, 'BUY', qty, i)
+                        elif sig == SELL and position is not None:
+                            submit(strat_name, 'SELL', position['qty'], i)
+                if halted:
+                    break
+            # Orders still working have no later bar to fill against
+            for order_id in list(working.values()):
+                live_engine.cancel_order(order_id)
+            working.clear()
+            # Close any open position at last price
+            for strat_name, position in list(open_positions.items()):
+                if not paper_mode:
+                    live_engine.place_order(symbol, position['qty'], 'SELL', 'MARKET', price=price)
+                book_fill({'side': 'SELL', 'qty': position['qty'], 'price': price, 'strategy': strat_name, 'status': 'FILLED'}, i)
             print("[ENGINE] Paper trading loop complete.")
+            print(f"[CACHE] Indicator cache: {default_cache.stats()}")
             # Persist risk state at end of run
             risk_engine.save_state()
             # Final positions state write
-            log_positions_state(live_engine.positions)
+            position_store.close_store()
+            shutdown_logging()
             return
 
         print("[INFO] Use --help for CLI options.")
-    except Exception as e:
-        print(f"Fatal error: {e}")
-        log_trade_json({"error": str(e), "traceback": traceback.format_exc()})
+    except (Exception, KeyboardInterrupt) as e:
+        print(f"Fatal error: {e!r}")
+        log_trade_json({"error": repr(e), "traceback": traceback.format_exc()})
+        if risk_engine is not None:
+            try:
+                risk_engine.save_state()
+            except Exception as save_error:
+                print(f"[RISK] Failed to save risk state: {save_error}")
+        shutdown_logging()
+        from utils.alert import send_pushbullet_alert
         send_pushbullet_alert(f"ProjectTrade Fatal Error: {e}")
         sys.exit(1)
 
@@ -1,6 +1,8 @@
 """
-LSTM Model for price prediction (placeholder)
+LSTM Model for price prediction
 """
+from typing import Optional, Tuple
+import numpy as np
 import torch
 import torch.nn as nn
 from .base import ModelBase
@@ -12,17 +14,34 @@ class LSTMModel(ModelBase, nn.Module):
         self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
         self.fc = nn.Linear(hidden_size, output_size)
 
-    def forward(self, x):
-        h_0 = torch.zeros(self.lstm.num_layers, x.size(0), self.lstm.hidden_size)
-        c_0 = torch.zeros(self.lstm.num_layers, x.size(0), self.lstm.hidden_size)
-        out, _ = self.lstm(x, (h_0, c_0))
+    def forward(self, x, state: Optional[Tuple[torch.Tensor, torch.Tensor]] = None):
+        # Callers scoring repeatedly pass a reused zero state (see models.lstm_inference)
+        if state is None:
+            h_0 = x.new_zeros(self.lstm.num_layers, x.size(0), self.lstm.hidden_size)
+            state = (h_0, h_0)
+        out, _ = self.lstm(x, state)
         out = self.fc(out[:, -1, :])
         return out
 
-    def train(self, X, y):
+    def train(self, X=True, y=None):
+        # nn.Module.eval() calls train(False); keep that working
+        if y is None and isinstance(X, bool):
+            return nn.Module.train(self, X)
         # Placeholder: implement training loop
         pass
 
-    def predict(self, X):
-        # Placeholder: implement prediction
-        pass
+    def predict(self, X, batch_size=1024):
+        """Outputs for inputs of shape (batch, seq, input_size), or (batch, seq) when input_size is 1."""
+        x = torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32))
+        if x.dim() == 2:
+            x = x.unsqueeze(-1)
+        was_training = self.training
+        self.eval()
+        try:
+            with torch.inference_mode():
+                outs = [self(x[lo:lo + batch_size]) for lo in range(0, len(x), batch_size)]
+        finally:
+            nn.Module.train(self, was_training)
+        if not outs:
+            return np.empty((0, self.fc.out_features), dtype=np.float32)
+        return torch.cat(outs).numpy()
@@ -0,0 +1,221 @@
+"""
+CPU inference for LSTMModel: strided sliding windows, batched scoring across symbols, TorchScript export, micro-batching
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import torch
+
+META_FILE = 'lstm_meta.json'
+_STOP = object()
+
+
+def sliding_windows(prices, window, step=1):
+    """Every step-th length-window slice of prices as an (n_windows, window) strided view; nothing is copied."""
+    return sliding_window_view(np.asarray(prices), window)[::step]
+
+
+def set_threads(intra_op=None, inter_op=None):
+    """Pin torch's CPU thread pools (intra-op: per operator; inter-op: can only be set before first use)."""
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            print(f"[MODEL] Could not set inter-op threads: {e}")
+
+
+def export_torchscript(model, path, window, example_batch=8):
+    """Trace and freeze an LSTMModel to a TorchScript file that loads without the Python class.
+
+    The traced forward takes (x, (h_0, c_0)); batch size and sequence length
+    stay dynamic. Window and layer sizes are stored alongside for LSTMPredictor.load.
+    """
+    model.eval()
+    lstm = model.lstm
+    x = torch.zeros(example_batch, window, lstm.input_size)
+    h = torch.zeros(lstm.num_layers, example_batch, lstm.hidden_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, (x, (h, h)))
+    frozen = torch.jit.freeze(traced)
+    meta = {'window': window, 'input_size': lstm.input_size, 'hidden_size': lstm.hidden_size,
+            'num_layers': lstm.num_layers, 'output_size': model.fc.out_features}
+    torch.jit.save(frozen, path, _extra_files={META_FILE: json.dumps(meta)})
+    return path
+
+
+def load_torchscript(path):
+    """(module, meta) for a file written by export_torchscript, mapped to CPU."""
+    extra = {META_FILE: ''}
+    module = torch.jit.load(path, map_location='cpu', _extra_files=extra)
+    meta = json.loads(extra[META_FILE] or '{}')
+    return module.eval(), meta
+
+
+class LSTMPredictor:
+    """Batched CPU scoring of price windows with an LSTMModel or its TorchScript export.
+
+    Windows are normalized (price / last price - 1) and cast to float32 straight
+    into a reused input buffer, which torch reads without another copy; the zero
+    initial state is allocated once per batch size. Everything runs under
+    torch.inference_mode. Not thread-safe: share one through MicroBatcher.
+    """
+    def __init__(self, model, window=60, num_layers=None, hidden_size=None, normalize=True, batch_size=1024,
+                 threads=None, **export_meta):
+        # export_meta: remaining keys from export_torchscript metadata (input/output sizes), unused here
+        if threads:
+            set_threads(threads)
+        self.model = model.eval()
+        self.window = int(window)
+        self.num_layers = num_layers or model.lstm.num_layers
+        self.hidden_size = hidden_size or model.lstm.hidden_size
+        self.normalize = normalize
+        self.batch_size = int(batch_size)
+        self._inputs = None
+        self._states = {}
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Predictor over a TorchScript export, sized from its stored metadata."""
+        module, meta = load_torchscript(path)
+        return cls(module, **{**meta, **kwargs})
+
+    def _rows(self, n):
+        if self._inputs is None:
+            self._inputs = np.empty((self.batch_size, self.window, 1), dtype=np.float32)
+        return self._inputs[:n, :, 0]
+
+    def _state(self, n):
+        state = self._states.get(n)
+        if state is None:
+            if len(self._states) >= 16:
+                self._states.clear()
+            # The LSTM never writes to its initial state, so one zero tensor serves as h_0 and c_0
+            h = torch.zeros(self.num_layers, n, self.hidden_size)
+            state = self._states[n] = (h, h)
+        return state
+
+    def _score(self, windows):
+        n = len(windows)
+        rows = self._rows(n)
+        if self.normalize:
+            np.divide(windows, windows[:, -1:], out=rows, casting='unsafe')
+            rows -= 1.0
+        else:
+            rows[...] = windows
+        with torch.inference_mode():
+            out = self.model(torch.from_numpy(self._inputs[:n]), self._state(n))
+        return out.numpy()
+
+    def predict_windows(self, windows):
+        """Outputs (n_windows, output_size) for an (n_windows, window) array, e.g. sliding_windows(prices, window)."""
+        windows = np.asarray(windows)
+        if windows.ndim != 2 or windows.shape[1] != self.window:
+            raise ValueError(f"expected windows of shape (n, {self.window}), got {windows.shape}")
+        outs = [self._score(windows[lo:lo + self.batch_size]) for lo in range(0, len(windows), self.batch_size)]
+        if not outs:
+            return np.empty((0, 0), dtype=np.float32)
+        return outs[0] if len(outs) == 1 else np.concatenate(outs)
+
+    def predict_series(self, prices, step=1):
+        """Outputs for every step-th window of one price series (aligned to each window's last bar)."""
+        return self.predict_windows(sliding_windows(prices, self.window, step))
+
+    def predict_latest(self, prices_by_symbol):
+        """Score the latest window of many symbols in one forward pass per batch_size symbols.
+
+        prices_by_symbol maps symbol -> price array; symbols with fewer than
+        window prices are skipped. Returns {symbol: output}, a float when the
+        model has a single output.
+        """
+        symbols = [s for s, p in prices_by_symbol.items() if len(p) >= self.window]
+        if not symbols:
+            return {}
+        windows = np.stack([np.asarray(prices_by_symbol[s])[-self.window:] for s in symbols])
+        out = self.predict_windows(windows)
+        if out.shape[1] == 1:
+            return dict(zip(symbols, out[:, 0].tolist()))
+        return dict(zip(symbols, out))
+
+
+class MicroBatcher:
+    """Coalesces single-window requests from many threads into batched forward passes.
+
+    submit(window) returns a Future resolving to that window's output. The
+    worker thread takes up to max_batch requests, waiting at most max_delay
+    seconds after the first, so when every symbol's bar closes at once the model
+    sees one large batch rather than hundreds of size-1 calls.
+    """
+    def __init__(self, predictor, max_batch=512, max_delay=0.002):
+        self.predictor = predictor
+        self.max_batch = int(max_batch)
+        self.max_delay = float(max_delay)
+        self.stats = {'requests': 0, 'batches': 0, 'errors': 0}
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lstm-microbatch", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, window):
+        """Queue one window (the last `window` prices of a symbol); returns a Future of its output row."""
+        if self._thread is None:
+            self.start()
+        window = np.asarray(window)[-self.predictor.window:]
+        # A short window would fail the whole batch it lands in
+        if len(window) < self.predictor.window:
+            raise ValueError(f"need {self.predictor.window} prices, got {len(window)}")
+        future = Future()
+        self._queue.put((window, future))
+        return future
+
+    def stop(self, timeout=None):
+        """Score everything queued, then stop the worker."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        q = self._queue
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._score(batch)
+            if stopping:
+                return
+
+    def _score(self, batch):
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        try:
+            out = self.predictor.predict_windows(np.stack([w for w, _ in batch]))
+        except Exception as e:
+            self.stats['errors'] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), row in zip(batch, out):
+            future.set_result(row)
@@ -2,16 +2,80 @@
 Base Strategy class for plug-and-play modular strategies.
 """
 from abc import ABC, abstractmethod
+import numpy as np
+
+# Columnar signal codes (int8): +1 BUY, -1 SELL, 0 HOLD
+BUY = 1
+SELL = -1
+HOLD = 0
+SIGNAL_LABELS = {BUY: 'BUY', SELL: 'SELL', HOLD: 'HOLD'}
+
+
+def signals_to_array(signals):
+    """Convert legacy 'BUY'/'SELL'/'HOLD' signals (or numeric codes) to an int8 array."""
+    arr = np.asarray(signals)
+    if arr.dtype.kind in 'iuf':
+        return np.sign(np.nan_to_num(arr)).astype(np.int8)
+    arr = arr.astype(str)
+    return np.where(arr == 'BUY', BUY, np.where(arr == 'SELL', SELL, HOLD)).astype(np.int8)
+
+
+def array_to_signals(codes, index=None):
+    """Convert int8 signal codes back to a Series of 'BUY'/'SELL'/'HOLD' labels."""
+    import pandas as pd
+    labels = np.array(['SELL', 'HOLD', 'BUY'], dtype=object)
+    return pd.Series(labels[np.asarray(codes, dtype=np.int64) + 1], index=index, name='signal')
+
+
+def get_warmup(strategy):
+    """Bars of history a strategy needs before the bars it is asked to signal on."""
+    return int(getattr(strategy, 'warmup', 0) or 0)
+
+
+def get_signal_array(strategy, market_data):
+    """Adapter: int8 signals from any strategy, vectorized or legacy string-returning."""
+    if isinstance(strategy, StrategyBase):
+        return strategy.generate_signal_array(market_data)
+    return signals_to_array(strategy.generate_signals(market_data))
+
 
 class StrategyBase(ABC):
-    """Abstract base for all trading strategies."""
+    """Abstract base for all trading strategies.
+
+    Subclasses implement either generate_signal_array() (vectorized contract,
+    returns an int8 array of -1/0/+1 aligned with the input bars) or the legacy
+    generate_signals() (Series of 'BUY'/'SELL'/'HOLD'); the other is derived.
+    A subclass implementing neither raises TypeError when it is defined, unless it
+    declares abstract methods of its own (an intermediate base).
+    """
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Neither signal method can be abstract on its own, so the either/or rule is checked here
+        if (cls.generate_signals is StrategyBase.generate_signals
+                and cls.generate_signal_array is StrategyBase.generate_signal_array
+                and not any(getattr(v, '__isabstractmethod__', False) for v in vars(cls).values())):
+            raise TypeError(f"{cls.__name__} must implement generate_signals or generate_signal_array")
+
     def __init__(self, config=None):
         self.config = config or {}
 
-    @abstractmethod
     def generate_signals(self, market_data):
         """Generate trading signals based on market data."""
-        pass
+        return array_to_signals(self.generate_signal_array(market_data), getattr(market_data, 'index', None))
+
+    def generate_signal_array(self, market_data):
+        """Generate int8 signal codes (BUY=+1, SELL=-1, HOLD=0) based on market data."""
+        return signals_to_array(self.generate_signals(market_data))
+
+    @property
+    def warmup(self):
+        """Bars of history needed to signal on a new bar when data is streamed in chunks."""
+        return int(self.config.get('warmup', 0))
+
+    def indicator(self, market_data, name, column='close', **params):
+        """Indicator values from the shared cache, e.g. self.indicator(df, 'sma', period=20)."""
+        from utils.indicator_cache import default_cache
+        return default_cache.get(market_data, name, column=column, **params)
 
     @abstractmethod
     def on_trade(self, trade_data):
@@ -2,27 +2,24 @@
 Example Momentum Strategy Module
 """
 from .base import StrategyBase
-import pandas as pd
+import numpy as np
 
 class MomentumStrategy(StrategyBase):
-    def generate_signals(self, market_data):
+    def generate_signal_array(self, market_data):
         # Momentum with exits:
-        # BUY when close > close.shift(5), SELL when close < close.shift(5), else HOLD
-        df = pd.DataFrame(market_data).copy()
-        df['close_shift_5'] = df['close'].shift(5)
-        conditions = []
-        for i in range(len(df)):
-            if pd.isna(df['close_shift_5'].iloc[i]):
-                conditions.append('HOLD')
-            else:
-                if df['close'].iloc[i] > df['close_shift_5'].iloc[i]:
-                    conditions.append('BUY')
-                elif df['close'].iloc[i] < df['close_shift_5'].iloc[i]:
-                    conditions.append('SELL')
-                else:
-                    conditions.append('HOLD')
-        df['signal'] = conditions
-        return df['signal']
+        # BUY when close > close.shift(lookback), SELL when close < close.shift(lookback), else HOLD
+        lookback = int(self.config.get('lookback', 5))
+        close = np.asarray(market_data['close'], dtype=np.float64)
+        if lookback <= 0:
+            return np.zeros(len(close), dtype=np.int8)
+        # Lagged close from the shared cache, so strategies on the same frame reuse it
+        past = self.indicator(market_data, 'lag', period=lookback)
+        # Comparisons against NaN are False, so missing history stays HOLD
+        return (close > past).astype(np.int8) - (close < past).astype(np.int8)
+
+    @property
+    def warmup(self):
+        return int(self.config.get('lookback', 5))
 
     def on_trade(self, trade_data):
         # Log or react to trade events
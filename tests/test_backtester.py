@@ -0,0 +1,137 @@
+"""
+Parity tests: Backtester.simulate_vectorized against the per-bar simulate() loop,
+with and without intrabar exit rules
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from core.backtester import Backtester
+
+
+def make_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({'close': close})
+
+
+def make_ohlc(n, seed, with_open=True):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    prev = np.concatenate(([close[0]], close[:-1]))
+    # Occasional large gaps so some bars open beyond a stop or target
+    opens = prev + rng.normal(0, 1, n) * np.where(rng.random(n) < 0.1, 5, 0.5)
+    high = np.maximum(opens, close) + rng.exponential(1, n)
+    low = np.minimum(opens, close) - rng.exponential(1, n)
+    df = pd.DataFrame({'open': opens, 'high': high, 'low': low, 'close': close})
+    return df if with_open else df.drop(columns='open')
+
+
+def random_signals(n, seed, p_trade=0.3):
+    rng = np.random.default_rng(seed)
+    return rng.choice([1, 0, -1], size=n, p=[p_trade / 2, 1 - p_trade, p_trade / 2]).astype(np.int8)
+
+
+class ParityCase(unittest.TestCase):
+    def assert_parity(self, bt, df, signals):
+        loop_equity, loop_trades = bt.simulate(df, signals)
+        vec_equity, vec_trades = bt.simulate_vectorized(df, signals)
+        np.testing.assert_array_equal(np.asarray(loop_equity, dtype=np.float64), vec_equity)
+        self.assertEqual(loop_trades, vec_trades)
+        return loop_trades
+
+
+class SimulateParityTest(ParityCase):
+    def test_randomized_signals_fees_slippage(self):
+        rng = np.random.default_rng(0)
+        for seed in range(50):
+            n = int(rng.integers(1, 400))
+            bt = Backtester({}, None, initial_capital=float(rng.uniform(1e3, 1e6)),
+                            fee_per_trade=float(rng.choice([0.0, rng.uniform(0, 5)])),
+                            slippage_bps=float(rng.choice([0.0, rng.uniform(0, 50)])))
+            with self.subTest(seed=seed, n=n):
+                self.assert_parity(bt, make_bars(n, seed), random_signals(n, seed, p_trade=rng.uniform(0.05, 1.0)))
+
+    def test_legacy_string_signals(self):
+        df = make_bars(200, 1)
+        labels = np.array(['SELL', 'HOLD', 'BUY'], dtype=object)[random_signals(200, 1) + 1]
+        bt = Backtester({}, None, fee_per_trade=1.0, slippage_bps=10.0)
+        self.assert_parity(bt, df, pd.Series(labels))
+
+    def test_edge_cases(self):
+        bt = Backtester({}, None, fee_per_trade=0.5, slippage_bps=5.0)
+        df = make_bars(6, 2)
+        for signals in ([], [0] * 6, [1] * 6, [-1] * 6, [1, 1, -1, -1, 1, 0], [-1, 1, 0, 0, 0, 0]):
+            with self.subTest(signals=signals):
+                sig = np.asarray(signals, dtype=np.int8)
+                self.assert_parity(bt, df.iloc[:len(sig)], sig)
+
+
+EXIT_RULES = (
+    {'stop_loss_pct': 0.02},
+    {'target_pct': 0.03},
+    {'trailing_stop_pct': 0.015},
+    {'stop_loss_pct': 0.02, 'target_pct': 0.04, 'trailing_stop_pct': 0.01},
+)
+
+
+class ExitRuleParityTest(ParityCase):
+    def test_randomized_exit_rules(self):
+        rng = np.random.default_rng(1)
+        for seed in range(40):
+            n = int(rng.integers(1, 400))
+            for with_open in (True, False):
+                for rules in EXIT_RULES:
+                    bt = Backtester({}, None, fee_per_trade=float(rng.uniform(0, 2)),
+                                    slippage_bps=float(rng.uniform(0, 20)), exit_rules=rules)
+                    with self.subTest(seed=seed, n=n, with_open=with_open, rules=rules):
+                        self.assert_parity(bt, make_ohlc(n, seed, with_open), random_signals(n, seed, p_trade=0.2))
+
+    def test_long_holds_span_scan_chunks(self):
+        # Few signals, so positions stay open across several doubling chunks before an exit
+        bt = Backtester({}, None, exit_rules={'trailing_stop_pct': 0.05})
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assert_parity(bt, make_ohlc(2000, seed), random_signals(2000, seed, p_trade=0.005))
+
+    def bars(self, rows, with_open=True):
+        df = pd.DataFrame(rows, columns=['open', 'high', 'low', 'close'], dtype=np.float64)
+        return df if with_open else df.drop(columns='open')
+
+    def test_gap_through_stop_fills_at_open(self):
+        bt = Backtester({}, None, exit_rules={'stop_loss_pct': 0.02, 'target_pct': 0.04})
+        df = self.bars([(100, 100, 100, 100), (90, 91, 89, 90), (90, 90, 90, 90)])
+        trades = self.assert_parity(bt, df, np.array([1, 0, 0], dtype=np.int8))
+        self.assertEqual((trades[1]['price'], trades[1]['reason']), (90.0, 'stop_loss'))
+
+    def test_gap_through_target_fills_at_open(self):
+        bt = Backtester({}, None, exit_rules={'stop_loss_pct': 0.02, 'target_pct': 0.04})
+        df = self.bars([(100, 100, 100, 100), (110, 112, 109, 111), (111, 111, 111, 111)])
+        trades = self.assert_parity(bt, df, np.array([1, 0, 0], dtype=np.int8))
+        self.assertEqual((trades[1]['price'], trades[1]['reason']), (110.0, 'target'))
+
+    def test_gap_through_trailing_stop_fills_at_open(self):
+        bt = Backtester({}, None, exit_rules={'trailing_stop_pct': 0.05})
+        df = self.bars([(100, 100, 100, 100), (101, 120, 101, 118), (100, 101, 99, 100)])
+        trades = self.assert_parity(bt, df, np.array([1, 0, 0], dtype=np.int8))
+        self.assertEqual((trades[1]['price'], trades[1]['reason']), (100.0, 'trailing_stop'))
+
+    def test_stop_and_target_in_same_bar_takes_stop(self):
+        bt = Backtester({}, None, exit_rules={'stop_loss_pct': 0.02, 'target_pct': 0.04})
+        for with_open in (True, False):
+            with self.subTest(with_open=with_open):
+                df = self.bars([(100, 100, 100, 100), (100, 105, 97, 101), (101, 101, 101, 101)], with_open)
+                trades = self.assert_parity(bt, df, np.array([1, 0, 0], dtype=np.int8))
+                self.assertEqual((trades[1]['price'], trades[1]['reason']), (98.0, 'stop_loss'))
+
+    def test_intrabar_exit_then_reentry_on_same_bar(self):
+        bt = Backtester({}, None, fee_per_trade=1.0, exit_rules={'stop_loss_pct': 0.02})
+        for with_open in (True, False):
+            with self.subTest(with_open=with_open):
+                df = self.bars([(100, 100, 100, 100), (99, 99, 95, 96), (96, 97, 95, 97)], with_open)
+                trades = self.assert_parity(bt, df, np.array([1, 1, -1], dtype=np.int8))
+                self.assertEqual([(t['action'], t['index']) for t in trades],
+                                 [('BUY', 0), ('SELL', 1), ('BUY', 1), ('SELL', 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
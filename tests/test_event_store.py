@@ -0,0 +1,63 @@
+"""
+Event store freshness: a store the logger is mirroring into counts as current,
+one left behind by an earlier run does not
+"""
+import os
+import tempfile
+import time
+import unittest
+from utils import logger
+from utils.event_store import EventStore, is_current
+
+
+class IsCurrentTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, 'events.db')
+        self.logs = [os.path.join(self.tmp.name, f) for f in ('signals.json', 'trades.json', 'positions.json')]
+
+    def tearDown(self):
+        logger.configure_event_store(None)
+        logger.shutdown_logging()
+        self.tmp.cleanup()
+
+    def log_signals(self, n):
+        for i in range(n):
+            logger.log_signal_json({'i': i, 'symbol': 'DEMO', 'strategy': 'm', 'signal': 'HOLD', 'price': 1.0},
+                                   out_dir=self.tmp.name)
+
+    def test_missing_store(self):
+        self.assertFalse(is_current(self.db, self.logs))
+
+    def test_mirrored_writes_are_current(self):
+        for buffered in (False, True):
+            with self.subTest(buffered=buffered):
+                if buffered:
+                    logger.configure_buffered_logging()
+                store = logger.configure_event_store(self.db)
+                self.log_signals(50)
+                logger.shutdown_logging()
+                self.assertTrue(is_current(self.db, self.logs))
+                logger.configure_event_store(None)
+                store.close()
+                self.assertTrue(is_current(self.db, self.logs))
+
+    def test_store_from_earlier_run_is_stale(self):
+        store = logger.configure_event_store(self.db)
+        self.log_signals(10)
+        logger.configure_event_store(None)
+        store.close()
+        # mtimes come from a coarse kernel clock; keep the runs apart
+        time.sleep(0.05)
+        self.log_signals(10)
+        # Opening a reader (as the dashboard does) must not make the old store look fresh
+        reader = EventStore(self.db)
+        try:
+            self.assertEqual(len(reader.signals()), 10)
+            self.assertFalse(is_current(self.db, self.logs))
+        finally:
+            reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+http_client retries: idempotent requests retry timeouts and 5xx, others only
+failures before the request was sent
+"""
+import socket
+import unittest
+import requests
+from utils import http_client
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class ScriptedSession:
+    """Stands in for requests.Session, answering each call with the next scripted outcome."""
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return Response(outcome)
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def call(self, method, *outcomes, **kwargs):
+        session = ScriptedSession(*outcomes)
+        try:
+            return http_client.request(method, 'http://test', session=session, backoff=0, **kwargs), session.calls
+        except requests.RequestException as e:
+            return e, session.calls
+
+    def test_get_retries_read_timeout_and_5xx(self):
+        resp, calls = self.call('GET', requests.ReadTimeout(), 503, 200)
+        self.assertEqual((resp.status_code, calls), (200, 3))
+
+    def test_post_does_not_retry_read_timeout_or_5xx(self):
+        err, calls = self.call('POST', requests.ReadTimeout(), 200)
+        self.assertIsInstance(err, requests.ReadTimeout)
+        self.assertEqual(calls, 1)
+        resp, calls = self.call('POST', 502, 200)
+        self.assertEqual((resp.status_code, calls), (502, 1))
+        err, calls = self.call('POST', requests.ConnectionError('Connection aborted.'), 200)
+        self.assertIsInstance(err, requests.ConnectionError)
+        self.assertEqual(calls, 1)
+
+    def test_post_retries_failures_before_sending(self):
+        resp, calls = self.call('POST', requests.ConnectTimeout(), 429, 200)
+        self.assertEqual((resp.status_code, calls), (200, 3))
+
+    def test_post_opt_in_retries_like_get(self):
+        resp, calls = self.call('POST', requests.ReadTimeout(), 500, 200, idempotent=True)
+        self.assertEqual((resp.status_code, calls), (200, 3))
+        resp, calls = self.call('GET', 503, 200, idempotent=False)
+        self.assertEqual((resp.status_code, calls), (503, 1))
+
+    def test_refused_connection_is_retried_for_post(self):
+        session = requests.Session()
+        calls = []
+        send = session.request
+        session.request = lambda *a, **k: calls.append(1) or send(*a, **k)
+        with self.assertRaises(requests.ConnectionError):
+            http_client.post(f'http://127.0.0.1:{closed_port()}/', session=session, retries=2, backoff=0, timeout=2)
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Incremental indicators must stream the exact values of the batch sma/ema/rsi
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from utils.indicators import sma, ema, rsi, IncrementalSMA, IncrementalEMA, IncrementalRSI
+
+
+def stream(ind, values):
+    return np.array([ind.update(v) for v in values], dtype=np.float64)
+
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+def with_nans(values, seed, rate=0.1):
+    rng = np.random.default_rng(seed)
+    out = values.copy()
+    out[rng.random(len(out)) < rate] = np.nan
+    return out
+
+
+def with_repeats(values, seed):
+    # Runs of identical prices (halted or illiquid bars), including a flat stretch longer than any period
+    rng = np.random.default_rng(seed)
+    out = np.repeat(values, rng.integers(1, 6, len(values)))[:len(values)]
+    out[len(out) // 3:len(out) // 3 + 40] = out[len(out) // 3]
+    return out
+
+
+SERIES = {
+    'random': lambda: random_walk(500, 0),
+    'nan': lambda: with_nans(random_walk(500, 1), 1),
+    'leading_nan': lambda: np.concatenate(([np.nan] * 5, random_walk(300, 2))),
+    'repeated': lambda: with_repeats(random_walk(500, 3), 3),
+    'repeated_nan': lambda: with_nans(with_repeats(random_walk(500, 4), 4), 4),
+    'negative': lambda: random_walk(300, 5) - 100,
+}
+PERIODS = (1, 2, 3, 5, 14, 50)
+
+
+class IncrementalParityTest(unittest.TestCase):
+    def check(self, incremental, batch):
+        for name, make in SERIES.items():
+            values = make()
+            for period in PERIODS:
+                with self.subTest(series=name, period=period):
+                    expected = batch(pd.Series(values), period).to_numpy(dtype=np.float64)
+                    np.testing.assert_array_equal(stream(incremental(period), values), expected)
+
+    def test_sma(self):
+        self.check(IncrementalSMA, sma)
+
+    def test_ema(self):
+        self.check(IncrementalEMA, ema)
+
+    def test_rsi(self):
+        self.check(IncrementalRSI, rsi)
+
+    def test_ema_span_3(self):
+        # pandas special-cases com == 1 (span 3) in the adjust=False kernel
+        values = with_nans(with_repeats(random_walk(1000, 6), 6), 6)
+        np.testing.assert_array_equal(stream(IncrementalEMA(3), values),
+                                      ema(pd.Series(values), 3).to_numpy(dtype=np.float64))
+
+    def test_seeded_then_streamed(self):
+        values = with_nans(random_walk(400, 7), 7)
+        for cls, batch in ((IncrementalSMA, sma), (IncrementalEMA, ema), (IncrementalRSI, rsi)):
+            with self.subTest(indicator=cls.__name__):
+                ind = cls.from_series(values[:250], 14)
+                expected = batch(pd.Series(values), 14).to_numpy(dtype=np.float64)
+                np.testing.assert_array_equal(stream(ind, values[250:]), expected[250:])
+
+    def test_bar_mappings(self):
+        values = random_walk(50, 8)
+        bars = [{'close': v, 'open': v - 1} for v in values]
+        np.testing.assert_array_equal(stream(IncrementalSMA(5), bars), stream(IncrementalSMA(5), values))
+        np.testing.assert_array_equal(stream(IncrementalSMA(5, field='open'), bars), stream(IncrementalSMA(5), values - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
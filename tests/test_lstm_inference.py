@@ -0,0 +1,107 @@
+"""
+LSTM inference: the TorchScript export must score like the eager model, and the
+micro-batcher like direct batched scoring
+"""
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from models.lstm import LSTMModel
+from models.lstm_inference import LSTMPredictor, MicroBatcher, export_torchscript, load_torchscript, sliding_windows
+
+WINDOW = 30
+
+
+def prices(n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def make_model(seed=0):
+    torch.manual_seed(seed)
+    return LSTMModel(hidden_size=16, num_layers=2).eval()
+
+
+class TorchScriptExportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = make_model()
+        self.path = export_torchscript(self.model, os.path.join(self.tmp.name, 'lstm.pt'), WINDOW, example_batch=8)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_traced_matches_eager(self):
+        module, meta = load_torchscript(self.path)
+        self.assertEqual((meta['window'], meta['hidden_size'], meta['num_layers']), (WINDOW, 16, 2))
+        # Batch sizes other than the example batch the model was traced with
+        for batch in (1, 3, 8, 37):
+            with self.subTest(batch=batch):
+                x = torch.from_numpy(np.random.default_rng(batch).normal(0, 0.01, (batch, WINDOW, 1)).astype(np.float32))
+                h = torch.zeros(2, batch, 16)
+                with torch.inference_mode():
+                    torch.testing.assert_close(module(x, (h, h)), self.model(x), rtol=1e-6, atol=1e-7)
+
+    def test_loaded_predictor_matches_eager_predictor(self):
+        eager = LSTMPredictor(self.model, window=WINDOW, batch_size=16)
+        traced = LSTMPredictor.load(self.path, batch_size=16)
+        self.assertEqual(traced.window, WINDOW)
+        series = prices(200, 1)
+        for n in (1, 5, len(series) - WINDOW + 1):
+            windows = sliding_windows(series, WINDOW)[:n]
+            with self.subTest(n=n):
+                np.testing.assert_allclose(traced.predict_windows(windows), eager.predict_windows(windows),
+                                           rtol=1e-6, atol=1e-7)
+
+    def test_predictor_matches_model_predict(self):
+        # Normalization off, so the predictor and LSTMModel.predict see the same inputs
+        windows = sliding_windows(prices(120, 2), WINDOW)
+        predictor = LSTMPredictor(self.model, window=WINDOW, normalize=False, batch_size=32)
+        np.testing.assert_allclose(predictor.predict_windows(windows), self.model.predict(windows),
+                                   rtol=1e-6, atol=1e-7)
+
+
+class MicroBatcherTest(unittest.TestCase):
+    def test_concurrent_requests_match_direct_scoring(self):
+        predictor = LSTMPredictor(make_model(1), window=WINDOW, batch_size=64)
+        series = {f"S{k}": prices(WINDOW + k, k) for k in range(100)}
+        expected = predictor.predict_latest(series)
+        batcher = MicroBatcher(predictor, max_batch=32, max_delay=0.05).start()
+        futures = {}
+        barrier = threading.Barrier(4)
+
+        def client(symbols):
+            barrier.wait()
+            for s in symbols:
+                futures[s] = batcher.submit(series[s])
+
+        names = list(series)
+        threads = [threading.Thread(target=client, args=(names[k::4],)) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        try:
+            got = {s: float(f.result(timeout=10)[0]) for s, f in futures.items()}
+        finally:
+            batcher.stop()
+        self.assertEqual(batcher.stats['requests'], len(series))
+        self.assertLess(batcher.stats['batches'], len(series))
+        self.assertEqual(batcher.stats['errors'], 0)
+        for s in series:
+            self.assertAlmostEqual(got[s], expected[s], places=6)
+
+    def test_short_window_is_rejected(self):
+        batcher = MicroBatcher(LSTMPredictor(make_model(), window=WINDOW))
+        with self.assertRaises(ValueError):
+            batcher.submit(prices(WINDOW - 1, 0))
+        batcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
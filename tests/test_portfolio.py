@@ -0,0 +1,106 @@
+"""
+PortfolioBacktester: shared cash, position slots, risk limits and daily reset,
+and parity with Backtester.simulate for a single one-share slot
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from core.backtester import Backtester
+from core.portfolio import PortfolioBacktester
+from core.risk import RiskEngine
+
+LOOSE = {'max_symbol_exposure': 10.0, 'max_strategy_exposure': 10.0, 'max_gross_exposure': 10.0,
+         'max_net_exposure': 10.0}
+
+
+def portfolio(risk_config=None, strategies=('m',), **kwargs):
+    return PortfolioBacktester({name: None for name in strategies}, None, RiskEngine(risk_config), **kwargs)
+
+
+def flat_prices(symbols, rows, index=None):
+    return pd.DataFrame(np.full((rows, len(symbols)), 100.0), columns=list(symbols), index=index)
+
+
+def signal_rows(*rows):
+    return np.array(rows, dtype=np.int8)
+
+
+def entries(result):
+    return [(t['symbol'], t['index']) for t in result['trades'] if t['action'] == 'BUY']
+
+
+class PortfolioLimitsTest(unittest.TestCase):
+    def test_shared_cash_stops_entries(self):
+        # Each entry takes 40% of equity: the third no longer fits in the remaining cash
+        bt = portfolio({**LOOSE, 'max_capital_per_trade': 0.4}, initial_capital=1000)
+        result = bt.simulate(flat_prices('ABC', 2), signal_rows([1, 1, 1], [0, 0, 0]))
+        self.assertEqual(entries(result), [('A', 0), ('B', 0)])
+        self.assertEqual(result['blocked'], {'risk': 0, 'limits': 1})
+        self.assertEqual(result['cash'].iloc[0], 200.0)
+
+    def test_max_positions_caps_slots(self):
+        bt = portfolio(LOOSE, initial_capital=100000, max_positions=2)
+        prices = flat_prices('ABCDE', 3)
+        signals = signal_rows([1, 1, 1, 0, 0], [0, 0, 0, 1, 1], [-1, 0, 0, 1, 0])
+        result = bt.simulate(prices, signals)
+        # C, D and E wait while A and B hold both slots; A's exit on bar 2 frees one for D
+        self.assertEqual(entries(result), [('A', 0), ('B', 0), ('D', 2)])
+        self.assertEqual(result['blocked'], {'risk': 0, 'limits': 3})
+        self.assertLessEqual(np.count_nonzero(result['positions'], axis=1).max(), 2)
+
+    def test_exposure_limits_go_through_check_orders(self):
+        # 10% per trade against a 25% gross cap: only two entries fit, the rest are risk rejections
+        bt = portfolio({**LOOSE, 'max_gross_exposure': 0.25}, initial_capital=100000)
+        result = bt.simulate(flat_prices('ABCD', 1), signal_rows([1, 1, 1, 1]))
+        self.assertEqual(entries(result), [('A', 0), ('B', 0)])
+        self.assertEqual(result['blocked'], {'risk': 2, 'limits': 0})
+        self.assertAlmostEqual(bt.risk_engine.gross_exposure, 20000.0)
+
+    def test_circuit_breaker_blocks_entries(self):
+        bt = portfolio({'max_daily_loss': 0.001}, initial_capital=100000)
+        prices = pd.DataFrame({'A': [100.0, 90.0, 90.0, 90.0], 'B': 100.0})
+        signals = signal_rows([1, 0], [-1, 0], [0, 1], [1, 1])
+        result = bt.simulate(prices, signals)
+        self.assertTrue(bt.risk_engine.circuit_breaker)
+        self.assertEqual(entries(result), [('A', 0)])
+        self.assertEqual(result['blocked'], {'risk': 3, 'limits': 0})
+
+    def test_daily_reset_on_new_date(self):
+        index = pd.to_datetime(['2024-01-02 10:00', '2024-01-02 11:00', '2024-01-02 12:00', '2024-01-03 10:00'])
+        bt = portfolio({'max_daily_loss': 0.001}, initial_capital=100000)
+        prices = pd.DataFrame({'A': [100.0, 90.0, 90.0, 90.0], 'B': 100.0}, index=index)
+        signals = signal_rows([1, 0], [-1, 0], [0, 1], [0, 1])
+        result = bt.simulate(prices, signals)
+        # Blocked on the day the breaker tripped, allowed again the next morning
+        self.assertEqual(entries(result), [('A', 0), ('B', 3)])
+        self.assertEqual(result['blocked'], {'risk': 1, 'limits': 0})
+        self.assertFalse(bt.risk_engine.circuit_breaker)
+        self.assertEqual(result['trades'][-1]['date'], '2024-01-03')
+
+
+class SingleSlotParityTest(unittest.TestCase):
+    def test_matches_backtester_for_unit_size(self):
+        # 15% of ~1000 equity at ~100 a share sizes every entry at exactly one share
+        for seed in range(10):
+            rng = np.random.default_rng(seed)
+            close = 100 + np.cumsum(rng.normal(0, 0.3, 300))
+            signals = rng.choice([1, 0, -1], size=300, p=[0.1, 0.8, 0.1]).astype(np.int8)
+            kwargs = dict(initial_capital=1000, fee_per_trade=0.5, slippage_bps=5.0)
+            bt = Backtester({}, None, **kwargs)
+            pf = portfolio({'max_capital_per_trade': 0.15}, **kwargs)
+            with self.subTest(seed=seed):
+                equity, trades = bt.simulate(pd.DataFrame({'close': close}), signals)
+                result = pf.simulate(pd.DataFrame({'A': close}), signals[:, None])
+                self.assertEqual({t['qty'] for t in result['trades']}, {1.0})
+                self.assertEqual([(t['action'], t['index']) for t in result['trades']],
+                                 [(t['action'], t['index']) for t in trades])
+                np.testing.assert_allclose([t['price'] for t in result['trades']], [t['price'] for t in trades])
+                np.testing.assert_allclose([t['pnl'] for t in result['trades'] if 'pnl' in t],
+                                           [t['pnl'] for t in trades if 'pnl' in t])
+                # Backtester equity is realized only, so compare on bars without an open position
+                flat = result['positions'][:, 0] == 0
+                np.testing.assert_allclose(result['equity'].to_numpy()[flat], np.asarray(equity)[flat])
+
+
+if __name__ == '__main__':
+    unittest.main()
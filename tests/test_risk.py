@@ -0,0 +1,74 @@
+"""
+RiskEngine: batched check_orders must match sequential check_order + record_fill
+"""
+import copy
+import unittest
+import numpy as np
+from core.risk import RiskEngine
+
+CAPITAL = 100000.0
+TIGHT = {'max_symbol_exposure': 0.05, 'max_strategy_exposure': 0.1, 'max_gross_exposure': 0.2,
+         'max_net_exposure': 0.15}
+
+
+def sequential(risk, symbols, strategies, notionals, capital=CAPITAL):
+    risk = copy.deepcopy(risk)
+    reasons = []
+    for symbol, strategy, notional in zip(symbols, strategies, notionals):
+        reason = risk.check_order(symbol, strategy, float(notional), capital)
+        reasons.append(reason)
+        if reason == 0:
+            risk.record_fill(symbol, strategy, float(notional))
+    return reasons
+
+
+class CheckOrdersTest(unittest.TestCase):
+    def assert_matches_sequential(self, risk, symbols, strategies, notionals):
+        ok, reason = risk.check_orders(symbols, strategies, notionals, CAPITAL)
+        expected = sequential(risk, symbols, strategies, notionals)
+        self.assertEqual(reason.tolist(), expected)
+        self.assertEqual(ok.tolist(), [r == 0 for r in expected])
+
+    def test_randomized_bursts(self):
+        rng = np.random.default_rng(0)
+        for seed in range(200):
+            risk = RiskEngine(TIGHT)
+            for k in range(5):
+                risk.record_fill(f"S{k}", 'a', float(rng.normal(0, 3000)))
+            n = int(rng.integers(1, 80))
+            symbols = [f"S{k}" for k in rng.integers(0, 8, n)]
+            strategies = [str(s) for s in rng.choice(['a', 'b', 'c'], n)]
+            notionals = rng.normal(500, 4000, n)
+            with self.subTest(seed=seed, n=n):
+                self.assert_matches_sequential(risk, symbols, strategies, notionals)
+
+    def test_rejected_order_does_not_block_later_ones(self):
+        # One oversized order must not count against the gross/net room of the rest of the burst
+        risk = RiskEngine({'max_capital_per_trade': 0.1, 'max_gross_exposure': 0.3, 'max_net_exposure': 0.3})
+        symbols = ['A', 'B', 'C', 'D']
+        notionals = [50000.0, 9000.0, 9000.0, 9000.0]
+        ok, reason = risk.check_orders(symbols, ['m'] * 4, notionals, CAPITAL)
+        self.assertEqual(reason.tolist(), [1, 0, 0, 0])
+        self.assert_matches_sequential(risk, symbols, ['m'] * 4, notionals)
+
+    def test_many_rejections_use_scalar_fallback(self):
+        risk = RiskEngine(TIGHT)
+        rng = np.random.default_rng(1)
+        n = 300
+        symbols = [f"S{k}" for k in rng.integers(0, 4, n)]
+        notionals = rng.normal(2000, 6000, n)
+        ok, _ = risk.check_orders(symbols, ['a'] * n, notionals, CAPITAL)
+        self.assertGreater((~ok).sum(), 16)
+        self.assert_matches_sequential(risk, symbols, ['a'] * n, notionals)
+
+    def test_circuit_breaker_blocks_entries_not_exits(self):
+        risk = RiskEngine()
+        risk.record_fill('A', 'm', 5000.0)
+        risk.circuit_breaker = True
+        ok, reason = risk.check_orders(['A', 'B'], ['m', 'm'], [-5000.0, 1000.0], CAPITAL)
+        self.assertEqual(reason.tolist(), [0, 2])
+        self.assert_matches_sequential(risk, ['A', 'B'], ['m', 'm'], [-5000.0, 1000.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
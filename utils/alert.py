@@ -2,7 +2,12 @@
 Telegram and Pushbullet alert utility
 """
 import os
-import requests
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+from utils import http_client
 
 def send_telegram_alert(message):
     token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -13,7 +18,7 @@ def send_telegram_alert(message):
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     data = {"chat_id": chat_id, "text": message}
     try:
-        requests.post(url, data=data, timeout=8)
+        http_client.post(url, data=data, timeout=8, session=http_client.get_session("alerts"))
     except Exception as e:
         print(f"[ALERT] Telegram send failed: {e}")
 
@@ -26,6 +31,111 @@ def send_pushbullet_alert(message):
     headers = {"Access-Token": api_key, "Content-Type": "application/json"}
     data = {"type": "note", "body": message}
     try:
-        requests.post(url, headers=headers, json=data, timeout=8)
+        http_client.post(url, headers=headers, json=data, timeout=8, session=http_client.get_session("alerts"))
     except Exception as e:
         print(f"[ALERT] Pushbullet send failed: {e}")
+
+
+CHANNELS = {
+    'telegram': send_telegram_alert,
+    'pushbullet': send_pushbullet_alert,
+}
+
+
+class AlertDispatcher:
+    """Background alert sender that never blocks the caller.
+
+    submit() only enqueues. A worker thread collects alerts for coalesce_window
+    seconds after the first one arrives, then sends a single message per channel:
+    repeated texts are counted ("(x50)") and at most max_lines distinct texts are
+    listed. Sends on a channel are spaced at least min_interval seconds apart.
+    If the queue is full the alert is dropped and reported in the next message.
+    """
+    def __init__(self, coalesce_window=1.0, min_interval=2.0, max_lines=10, maxsize=10000):
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_lines = max_lines
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._last_sent = {}
+        self._dropped = 0
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, message, channels=('telegram',)):
+        try:
+            self._queue.put_nowait((tuple(channels), str(message)))
+        except queue.Full:
+            self._dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.coalesce_window
+            stop = False
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._send(batch)
+            if stop:
+                return
+
+    def _send(self, batch):
+        per_channel = {}
+        for channels, message in batch:
+            for channel in channels:
+                counts = per_channel.setdefault(channel, OrderedDict())
+                counts[message] = counts.get(message, 0) + 1
+        dropped, self._dropped = self._dropped, 0
+        for channel, counts in per_channel.items():
+            sender = CHANNELS.get(channel)
+            if sender is None:
+                print(f"[ALERT] Unknown alert channel: {channel}")
+                continue
+            lines = [f"{m} (x{n})" if n > 1 else m for m, n in counts.items()]
+            if len(lines) > self.max_lines:
+                lines = lines[:self.max_lines] + [f"... and {len(lines) - self.max_lines} more alerts"]
+            if dropped:
+                lines.append(f"[{dropped} alerts dropped]")
+            wait = self._last_sent.get(channel, 0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                sender("\n".join(lines))
+            except Exception as e:
+                print(f"[ALERT] {channel} dispatch failed: {e}")
+            self._last_sent[channel] = time.monotonic()
+
+    def close(self, timeout=10):
+        """Send whatever is queued and stop the worker."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def dispatch_alert(message, channels=('telegram',)):
+    """Queue an alert for background delivery (coalesced and rate-limited)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AlertDispatcher()
+                atexit.register(_dispatcher.close)
+    _dispatcher.submit(message, channels)
@@ -0,0 +1,95 @@
+"""
+Streaming OHLCV bar feeds: iterate chunks or single bars from CSV, the columnar store or a replay
+"""
+import os
+import numpy as np
+import pandas as pd
+from utils.ohlcv_store import PRICE_COLUMNS
+
+
+class BarFeed:
+    """Base feed. Subclasses implement _frames() yielding OHLCV DataFrames in order.
+
+    chunks() re-indexes them with global bar positions, bars() yields one bar at a
+    time, and windows(warmup) prepends the last `warmup` bars of history to each
+    chunk so strategies can compute signals incrementally with bounded memory.
+    """
+    def __init__(self, chunksize=10_000, source="feed"):
+        self.chunksize = max(1, int(chunksize))
+        self.source = source
+
+    def _frames(self):
+        raise NotImplementedError
+
+    def chunks(self):
+        pos = 0
+        for frame in self._frames():
+            if frame.empty:
+                continue
+            frame = frame.reset_index(drop='date' not in (frame.index.names or []))
+            frame.index = pd.RangeIndex(pos, pos + len(frame))
+            pos += len(frame)
+            yield frame
+
+    def bars(self):
+        for chunk in self.chunks():
+            for i, bar in zip(chunk.index, chunk.to_dict('records')):
+                bar['i'] = int(i)
+                yield bar
+
+    def windows(self, warmup=0):
+        """Yield (window, n_new): warm-up history followed by the n_new bars of a chunk."""
+        tail = None
+        for chunk in self.chunks():
+            window = chunk if tail is None or not warmup else pd.concat([tail, chunk])
+            # Shared key lets every strategy on this window reuse cached indicators
+            window.attrs['data_key'] = (self.source, int(window.index[0]), int(window.index[-1]))
+            yield window, len(chunk)
+            if warmup:
+                tail = window.iloc[-warmup:]
+
+
+class DataFrameFeed(BarFeed):
+    """Replay an in-memory DataFrame in chunks."""
+    def __init__(self, df, chunksize=10_000, source="replay"):
+        super().__init__(chunksize, source)
+        self.df = df
+
+    def _frames(self):
+        for start in range(0, len(self.df), self.chunksize):
+            yield self.df.iloc[start:start + self.chunksize]
+
+
+class CSVFeed(BarFeed):
+    """Stream an OHLCV CSV without materializing the whole file."""
+    def __init__(self, path, chunksize=10_000):
+        super().__init__(chunksize, source=path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CSV not found: {path}")
+        header = [str(c).lower() for c in pd.read_csv(path, nrows=0).columns]
+        if not set(PRICE_COLUMNS).issubset(header):
+            raise ValueError(f"CSV must contain columns: {sorted(PRICE_COLUMNS)}")
+        self.path = path
+        self.columns = PRICE_COLUMNS + (['volume'] if 'volume' in header else [])
+
+    def _frames(self):
+        for chunk in pd.read_csv(self.path, chunksize=self.chunksize):
+            chunk.columns = [str(c).lower() for c in chunk.columns]
+            yield chunk[self.columns]
+
+
+class StoreFeed(BarFeed):
+    """Stream a symbol from the columnar OHLCVStore via memory-mapped slices."""
+    def __init__(self, store, symbol, start=None, end=None, chunksize=10_000):
+        super().__init__(chunksize, source=(store.root, symbol))
+        self.arrays = store.load_arrays(symbol, start, end)
+
+    def _frames(self):
+        cols = [c for c in PRICE_COLUMNS + ['volume'] if c in self.arrays]
+        n = len(self.arrays['close'])
+        for start in range(0, n, self.chunksize):
+            stop = start + self.chunksize
+            index = None
+            if 'date' in self.arrays:
+                index = pd.DatetimeIndex(np.asarray(self.arrays['date'][start:stop]).view('datetime64[ns]'), name='date')
+            yield pd.DataFrame({c: np.asarray(self.arrays[c][start:stop]) for c in cols}, index=index)
@@ -0,0 +1,14 @@
+"""
+Environment loading: read .env once per process
+"""
+_loaded = False
+
+
+def load_env():
+    """Load .env into os.environ the first time it is called; later calls are no-ops."""
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _loaded = True
@@ -0,0 +1,180 @@
+"""
+Embedded SQLite (WAL) event store for trades, signals and positions with an indexed query API
+"""
+import os
+import json
+import sqlite3
+import datetime
+import threading
+
+# table -> typed columns besides id/ts/date/symbol/strategy; everything else is kept in `data`
+TABLES = {
+    'trades': [('qty', 'REAL'), ('entry', 'REAL'), ('exit', 'REAL'), ('pnl', 'REAL'), ('paper', 'INTEGER'), ('i', 'INTEGER')],
+    'signals': [('i', 'INTEGER'), ('signal', 'TEXT'), ('price', 'REAL')],
+    'positions': [('qty', 'REAL'), ('side', 'TEXT'), ('entry', 'REAL'), ('i', 'INTEGER')],
+}
+COMMON = ['ts', 'date', 'symbol', 'strategy']
+GROUP_COLUMNS = ('date', 'symbol', 'strategy')
+
+
+class EventStore:
+    """SQLite-backed store with indexes on date, symbol and strategy.
+
+    Writes are batched (insert_many runs one transaction per batch) and the
+    database runs in WAL mode so the dashboard can read while the trading process
+    writes. The connection is shared across threads behind a lock.
+    """
+    def __init__(self, path=os.path.join("logs", "events.db")):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock:
+            for table, cols in TABLES.items():
+                typed = ", ".join(f"{c} {t}" for c, t in cols)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, ts TEXT, date TEXT, symbol TEXT, "
+                    f"strategy TEXT, {typed}, data TEXT)")
+                for col in GROUP_COLUMNS:
+                    self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table} ({col})")
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_symbol_date ON {table} (symbol, date)")
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_strategy_date ON {table} (strategy, date)")
+
+    # --- Writes ---
+    def insert_many(self, table, records):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        cols = COMMON + [c for c, _ in TABLES[table]]
+        now = datetime.datetime.utcnow()
+        rows = []
+        for rec in records:
+            row = [rec.get('timestamp') or rec.get('ts') or now.isoformat(), rec.get('date') or now.date().isoformat(),
+                   rec.get('symbol'), rec.get('strategy')]
+            for c, t in TABLES[table]:
+                v = rec.get(c)
+                row.append(int(v) if t == 'INTEGER' and v is not None else v)
+            row.append(json.dumps(rec))
+            rows.append(row)
+        if not rows:
+            return 0
+        sql = f"INSERT INTO {table} ({', '.join(cols)}, data) VALUES ({', '.join('?' * (len(cols) + 1))})"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def insert_trades(self, records):
+        return self.insert_many('trades', records)
+
+    def insert_signals(self, records):
+        return self.insert_many('signals', records)
+
+    def insert_positions(self, records):
+        return self.insert_many('positions', records)
+
+    # --- Queries ---
+    @staticmethod
+    def _where(start=None, end=None, symbol=None, strategy=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(str(start))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(str(end))
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if strategy is not None:
+            clauses.append("strategy = ?")
+            params.append(strategy)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _events(self, table, start, end, symbol, strategy, limit):
+        where, params = self._where(start, end, symbol, strategy)
+        sql = f"SELECT data FROM {table}{where} ORDER BY id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        # Newest first from the index, returned oldest first
+        return [json.loads(r['data']) for r in reversed(self._query(sql, params))]
+
+    def trades(self, start=None, end=None, symbol=None, strategy=None, limit=None):
+        """Trades with date in [start, end] (ISO dates, inclusive), optionally filtered."""
+        return self._events('trades', start, end, symbol, strategy, limit)
+
+    def signals(self, start=None, end=None, symbol=None, strategy=None, limit=None):
+        return self._events('signals', start, end, symbol, strategy, limit)
+
+    def positions(self, start=None, end=None, symbol=None, strategy=None, limit=None):
+        return self._events('positions', start, end, symbol, strategy, limit)
+
+    def trade_count(self, start=None, end=None, symbol=None, strategy=None):
+        """Number of closed trades (records with a pnl)."""
+        where, params = self._where(start, end, symbol, strategy)
+        return self._query(f"SELECT COUNT(pnl) FROM trades{where}", params)[0][0]
+
+    def win_rate(self, start=None, end=None, symbol=None, strategy=None):
+        """Fraction of closed trades with pnl > 0, or None if there are none."""
+        where, params = self._where(start, end, symbol, strategy)
+        where += (" AND" if where else " WHERE") + " pnl IS NOT NULL"
+        row = self._query(f"SELECT COUNT(*), SUM(pnl > 0) FROM trades{where}", params)[0]
+        return (row[1] / row[0]) if row[0] else None
+
+    def pnl(self, start=None, end=None, symbol=None, strategy=None, group_by=None):
+        """Total PnL, or {group: {'pnl', 'trades', 'wins'}} when group_by is date/symbol/strategy."""
+        where, params = self._where(start, end, symbol, strategy)
+        if group_by is None:
+            return self._query(f"SELECT COALESCE(SUM(pnl), 0) FROM trades{where}", params)[0][0]
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"group_by must be one of {GROUP_COLUMNS}")
+        rows = self._query(
+            f"SELECT {group_by} AS k, SUM(pnl) AS pnl, COUNT(pnl) AS trades, SUM(pnl > 0) AS wins "
+            f"FROM trades{where} GROUP BY {group_by} ORDER BY {group_by}", params)
+        return {r['k']: {'pnl': r['pnl'] or 0.0, 'trades': r['trades'], 'wins': r['wins'] or 0} for r in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def last_write_time(path):
+    """mtime of the store's last committed write (database file or non-empty WAL), or None if it does not exist.
+
+    An empty -wal file is what a reader creates on open, so it does not count.
+    """
+    if not os.path.exists(path):
+        return None
+    times = [os.stat(path).st_mtime]
+    wal = path + "-wal"
+    if os.path.exists(wal) and os.stat(wal).st_size:
+        times.append(os.stat(wal).st_mtime)
+    return max(times)
+
+
+def is_current(path, log_paths):
+    """True when the store at path was written no earlier than every existing JSONL log in log_paths.
+
+    The logger mirrors each batch into the store right after writing it to the
+    JSONL logs, so a store the latest run wrote to is at least as new as they
+    are; one left by an earlier run (the latest without --event-store) is older.
+    """
+    written = last_write_time(path)
+    if written is None:
+        return False
+    return all(written >= os.stat(p).st_mtime for p in log_paths if os.path.exists(p))
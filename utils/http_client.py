@@ -0,0 +1,86 @@
+"""
+Shared HTTP client layer: pooled keep-alive sessions and retries with jittered backoff
+"""
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Methods a server may safely see twice; anything else (POST, PATCH) is only
+# retried when the request provably never left this process
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"))
+# 429 means the request was turned away unprocessed, so it is safe to resend whatever the method
+UNSENT_STATUSES = (429,)
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_session(name="default", pool_maxsize=10):
+    """Process-wide requests.Session per name, reusing keep-alive connections.
+
+    Use separate names for unrelated services (alerts, news, broker adapters) so
+    they do not compete for the same connection pool.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[name] = session
+    return session
+
+
+def request(method, url, session=None, retries=2, backoff=0.5, max_backoff=8.0, timeout=8,
+            retry_statuses=RETRY_STATUSES, idempotent=None, **kwargs):
+    """HTTP request over a pooled session with bounded retries.
+
+    Failures are retried up to `retries` times, sleeping a random time in
+    [0, min(max_backoff, backoff * 2**attempt)] between attempts (full jitter).
+    Idempotent requests (GET, PUT, DELETE, ... unless idempotent=False) retry
+    connection errors, timeouts and retry_statuses. Others (POST, PATCH, unless
+    idempotent=True) may already have been acted on after a read timeout or 5xx,
+    so they only retry failures before the request was sent (connect timeout,
+    refused connection) and 429. Returns the last response, or raises the last
+    exception if no response was received.
+    """
+    session = session or get_session()
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    if not idempotent:
+        retry_statuses = tuple(s for s in retry_statuses if s in UNSENT_STATUSES)
+    attempt = 0
+    while True:
+        try:
+            resp = session.request(method, url, timeout=timeout, **kwargs)
+            if resp.status_code not in retry_statuses or attempt >= retries:
+                return resp
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries or not (idempotent or _not_sent(e)):
+                raise
+        time.sleep(random.uniform(0, min(max_backoff, backoff * (2 ** attempt))))
+        attempt += 1
+
+
+def _not_sent(exc):
+    """True when exc failed while connecting, i.e. before any of the request reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying connect error
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(reason, (NewConnectionError, ConnectionRefusedError)) or isinstance(exc.__cause__, ConnectionRefusedError)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,134 @@
+"""
+Shared memoizing indicator layer: LRU cache keyed by (data, indicator, params)
+"""
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.indicators import sma, ema, rsi
+
+INDICATORS = {
+    'sma': sma,
+    'ema': ema,
+    'rsi': rsi,
+    'lag': lambda series, period: series.shift(period),
+}
+
+
+def register_indicator(name, func):
+    """Register func(series, **params) -> Series under name for cached lookups."""
+    INDICATORS[name] = func
+
+
+class IndicatorCache:
+    """LRU cache of computed indicator arrays shared across strategies.
+
+    Entries are keyed by (data key, indicator name, column, params). The data key
+    is df.attrs['data_key'] when the loader tags the frame (e.g. symbol, range and
+    version) plus the frame's length and first/last index labels, since pandas
+    carries attrs over to slices; otherwise the frame's identity, and entries are
+    dropped when the frame is garbage collected. Cached arrays are read-only.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._watched = set()
+        # Identity keys of collected frames, dropped on the next locked call (see _collected)
+        self._collected = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, data, name, column='close', **params):
+        func = INDICATORS.get(name)
+        if func is None:
+            raise KeyError(f"Unknown indicator: {name}")
+        if self._collected:
+            # Before keying: a new frame may reuse a collected frame's id
+            with self._lock:
+                self._drain_collected()
+        dkey = self._data_key(data)
+        key = (dkey, name, column, tuple(sorted(params.items())))
+        if dkey is not None:
+            with self._lock:
+                arr = self._entries.get(key)
+                if arr is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return arr
+        series = data[column]
+        if not isinstance(series, pd.Series):
+            series = pd.Series(np.asarray(series, dtype=np.float64), copy=False)
+        arr = np.asarray(func(series, **params), dtype=np.float64)
+        arr.flags.writeable = False
+        with self._lock:
+            self.misses += 1
+            if dkey is not None and arr.nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = arr
+                self._nbytes += arr.nbytes
+                self._evict()
+        return arr
+
+    def _data_key(self, data):
+        attrs = getattr(data, 'attrs', None)
+        if attrs and attrs.get('data_key') is not None:
+            # iloc/mask slices inherit attrs, so the tag alone would alias the parent frame
+            index = getattr(data, 'index', None)
+            bounds = (index[0], index[-1]) if index is not None and len(index) else (None, None)
+            return ('key', attrs['data_key'], len(data)) + bounds
+        dkey = ('id', id(data), len(data))
+        if dkey not in self._watched:
+            try:
+                weakref.finalize(data, self._collected.append, dkey)
+            except TypeError:
+                # Not weak-referenceable (e.g. plain dict): identity is unsafe to cache on
+                return None
+            self._watched.add(dkey)
+        return dkey
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._entries:
+            _, arr = self._entries.popitem(last=False)
+            self._nbytes -= arr.nbytes
+            self.evictions += 1
+
+    def invalidate(self, data_key):
+        """Drop every entry for a data key (raw key from attrs, or an identity key)."""
+        with self._lock:
+            self._drop(data_key)
+
+    def _drain_collected(self):
+        # Finalizers can fire during GC on a thread that already holds the lock, so
+        # they only queue the key (list.append is atomic); entries are dropped here
+        while self._collected:
+            self._drop(self._collected.pop())
+
+    def _drop(self, data_key):
+        self._watched.discard(data_key)
+        for key in [k for k in self._entries if k[0] == data_key or k[0][:2] == ('key', data_key)]:
+            self._nbytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._watched.clear()
+            self._collected.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._nbytes,
+        }
+
+
+# Process-wide cache shared by all strategies
+default_cache = IndicatorCache()
@@ -1,6 +1,7 @@
 """
 Technical Indicators Utility Module
 """
+import math
 import pandas as pd
 
 def sma(series, period):
@@ -19,3 +20,207 @@ def rsi(series, period=14):
     rs = gain / denom
     rsi = 100 - (100 / (1 + rs))
     return rsi.fillna(0)
+
+
+# --- Incremental (streaming) indicators ---
+# O(1) per-bar counterparts of sma/ema/rsi above. They replicate pandas' rolling
+# and ewm kernels step for step so streamed values equal the batch versions exactly.
+
+def _bar_value(bar, field):
+    if isinstance(bar, (int, float)):
+        return float(bar)
+    try:
+        return float(bar[field])
+    except (TypeError, IndexError, KeyError):
+        return float(bar)
+
+
+class IncrementalSMA:
+    """Rolling mean over a ring buffer; equals sma(series, period)."""
+    __slots__ = ('period', 'field', 'value', '_buf', '_head', '_count', '_nobs', '_sum',
+                 '_comp_add', '_comp_remove', '_neg_ct', '_same_ct', '_prev')
+
+    def __init__(self, period, field='close'):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = int(period)
+        self.field = field
+        self.reset()
+
+    def reset(self):
+        self.value = float('nan')
+        self._buf = [0.0] * self.period
+        self._head = 0
+        self._count = 0
+        self._nobs = 0
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._neg_ct = 0
+        self._same_ct = 0
+        self._prev = float('nan')
+
+    @classmethod
+    def from_series(cls, series, period, **kwargs):
+        """Build an indicator seeded with a historical batch."""
+        ind = cls(period, **kwargs)
+        ind.seed(series)
+        return ind
+
+    def seed(self, series):
+        for v in series:
+            self.update(v)
+        return self.value
+
+    def _add(self, val):
+        if val != val:
+            return
+        self._nobs += 1
+        y = val - self._comp_add
+        t = self._sum + y
+        self._comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct += 1
+        if val == self._prev:
+            self._same_ct += 1
+        else:
+            self._same_ct = 1
+        self._prev = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self._nobs -= 1
+        y = -val - self._comp_remove
+        t = self._sum + y
+        self._comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct -= 1
+
+    def update(self, bar):
+        val = _bar_value(bar, self.field)
+        if self.period == 1:
+            # pandas recomputes a size-1 window from scratch at every step
+            self._nobs = self._neg_ct = self._same_ct = 0
+            self._sum = self._comp_add = self._comp_remove = 0.0
+            self._prev = val
+        elif self._count >= self.period:
+            self._remove(self._buf[self._head])
+        self._add(val)
+        self._buf[self._head] = val
+        self._head = (self._head + 1) % self.period
+        self._count += 1
+        self.value = self._calc()
+        return self.value
+
+    def _calc(self):
+        nobs = self._nobs
+        if nobs < self.period or nobs == 0:
+            return float('nan')
+        result = self._sum / nobs
+        if self._same_ct >= nobs:
+            result = self._prev
+        elif self._neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self._neg_ct == nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class IncrementalEMA:
+    """Exponential moving average (adjust=False); equals ema(series, period)."""
+    __slots__ = ('period', 'field', 'value', '_com', '_alpha', '_old_wt_factor', '_old_wt', '_new_wt', '_started')
+
+    def __init__(self, period, field='close'):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = period
+        self.field = field
+        self._com = (period - 1) / 2.0
+        self._alpha = 1. / (1. + self._com)
+        self._old_wt_factor = 1. - self._alpha
+        self.reset()
+
+    def reset(self):
+        self.value = float('nan')
+        self._old_wt = 1.
+        self._new_wt = self._alpha
+        self._started = False
+
+    @classmethod
+    def from_series(cls, series, period, **kwargs):
+        """Build an indicator seeded with a historical batch."""
+        ind = cls(period, **kwargs)
+        ind.seed(series)
+        return ind
+
+    def seed(self, series):
+        for v in series:
+            self.update(v)
+        return self.value
+
+    def update(self, bar):
+        cur = _bar_value(bar, self.field)
+        weighted = self.value
+        if not self._started:
+            self._started = True
+            self.value = cur
+            return cur
+        if weighted == weighted:
+            # NaN bars still decay the old weight (ignore_na=False)
+            self._old_wt *= self._old_wt_factor
+            if self._com == 1:
+                # pandas special-cases com == 1 (span 3) for adjust=False
+                self._new_wt = 1. - self._old_wt
+            if cur == cur:
+                if weighted != cur:
+                    weighted = self._old_wt * weighted + self._new_wt * cur
+                    weighted /= (self._old_wt + self._new_wt)
+                self._old_wt = 1.
+        elif cur == cur:
+            weighted = cur
+        self.value = weighted
+        return weighted
+
+
+class IncrementalRSI:
+    """RSI from rolling mean gain/loss; equals rsi(series, period)."""
+    __slots__ = ('period', 'field', 'value', '_prev_close', '_gain', '_loss')
+
+    def __init__(self, period=14, field='close'):
+        self.period = period
+        self.field = field
+        self.reset()
+
+    def reset(self):
+        self.value = float('nan')
+        self._prev_close = float('nan')
+        self._gain = IncrementalSMA(self.period)
+        self._loss = IncrementalSMA(self.period)
+
+    @classmethod
+    def from_series(cls, series, period=14, **kwargs):
+        """Build an indicator seeded with a historical batch."""
+        ind = cls(period, **kwargs)
+        ind.seed(series)
+        return ind
+
+    def seed(self, series):
+        for v in series:
+            self.update(v)
+        return self.value
+
+    def update(self, bar):
+        close = _bar_value(bar, self.field)
+        delta = close - self._prev_close
+        self._prev_close = close
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-(delta if delta < 0 else 0.0))
+        # Prevent divide-by-zero; add small epsilon to denominator
+        denom = loss if loss > 0 else 1e-10
+        rs = gain / denom
+        value = 100 - (100 / (1 + rs))
+        self.value = 0.0 if value != value else value
+        return self.value
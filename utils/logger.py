@@ -4,18 +4,191 @@ Trade logger for JSON/CSV logs and daily PnL reports
 import os
 import json
 import csv
+import atexit
 import datetime
+import threading
+from utils.pnl_aggregates import record_trade, save_dirty
+
+# Optional buffered backend; None means write-through (open/append/close per event)
+_backend = None
+# Optional utils.event_store.EventStore mirroring the JSONL logs
+_event_store = None
+_EVENT_TABLES = {'trades.json': 'trades', 'signals.json': 'signals', 'positions.json': 'positions'}
+
+
+class BufferedJSONLWriter:
+    """Batched JSONL writer with persistent file handles and a background flusher.
+
+    Records are buffered in memory and written by a daemon thread when a file's
+    buffer reaches max_batch records or every flush_interval seconds. flush() and
+    close() write everything synchronously. fsync_every=N forces the data to disk
+    after every N records per file (0 leaves it to the OS). on_flush, if given, is
+    called after each flush (e.g. to persist in-memory summaries).
+    """
+    def __init__(self, max_batch=500, flush_interval=1.0, fsync_every=0, on_flush=None):
+        self.max_batch = max(1, int(max_batch))
+        self.flush_interval = float(flush_interval)
+        self.fsync_every = int(fsync_every)
+        self.on_flush = on_flush
+        self._buffers = {}
+        self._handles = {}
+        self._unsynced = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-flusher", daemon=True)
+        self._thread.start()
+
+    def write(self, path, record):
+        with self._cond:
+            if self._closed:
+                return False
+            buf = self._buffers.setdefault(path, [])
+            # Shallow copy so later mutation by the caller does not leak into the log
+            buf.append(dict(record))
+            self._pending += 1
+            if len(buf) >= self.max_batch:
+                self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and not any(len(b) >= self.max_batch for b in self._buffers.values()):
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _take(self):
+        with self._cond:
+            batches = {p: b for p, b in self._buffers.items() if b}
+            self._buffers = {}
+            self._pending = 0
+        return batches
+
+    def flush(self):
+        # Serialize flushes so batches for a file are written in order
+        with self._io_lock:
+            for path, records in self._take().items():
+                try:
+                    f = self._handle(path)
+                    f.write("".join(json.dumps(r) + "\n" for r in records))
+                    f.flush()
+                    if self.fsync_every:
+                        self._unsynced[path] = self._unsynced.get(path, 0) + len(records)
+                        if self._unsynced[path] >= self.fsync_every:
+                            os.fsync(f.fileno())
+                            self._unsynced[path] = 0
+                except Exception as e:
+                    # Non-fatal: keep trading even if a log write fails
+                    print(f"[LOGGER] Failed to write {len(records)} records to {path}: {e}")
+                # After the JSONL write, so a store in use is never older than its logs (event_store.is_current)
+                _mirror_events(path, records)
+            if self.on_flush is not None:
+                self.on_flush()
+
+    def _handle(self, path):
+        f = self._handles.get(path)
+        if f is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            f = self._handles[path] = open(path, "a")
+        return f
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        with self._io_lock:
+            for f in self._handles.values():
+                try:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+                except Exception:
+                    pass
+            self._handles = {}
+
+
+def configure_event_store(store):
+    """Mirror trades/signals/positions into an EventStore (or a path to one); None disables.
+
+    With the buffered backend records are inserted one batch per flush.
+    """
+    global _event_store
+    if isinstance(store, str):
+        from utils.event_store import EventStore
+        store = EventStore(store)
+    _event_store = store
+    return store
+
+
+def _mirror_events(path, records):
+    store = _event_store
+    table = _EVENT_TABLES.get(os.path.basename(path))
+    if store is None or table is None:
+        return
+    try:
+        store.insert_many(table, records)
+    except Exception as e:
+        print(f"[LOGGER] Failed to mirror {len(records)} records to event store: {e}")
+
+
+def configure_buffered_logging(max_batch=500, flush_interval=1.0, fsync_every=0):
+    """Route the log_*_json writers through a BufferedJSONLWriter (flushed at exit).
+
+    The PnL summary is then saved by the flusher instead of on the trading thread.
+    """
+    global _backend
+    shutdown_logging()
+    _backend = BufferedJSONLWriter(max_batch=max_batch, flush_interval=flush_interval, fsync_every=fsync_every,
+                                   on_flush=save_dirty)
+    return _backend
+
+
+def flush_logs():
+    if _backend is not None:
+        _backend.flush()
+
+
+def shutdown_logging():
+    """Flush and close the buffered backend; later writes go straight to disk."""
+    global _backend
+    backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
+    save_dirty()
+
+
+atexit.register(shutdown_logging)
+
+
+def _append_jsonl(fname, entry):
+    backend = _backend
+    if backend is not None and backend.write(fname, entry):
+        return
+    os.makedirs(os.path.dirname(fname) or ".", exist_ok=True)
+    with open(fname, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    _mirror_events(fname, [entry])
 
 def log_trade_json(trade, out_dir="logs"):
-    os.makedirs(out_dir, exist_ok=True)
     fname = os.path.join(out_dir, "trades.json")
     # Auto-augment with timestamp/date if missing
     if 'timestamp' not in trade:
         trade['timestamp'] = datetime.datetime.utcnow().isoformat()
     if 'date' not in trade:
         trade['date'] = datetime.date.today().isoformat()
-    with open(fname, "a") as f:
-        f.write(json.dumps(trade) + "\n")
+    # Keep per-day/strategy/symbol summaries current so readers skip the raw log.
+    # Folded before the append so a summary rebuilt from trades.json does not count it twice
+    if trade.get('pnl') is not None:
+        record_trade(trade, out_dir, autosave=_backend is None)
+    _append_jsonl(fname, trade)
 
 def log_trade_csv(trade, out_dir="logs"):
     os.makedirs(out_dir, exist_ok=True)
@@ -36,27 +209,26 @@ def log_daily_pnl(pnl, out_dir="logs"):
 
 def log_signal_json(signal_entry, out_dir="logs"):
     """Append a signal entry to logs/signals.json as JSONL."""
-    os.makedirs(out_dir, exist_ok=True)
-    fname = os.path.join(out_dir, "signals.json")
-    with open(fname, "a") as f:
-        f.write(json.dumps(signal_entry) + "\n")
+    _append_jsonl(os.path.join(out_dir, "signals.json"), signal_entry)
 
 def log_position_json(position_entry, out_dir="logs"):
     """Append a position entry to logs/positions.json as JSONL."""
-    os.makedirs(out_dir, exist_ok=True)
-    fname = os.path.join(out_dir, "positions.json")
-    with open(fname, "a") as f:
-        f.write(json.dumps(position_entry) + "\n")
+    _append_jsonl(os.path.join(out_dir, "positions.json"), position_entry)
 
 def log_positions_state(positions, out_dir="logs"):
     """Overwrite logs/positions_state.json with the list of currently open positions.
     Expected `positions` is a list of dicts representing open positions.
+    For frequent updates prefer utils.position_store.PositionStore, which appends
+    deltas instead of rewriting the whole file.
     """
     os.makedirs(out_dir, exist_ok=True)
     fname = os.path.join(out_dir, "positions_state.json")
     try:
-        with open(fname, "w") as f:
+        # Write to a temp file and rename so readers never see a partial file
+        tmp = fname + ".tmp"
+        with open(tmp, "w") as f:
             json.dump(positions or [], f)
+        os.replace(tmp, fname)
     except Exception as e:
         # Non-fatal: continue even if state file write fails
         print(f"[LOGGER] Failed to write positions_state.json: {e}")
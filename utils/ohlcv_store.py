@@ -0,0 +1,142 @@
+"""
+Columnar binary OHLCV store: per-symbol, per-column raw arrays loaded via memory-mapping
+"""
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+class OHLCVStore:
+    """On-disk OHLCV store laid out as <root>/<symbol>/<column>.bin plus meta.json.
+
+    Prices are float64, volume is int64 when the source is integral (else float64)
+    and dates are int64 nanoseconds since the epoch, sorted ascending. Columns are
+    opened with np.memmap, so a date-range load only touches the pages it needs.
+    """
+    def __init__(self, root=os.path.join("data", "store")):
+        self.root = root
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, str(symbol))
+
+    def meta(self, symbol):
+        path = os.path.join(self._dir(symbol), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.exists(os.path.join(self.root, d, "meta.json")))
+
+    # --- Import ---
+    def import_csv(self, csv_path, symbol, chunksize=1_000_000):
+        """Convert an OHLCV CSV into the columnar layout, streaming it in chunks."""
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV not found: {csv_path}")
+        final_dir = self._dir(symbol)
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        files = {}
+        dtypes = {}
+        rows = 0
+        last_date = None
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+                chunk.columns = [str(c).lower() for c in chunk.columns]
+                if not set(PRICE_COLUMNS).issubset(chunk.columns):
+                    raise ValueError(f"CSV must contain columns: {sorted(PRICE_COLUMNS)}")
+                cols = {c: chunk[c].to_numpy(dtype=np.float64) for c in PRICE_COLUMNS}
+                if 'volume' in chunk.columns:
+                    vol = chunk['volume'].to_numpy()
+                    if 'volume' not in dtypes:
+                        dtypes['volume'] = 'int64' if vol.dtype.kind in 'iu' else 'float64'
+                    cols['volume'] = vol.astype(dtypes['volume'])
+                if 'date' in chunk.columns:
+                    dates = pd.to_datetime(chunk['date']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+                    if len(dates) and ((np.diff(dates) < 0).any() or (last_date is not None and dates[0] < last_date)):
+                        raise ValueError("CSV dates must be sorted ascending for the columnar store")
+                    if len(dates):
+                        last_date = dates[-1]
+                    cols['date'] = dates
+                for name, arr in cols.items():
+                    dtypes.setdefault(name, str(arr.dtype))
+                    if name not in files:
+                        files[name] = open(os.path.join(tmp_dir, f"{name}.bin"), "wb")
+                    np.ascontiguousarray(arr, dtype=dtypes[name]).tofile(files[name])
+                rows += len(chunk)
+        finally:
+            for f in files.values():
+                f.close()
+        stat = os.stat(csv_path)
+        meta = {
+            'symbol': str(symbol),
+            'rows': rows,
+            'columns': dtypes,
+            'source': {'path': os.path.abspath(csv_path), 'mtime': stat.st_mtime, 'size': stat.st_size},
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        return meta
+
+    def is_current(self, csv_path, symbol):
+        """True if symbol was imported from csv_path and the CSV has not changed since."""
+        meta = self.meta(symbol)
+        if not meta or not os.path.exists(csv_path):
+            return False
+        stat = os.stat(csv_path)
+        src = meta.get('source', {})
+        return (src.get('path') == os.path.abspath(csv_path)
+                and src.get('mtime') == stat.st_mtime and src.get('size') == stat.st_size)
+
+    # --- Load ---
+    def load_arrays(self, symbol, start=None, end=None):
+        """Dict of read-only memory-mapped column views for [start, end] (inclusive)."""
+        meta = self.meta(symbol)
+        if meta is None:
+            raise FileNotFoundError(f"Symbol not in store: {symbol}")
+        rows = meta['rows']
+        cols = {}
+        for name, dtype in meta['columns'].items():
+            path = os.path.join(self._dir(symbol), f"{name}.bin")
+            cols[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+        lo, hi = 0, rows
+        if 'date' in cols and (start is not None or end is not None):
+            # Binary search touches only a few pages of the mapped date column
+            if start is not None:
+                lo = int(np.searchsorted(cols['date'], _to_ns(start), side='left'))
+            if end is not None:
+                hi = int(np.searchsorted(cols['date'], _to_ns(end), side='right'))
+        return {name: arr[lo:hi] for name, arr in cols.items()}
+
+    def load(self, symbol, start=None, end=None):
+        """DataFrame of OHLCV for [start, end]; usable as a Backtester data_loader."""
+        cols = self.load_arrays(symbol, start, end)
+        index = pd.DatetimeIndex(cols.pop('date').view('datetime64[ns]'), name='date') if 'date' in cols else None
+        order = PRICE_COLUMNS + (['volume'] if 'volume' in cols else [])
+        return pd.DataFrame({c: np.asarray(cols[c]) for c in order}, index=index)
+
+    def ensure_csv(self, csv_path, symbol=None):
+        """Import a CSV only when it is new or changed; returns the store symbol."""
+        symbol = symbol or os.path.splitext(os.path.basename(csv_path))[0]
+        if not self.is_current(csv_path, symbol):
+            print(f"[DATA] Importing {csv_path} into columnar store as {symbol}")
+            self.import_csv(csv_path, symbol)
+        return symbol
+
+    def load_csv(self, csv_path, symbol=None, start=None, end=None):
+        """Load a CSV through the store, importing it only when it is new or changed."""
+        return self.load(self.ensure_csv(csv_path, symbol), start, end)
+
+
+def _to_ns(value):
+    return pd.Timestamp(value).to_datetime64().astype('datetime64[ns]').view(np.int64)
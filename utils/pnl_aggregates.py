@@ -0,0 +1,196 @@
+"""
+Incrementally maintained PnL aggregates: per-day, per-strategy and per-symbol summary tables
+"""
+import os
+import json
+import time
+import threading
+
+GROUPS = {
+    'day': 'date',
+    'strategy': 'strategy',
+    'symbol': 'symbol',
+}
+
+
+def _empty_bucket():
+    return {'pnl': 0.0, 'trades': 0, 'wins': 0, 'win_rate': 0.0, 'equity': 0.0, 'peak': 0.0, 'max_drawdown': 0.0}
+
+
+def _add(bucket, pnl):
+    bucket['pnl'] += pnl
+    bucket['trades'] += 1
+    if pnl > 0:
+        bucket['wins'] += 1
+    bucket['win_rate'] = bucket['wins'] / bucket['trades']
+    # Drawdown of the bucket's cumulative PnL curve, in the order trades arrive
+    bucket['equity'] += pnl
+    bucket['peak'] = max(bucket['peak'], bucket['equity'])
+    bucket['max_drawdown'] = max(bucket['max_drawdown'], bucket['peak'] - bucket['equity'])
+
+
+class PnLAggregates:
+    """Summary tables updated in O(1) per closed trade.
+
+    Keeps a 'total' bucket plus one bucket per day, strategy and symbol, each with
+    pnl, trade count, wins, win rate and max drawdown. Persisted as one small JSON
+    file so readers never have to scan raw trade history.
+    """
+    def __init__(self, tables=None):
+        self.tables = tables or {'total': _empty_bucket(), **{g: {} for g in GROUPS}}
+
+    def add_trade(self, trade):
+        if trade.get('pnl') is None:
+            return False
+        pnl = float(trade['pnl'])
+        _add(self.tables['total'], pnl)
+        for group, field in GROUPS.items():
+            key = str(trade.get(field))
+            bucket = self.tables[group].get(key)
+            if bucket is None:
+                bucket = self.tables[group][key] = _empty_bucket()
+            _add(bucket, pnl)
+        return True
+
+    def add_trades(self, trades):
+        for trade in trades:
+            self.add_trade(trade)
+        return self
+
+    def table(self, group):
+        return self.tables['total'] if group == 'total' else self.tables.get(group, {})
+
+    def to_dict(self):
+        return self.tables
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls()
+        if data:
+            agg.tables['total'].update(data.get('total', {}))
+            for group in GROUPS:
+                agg.tables[group].update(data.get(group, {}))
+        return agg
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.tables, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_trade_log(cls, path):
+        """Rebuild the tables from a JSONL trade log (empty if the file is missing)."""
+        agg = cls()
+        if not os.path.exists(path):
+            return agg
+        with open(path) as f:
+            for line in f:
+                try:
+                    agg.add_trade(json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+        return agg
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except Exception:
+            return cls()
+
+
+def load_summary(path=os.path.join("logs", "pnl_summary.json")):
+    """Read a persisted summary as plain tables.
+
+    When the summary file is missing it is rebuilt from the trades.json next to
+    it; None if neither exists.
+    """
+    if os.path.exists(path):
+        return PnLAggregates.load(path).to_dict()
+    trades_path = os.path.join(os.path.dirname(path), "trades.json")
+    if not os.path.exists(trades_path):
+        return None
+    return PnLAggregates.from_trade_log(trades_path).to_dict()
+
+
+# Live trade aggregates, loaded once per process and kept in step with trades.json.
+# Updates are in-memory; save_dirty() persists them (the buffered log flusher and
+# shutdown_logging call it, write-through logging autosaves every SAVE_EVERY
+# trades or SAVE_INTERVAL seconds).
+SAVE_EVERY = 100
+SAVE_INTERVAL = 1.0
+_live = {}
+_dirty = {}
+_last_save = {}
+_live_lock = threading.Lock()
+_save_lock = threading.Lock()
+
+
+def _live_aggregates(path):
+    agg = _live.get(path)
+    if agg is None:
+        if os.path.exists(path):
+            agg = PnLAggregates.load(path)
+        else:
+            # No summary yet: fold the existing trade log so totals are not reset to zero
+            agg = PnLAggregates.from_trade_log(os.path.join(os.path.dirname(path), "trades.json"))
+            if agg.tables['total']['trades']:
+                _dirty[path] = 1
+        _live[path] = agg
+        _last_save[path] = time.monotonic()
+    return agg
+
+
+def _take_dirty(paths):
+    # Serialize under the lock, write outside it so recording never waits on disk
+    snapshots = {}
+    for path in paths:
+        if _dirty.get(path):
+            snapshots[path] = json.dumps(_live[path].tables)
+            _dirty[path] = 0
+            _last_save[path] = time.monotonic()
+    return snapshots
+
+
+def _write(snapshots):
+    with _save_lock:
+        for path, text in snapshots.items():
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "w") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except Exception as e:
+                print(f"[LOGGER] Failed to write pnl_summary.json: {e}")
+
+
+def record_trade(trade, out_dir="logs", autosave=True):
+    """Fold a closed trade into the in-memory summary for out_dir/pnl_summary.json.
+
+    Must be called before the trade is appended to trades.json, so a summary
+    rebuilt from the log does not count it twice. autosave=False leaves
+    persisting to save_dirty().
+    """
+    path = os.path.join(out_dir, "pnl_summary.json")
+    snapshots = None
+    with _live_lock:
+        if not _live_aggregates(path).add_trade(trade):
+            return
+        _dirty[path] = _dirty.get(path, 0) + 1
+        if autosave and (_dirty[path] >= SAVE_EVERY or time.monotonic() - _last_save[path] >= SAVE_INTERVAL):
+            snapshots = _take_dirty([path])
+    if snapshots:
+        _write(snapshots)
+
+
+def save_dirty():
+    """Write every live summary with unsaved trades."""
+    with _live_lock:
+        snapshots = _take_dirty(list(_dirty))
+    _write(snapshots)
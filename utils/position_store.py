@@ -0,0 +1,134 @@
+"""
+Open positions store: append-only delta log with periodic atomic snapshots
+"""
+import os
+import json
+import threading
+
+
+def _write_atomic(path, obj):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _apply(positions, delta):
+    op = delta.get('op')
+    if op == 'open':
+        positions[delta['id']] = delta['position']
+    elif op == 'update' and delta['id'] in positions:
+        positions[delta['id']].update(delta['fields'])
+    elif op == 'close':
+        positions.pop(delta['id'], None)
+
+
+def _load(snapshot_path, delta_path):
+    positions = {}
+    if os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path) as f:
+                for p in json.load(f) or []:
+                    positions[p.get('id', len(positions))] = p
+        except Exception:
+            pass
+    n = 0
+    if os.path.exists(delta_path):
+        with open(delta_path) as f:
+            for line in f:
+                try:
+                    delta = json.loads(line)
+                except ValueError:
+                    # Partially written tail line; ignore
+                    continue
+                _apply(positions, delta)
+                n += 1
+    return positions, n
+
+
+def read_open_positions(out_dir="logs"):
+    """Current open positions (snapshot + pending deltas) without touching the files."""
+    positions, _ = _load(os.path.join(out_dir, "positions_state.json"),
+                         os.path.join(out_dir, "positions_state.delta.jsonl"))
+    return list(positions.values())
+
+
+class PositionStore:
+    """Tracks open positions with incremental writes.
+
+    Every open/update/close is appended as one line to positions_state.delta.jsonl.
+    Every compact_every deltas the full state is written to positions_state.json
+    via temp file + rename and the delta log is truncated. Deltas are idempotent
+    (keyed by position id), so replaying them over a newer snapshot is harmless.
+    """
+    def __init__(self, out_dir="logs", compact_every=500):
+        self.out_dir = out_dir
+        self.compact_every = int(compact_every)
+        self.snapshot_path = os.path.join(out_dir, "positions_state.json")
+        self.delta_path = os.path.join(out_dir, "positions_state.delta.jsonl")
+        os.makedirs(out_dir, exist_ok=True)
+        self.positions, self._deltas = _load(self.snapshot_path, self.delta_path)
+        self._delta_file = open(self.delta_path, "a")
+        # Shared by the event engine's shard workers
+        self._lock = threading.RLock()
+
+    def open(self, position, position_id=None):
+        pid = position_id or position.get('id') or f"{position.get('symbol')}:{position.get('strategy')}:{position.get('i')}"
+        position = dict(position, id=pid)
+        with self._lock:
+            self.positions[pid] = position
+            self._append({'op': 'open', 'id': pid, 'position': position})
+        return pid
+
+    def update(self, position_id, **fields):
+        with self._lock:
+            if position_id in self.positions:
+                self.positions[position_id].update(fields)
+                self._append({'op': 'update', 'id': position_id, 'fields': fields})
+
+    def close(self, position_id):
+        with self._lock:
+            if self.positions.pop(position_id, None) is not None:
+                self._append({'op': 'close', 'id': position_id})
+
+    def open_positions(self):
+        with self._lock:
+            return list(self.positions.values())
+
+    def reset(self, positions=None):
+        """Replace the whole state (e.g. at the start of a fresh paper run)."""
+        with self._lock:
+            self.positions = {}
+            for p in positions or []:
+                pid = p.get('id') or f"{p.get('symbol')}:{p.get('strategy')}:{p.get('i')}"
+                self.positions[pid] = dict(p, id=pid)
+            self.compact()
+
+    def _append(self, delta):
+        try:
+            self._delta_file.write(json.dumps(delta) + "\n")
+            self._delta_file.flush()
+        except Exception as e:
+            # Non-fatal: continue even if state file write fails
+            print(f"[LOGGER] Failed to append position delta: {e}")
+        self._deltas += 1
+        if self._deltas >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Write a full snapshot atomically and truncate the delta log."""
+        with self._lock:
+            try:
+                _write_atomic(self.snapshot_path, self.open_positions())
+                self._delta_file.close()
+                self._delta_file = open(self.delta_path, "w")
+                self._deltas = 0
+            except Exception as e:
+                print(f"[LOGGER] Failed to compact positions state: {e}")
+
+    def close_store(self):
+        with self._lock:
+            self.compact()
+            self._delta_file.close()